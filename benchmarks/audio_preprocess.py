@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Mide el preprocesamiento de audio: bytes y segundos ahorrados por nota.
+
+Procesa un corpus de notas de voz (archivos .ogg/.oga/.opus de un
+directorio, o notas sintéticas con silencios al inicio, al final y pausas
+largas) con el mismo pool de procesos que usa el bot. La latencia de punta
+a punta se estima con un modelo simple de Deepgram: subida a
+--uplink-kbps más --deepgram-base + --deepgram-rtf por segundo de audio.
+Requiere ffmpeg y numpy.
+
+    uv run python benchmarks/audio_preprocess.py --notes 20
+    uv run python benchmarks/audio_preprocess.py --corpus ~/notas --uplink-kbps 1000
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# El módulo de audio lee la configuración del bot; basta con valores de relleno
+for var in ("TELEGRAM_BOT_TOKEN", "DEEPGRAM_API_KEY", "GEMINI_API_KEY", "GOOGLE_SHEETS_ID"):
+    os.environ.setdefault(var, "bench")
+
+from fakes import percentile  # type: ignore
+from networker_bot.config import FFMPEG_BINARY  # type: ignore
+from networker_bot.services.audio import AudioPreprocessor  # type: ignore
+
+AUDIO_EXTENSIONS = (".ogg", ".oga", ".opus")
+
+def synthetic_note(seed: int, rate: int = 48000) -> bytes:
+    """
+    Nota de voz sintética en el formato de Telegram (Opus 48 kHz mono).
+
+    Sílabas de tonos armónicos modulados, separadas por huecos cortos, con
+    1-3 s de silencio al inicio, 1-4 s al final y pausas de 1.5-4 s "pensando".
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    parts = [np.zeros(int(rng.uniform(1, 3) * rate))]
+    for _ in range(rng.integers(4, 9)):
+        for _ in range(rng.integers(6, 20)):
+            length = int(rng.uniform(0.12, 0.3) * rate)
+            t = np.arange(length) / rate
+            pitch = rng.uniform(110, 240)
+            tone = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 5))
+            parts.append(0.3 * tone * np.hanning(length))
+            parts.append(np.zeros(int(rng.uniform(0.03, 0.12) * rate)))
+        parts.append(np.zeros(int(rng.uniform(1.5, 4) * rate)))
+    parts.append(np.zeros(int(rng.uniform(1, 4) * rate)))
+
+    samples = np.concatenate(parts)
+    samples += rng.normal(0, 10 ** (-60 / 20), len(samples))  # Ruido de fondo de la sala
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes()
+    return subprocess.run(
+        [FFMPEG_BINARY, "-v", "error", "-f", "s16le", "-ac", "1", "-ar", str(rate), "-i", "pipe:0",
+         "-c:a", "libopus", "-b:a", "32k", "-f", "ogg", "pipe:1"],
+        input=pcm, capture_output=True, check=True
+    ).stdout
+
+def load_corpus(directory: str) -> list:
+    files = sorted(f for f in os.listdir(directory) if f.lower().endswith(AUDIO_EXTENSIONS))
+    notes = []
+    for name in files:
+        with open(os.path.join(directory, name), "rb") as f:
+            notes.append((name, f.read()))
+    return notes
+
+def deepgram_latency(size: int, seconds: float, args) -> float:
+    """Subida del archivo más procesamiento proporcional a la duración"""
+    return size * 8 / (args.uplink_kbps * 1000) + args.deepgram_base + args.deepgram_rtf * seconds
+
+async def run(args) -> None:
+    if not AudioPreprocessor.available():
+        sys.exit("Se necesitan ffmpeg y numpy para este benchmark")
+
+    if args.corpus:
+        notes = load_corpus(args.corpus)
+    else:
+        notes = [(f"sintética-{i}", synthetic_note(i)) for i in range(args.notes)]
+    if not notes:
+        sys.exit("El corpus está vacío")
+
+    preprocessor = AudioPreprocessor(workers=args.workers)
+    await preprocessor.warm_up()
+
+    # Una nota a la vez: latencia de preprocesamiento sin espera en la cola del pool
+    rows = []
+    for name, data in notes:
+        t0 = time.perf_counter()
+        _, stats = await preprocessor.process(data)
+        if stats is None:
+            print(f"⚠️ {name}: no se pudo preprocesar")
+            continue
+        rows.append((name, stats, time.perf_counter() - t0))
+
+    # Todas a la vez: capacidad del pool
+    started = time.perf_counter()
+    await asyncio.gather(*(preprocessor.process(data) for _, data in notes))
+    throughput = len(notes) / (time.perf_counter() - started)
+    preprocessor.close()
+
+    print(f"{'nota':<16}{'bytes':>10}{'→':>3}{'bytes':>9}{'seg':>8}{'→':>3}{'seg':>7}{'proc (s)':>10}")
+    before, after = [], []
+    for name, stats, elapsed in sorted(rows):
+        print(
+            f"{name[:15]:<16}{stats['original_bytes']:>10}{'':>3}{stats['bytes']:>9}"
+            f"{stats['original_seconds']:>8.1f}{'':>3}{stats['seconds']:>7.1f}{elapsed:>10.3f}"
+        )
+        before.append(deepgram_latency(stats["original_bytes"], stats["original_seconds"], args))
+        after.append(elapsed + deepgram_latency(stats["bytes"], stats["seconds"], args))
+
+    original_bytes = sum(s["original_bytes"] for _, s, _ in rows)
+    final_bytes = sum(s["bytes"] for _, s, _ in rows)
+    original_seconds = sum(s["original_seconds"] for _, s, _ in rows)
+    final_seconds = sum(s["seconds"] for _, s, _ in rows)
+    print()
+    print(f"bytes ahorrados     {original_bytes - final_bytes} de {original_bytes} "
+          f"({100 * (1 - final_bytes / original_bytes):.1f}%)")
+    if original_seconds:
+        print(f"segundos ahorrados  {original_seconds - final_seconds:.1f} de {original_seconds:.1f} "
+              f"({100 * (1 - final_seconds / original_seconds):.1f}% menos audio facturado)")
+    print(f"preprocesamiento    p50 {percentile([e for _, _, e in rows], 0.5):.3f}s  "
+          f"{throughput:.1f} notas/s con {args.workers} procesos")
+    print(f"latencia estimada   p50 {percentile(before, 0.5):.2f}s → {percentile(after, 0.5):.2f}s  "
+          f"p95 {percentile(before, 0.95):.2f}s → {percentile(after, 0.95):.2f}s")
+    print(f"                    (subida a {args.uplink_kbps:.0f} kbps, Deepgram "
+          f"{args.deepgram_base:.2f}s + {args.deepgram_rtf:.3f}s por segundo de audio)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="directorio con notas de voz reales (.ogg/.oga/.opus)")
+    parser.add_argument("--notes", type=int, default=12, help="notas sintéticas si no hay corpus")
+    parser.add_argument("--workers", type=int, default=2, help="procesos del pool")
+    parser.add_argument("--uplink-kbps", type=float, default=2000, help="ancho de subida hacia Deepgram")
+    parser.add_argument("--deepgram-base", type=float, default=0.4, help="latencia fija de Deepgram (s)")
+    parser.add_argument("--deepgram-rtf", type=float, default=0.03, help="segundos de proceso por segundo de audio")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Prueba de estrés del event loop: N notas a la vez no deben bloquearlo.
+
+Cada "nota" recorre las llamadas reales de los servicios contra los
+servidores falsos de benchmarks/fakes.py: DeepgramService.transcribe_audio
+(httpx asíncrono), GeminiService.extract_info (REST en el pool "gemini") y
+SheetsService.add_rows (gspread en el pool de la hoja). Mientras corren, una
+sonda duerme 10 ms en bucle y mide cuánto tarda de más en despertar (el lag
+del event loop). Como control, las mismas escrituras a Sheets se hacen
+también directamente en el loop, que es lo que hacía el bot original.
+
+Con las llamadas fuera del loop, N notas tardan casi lo mismo que una
+(hasta llenar los pools acotados: GEMINI_MAX_CONCURRENCY, SHEETS_MAX_WORKERS)
+y el lag se mantiene en milisegundos; el script termina con error si el lag
+máximo supera --max-lag.
+
+    uv run python benchmarks/event_loop.py --notes 1 8 32
+    uv run python benchmarks/event_loop.py --notes 16 --deepgram-latency 2 --max-lag 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import DEFAULT_PROFILE, percentile, serve  # noqa: E402
+from loadtest import configure_environment, create_fake_sheets, free_port, wait_for_port  # noqa: E402
+
+PROBE_INTERVAL = 0.01
+
+class LagProbe:
+    """Mide cuánto se atrasa el event loop en despertar una tarea que duerme"""
+
+    def __init__(self):
+        self.lags: list = []
+        self._task = None
+
+    def start(self) -> None:
+        self.lags = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        # Deja que la sonda registre el despertar atrasado antes de cancelarla
+        await asyncio.sleep(PROBE_INTERVAL * 2)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return {"lag_max": max(self.lags, default=0.0), "lag_p99": percentile(self.lags, 0.99)}
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            self.lags.append(max(0.0, time.perf_counter() - started - PROBE_INTERVAL))
+
+async def voice_note(deepgram, gemini, sheets, n: int) -> None:
+    """Las tres llamadas externas de una nota de voz, en el orden del pipeline"""
+    transcript = await deepgram.transcribe_audio(os.urandom(2048))
+    info = await gemini.extract_info(transcript)
+    row = [info.get("nombre", ""), "", "", "", "", "", "", "Bench", "2025-01-01 10:00", "bench", str(n)]
+    await sheets.add_rows([row])
+
+async def measure(label: str, count: int, note) -> dict:
+    probe = LagProbe()
+    probe.start()
+    await asyncio.sleep(0)  # Que la sonda ya esté durmiendo cuando empieza la carga
+    started = time.perf_counter()
+    await asyncio.gather(*(note(n) for n in range(count)))
+    elapsed = time.perf_counter() - started
+    return {"label": label, "notes": count, "seconds": elapsed, **await probe.stop()}
+
+async def run(args, base_url: str) -> list:
+    from networker_bot.services.deepgram import DeepgramService
+    from networker_bot.services.gemini import GeminiService
+    from networker_bot.services.http_pool import http_pool
+
+    deepgram = DeepgramService()
+    gemini = GeminiService()
+    sheets = create_fake_sheets(base_url)
+
+    # Primera llamada fuera de la medición (conexiones e imports perezosos)
+    await voice_note(deepgram, gemini, sheets, 0)
+
+    results = []
+    for count in args.notes:
+        results.append(await measure(
+            "servicios", count, lambda n: voice_note(deepgram, gemini, sheets, n)
+        ))
+    for count in args.notes:
+        async def inline(n: int) -> None:
+            # Control: la llamada síncrona de gspread directamente en el loop
+            sheets.sheet.append_rows([["Bench", str(n)]])
+        results.append(await measure("control bloqueante (Sheets en el loop)", count, inline))
+
+    await sheets.close()
+    await http_pool.close()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, nargs="+", default=[1, 8, 32], help="notas simultáneas a medir")
+    parser.add_argument("--max-lag", type=float, default=0.1, help="lag máximo aceptado (segundos)")
+    for key in ("deepgram_latency", "gemini_latency", "sheets_latency"):
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float, default=DEFAULT_PROFILE[key])
+    args = parser.parse_args()
+
+    profile = {
+        **DEFAULT_PROFILE,
+        "deepgram_latency": args.deepgram_latency,
+        "gemini_latency": args.gemini_latency,
+        "sheets_latency": args.sheets_latency,
+        "deepgram_jitter": 0.0, "gemini_jitter": 0.0, "sheets_jitter": 0.0,
+    }
+    port = free_port()
+    fake = multiprocessing.get_context("spawn").Process(target=serve, args=(port, profile), daemon=True)
+    fake.start()
+    try:
+        wait_for_port(port)
+        base_url = f"http://127.0.0.1:{port}"
+        with tempfile.TemporaryDirectory() as workdir:
+            configure_environment(base_url, workdir)
+            # Sin caché, para que cada nota llegue a los proveedores
+            os.environ.update({"CACHE_MAX_ENTRIES": "0", "SHEETS_UPSERT": "false",
+                               "SHEETS_SHARD_WRITES_PER_MINUTE": "0"})
+            logging.basicConfig(level=logging.WARNING)
+            results = asyncio.run(run(args, base_url))
+    finally:
+        fake.terminate()
+        fake.join()
+
+    print(f"{'modo':<40}{'notas':>6}{'segundos':>10}{'vs 1 nota':>10}{'lag p99':>10}{'lag máx':>10}")
+    single_note = {r["label"]: r["seconds"] for r in results if r["notes"] == 1}
+    for r in results:
+        single = single_note.get(r["label"])
+        ratio = f"{r['seconds'] / single:.1f}x" if single else "-"
+        print(f"{r['label']:<40}{r['notes']:>6}{r['seconds']:>10.2f}{ratio:>10}"
+              f"{r['lag_p99'] * 1000:>8.1f}ms{r['lag_max'] * 1000:>8.1f}ms")
+
+    worst = max(r["lag_max"] for r in results if r["label"] == "servicios")
+    if worst > args.max_lag:
+        print(f"\n❌ El event loop se bloqueó {worst * 1000:.0f} ms (máximo aceptado {args.max_lag * 1000:.0f} ms)")
+        sys.exit(1)
+    print(f"\n✅ Lag máximo con los servicios: {worst * 1000:.1f} ms (límite {args.max_lag * 1000:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
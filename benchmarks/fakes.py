@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Servidores falsos para las pruebas de carga: Telegram Bot API, Deepgram,
+Gemini (REST) y un endpoint de Sheets, todos en un mismo puerto.
+
+El Telegram falso además genera la carga: al recibir POST /_bench/start
+crea notas de voz de N usuarios según una tasa de llegada (proceso de
+Poisson) y mide cuánto tarda el bot en responder cada una. GET
+/_bench/status devuelve el progreso, las latencias y las llamadas por API.
+
+También tiene lo que comparten los demás scripts de benchmarks: la hoja
+falsa con la interfaz de gspread (FakeWorksheet) y percentile().
+
+Se usa desde benchmarks/loadtest.py, pero también se puede levantar solo:
+
+    uv run python benchmarks/fakes.py --port 8780 --deepgram-latency 1.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+import requests
+from aiohttp import ClientSession, web
+
+DEFAULT_PROFILE = {
+    "deepgram_latency": 1.0,
+    "deepgram_jitter": 0.3,
+    "deepgram_errors": 0.0,
+    "gemini_latency": 0.8,
+    "gemini_jitter": 0.2,
+    "gemini_errors": 0.0,
+    "sheets_latency": 0.3,
+    "sheets_jitter": 0.1,
+    "sheets_errors": 0.0,
+    "telegram_latency": 0.05,
+    "audio_size": 60_000,
+}
+
+BATCH_SCHEMA_TYPES = (5, "ARRAY")  # Type.ARRAY en el esquema REST de Gemini
+
+def delay(mean: float, jitter: float) -> float:
+    return max(0.0, random.gauss(mean, jitter))
+
+def percentile(values: list, p: float) -> float:
+    """Percentil p (0-1) por rango más cercano; 0 si no hay valores"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+class FakeWorksheet:
+    """
+    Hoja con la interfaz de gspread (solo append_rows: sin upsert).
+
+    Con `url` escribe en el endpoint falso de Sheets de FakeServices; sin
+    ella guarda en memoria y tarda `latency` segundos por llamada.
+    """
+
+    def __init__(self, url: str = "", timeout: float = 30.0, latency: float = 0.0):
+        self.url = url
+        self.timeout = timeout
+        self.latency = latency
+        self.session = requests.Session() if url else None
+        self.rows = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def append_rows(self, rows: list, **kwargs) -> dict:
+        if self.session is not None:
+            response = self.session.post(self.url, json={"rows": rows}, timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+        else:
+            time.sleep(self.latency)
+            result = {"updates": {"updatedRows": len(rows)}}
+        with self._lock:
+            self.rows += len(rows)
+            self.calls += 1
+        return result
+
+class FakeServices:
+    """Estado compartido de los servidores falsos"""
+
+    def __init__(self, profile: dict):
+        self.profile = {**DEFAULT_PROFILE, **profile}
+        self.calls: Counter = Counter()
+        self.audio = os.urandom(self.profile["audio_size"])
+        self.transcripts = 0
+        self.sheets_rows = 0
+
+        # Telegram
+        self.updates: list = []
+        self.new_updates = asyncio.Event()
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.webhook_url = ""
+        self.webhook_secret = ""
+        self.notes: dict = {}
+        self.load_task = None
+        self.http = None
+
+    # --- Utilidades -----------------------------------------------------
+
+    async def sleep(self, provider: str) -> None:
+        await asyncio.sleep(delay(self.profile[f"{provider}_latency"], self.profile.get(f"{provider}_jitter", 0)))
+
+    def fails(self, provider: str) -> bool:
+        return random.random() < self.profile[f"{provider}_errors"]
+
+    def message(self, chat_id: int, text: str = "", **extra) -> dict:
+        message_id = self.next_message_id
+        self.next_message_id += 1
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text,
+            **extra,
+        }
+
+    # --- Generador de carga ---------------------------------------------
+
+    async def start_load(self, request: web.Request) -> web.Response:
+        plan = await request.json()
+        self.load_task = asyncio.create_task(self.generate(plan))
+        return web.json_response({"ok": True})
+
+    async def generate(self, plan: dict) -> None:
+        users = plan["users"]
+        total = users * plan["notes_per_user"]
+        rate = plan["rate"]
+
+        for n in range(total):
+            if rate > 0 and n > 0:
+                await asyncio.sleep(random.expovariate(rate))
+            user_id = 1000 + n % users
+            # Un chat por nota para asociar sin ambigüedad cada respuesta del bot
+            chat_id = 10_000_000 + n
+            voice_message = self.message(
+                chat_id,
+                **{
+                    "from": {"id": user_id, "is_bot": False, "first_name": f"Usuario {user_id}",
+                             "username": f"usuario{user_id}"},
+                    "voice": {"file_id": f"voice-{n}", "file_unique_id": f"unique-{n}",
+                              "duration": 30, "mime_type": "audio/ogg",
+                              "file_size": self.profile["audio_size"]},
+                }
+            )
+            voice_message.pop("text")
+            self.notes[chat_id] = {"sent": time.perf_counter(), "done": None, "outcome": None}
+            await self.deliver({"update_id": self.next_update_id, "message": voice_message})
+            self.next_update_id += 1
+
+    async def deliver(self, update: dict) -> None:
+        if self.webhook_url:
+            asyncio.create_task(self.post_webhook(update))
+        else:
+            self.updates.append(update)
+            self.new_updates.set()
+
+    async def post_webhook(self, update: dict) -> None:
+        self.calls["webhook"] += 1
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret}
+        async with self.http.post(self.webhook_url, json=update, headers=headers) as response:
+            await response.read()
+
+    def finish(self, chat_id: int, outcome: str) -> None:
+        note = self.notes.get(chat_id)
+        if note is not None and note["done"] is None:
+            note["done"] = time.perf_counter()
+            note["outcome"] = outcome
+
+    async def status(self, request: web.Request) -> web.Response:
+        finished = [n for n in self.notes.values() if n["done"] is not None]
+        first_sent = min((n["sent"] for n in self.notes.values()), default=None)
+        last_done = max((n["done"] for n in finished), default=None)
+        return web.json_response({
+            "sent": len(self.notes),
+            "done": len(finished),
+            "outcomes": Counter(n["outcome"] for n in finished),
+            "latencies": [n["done"] - n["sent"] for n in finished if n["outcome"] == "ok"],
+            "elapsed": (last_done - first_sent) if finished else None,
+            "calls": self.calls,
+            "sheets_rows": self.sheets_rows,
+        })
+
+    # --- Telegram Bot API -----------------------------------------------
+
+    async def telegram(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[f"telegram.{method}"] += 1
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+
+        if method == "getUpdates":
+            return await self.get_updates(params)
+
+        await self.sleep("telegram")
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Networker Bench", "username": "networker_bench_bot"}
+        elif method in ("setWebhook", "deleteWebhook"):
+            self.webhook_url = params.get("url", "")
+            self.webhook_secret = params.get("secret_token", "")
+            result = True
+        elif method == "getFile":
+            file_id = params["file_id"]
+            result = {"file_id": file_id, "file_unique_id": file_id, "file_size": len(self.audio),
+                      "file_path": f"voice/{file_id}.ogg"}
+        elif method == "sendMessage":
+            chat_id = int(params["chat_id"])
+            text = params.get("text", "")
+            if text.startswith("⚠️"):
+                self.finish(chat_id, "rejected")
+            elif text.startswith("⏳ Estás enviando"):
+                self.finish(chat_id, "rate_limited")
+            elif text.startswith("👀"):
+                self.finish(chat_id, "duplicate")
+            elif text.startswith("¿Quieres enviar otra"):
+                self.finish(chat_id, "ok")
+            result = self.message(chat_id, text)
+        elif method == "editMessageText":
+            chat_id = int(params["chat_id"])
+            text = params.get("text", "")
+            if text.startswith("❌"):
+                self.finish(chat_id, "error")
+            elif text.startswith("⚠️"):
+                self.finish(chat_id, "rejected")
+            elif text.startswith("⏭️"):
+                self.finish(chat_id, "replaced")
+            result = self.message(chat_id, text)
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def get_updates(self, params: dict) -> web.Response:
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        self.updates = [u for u in self.updates if u["update_id"] >= offset]
+        if not self.updates and timeout > 0:
+            self.new_updates.clear()
+            try:
+                await asyncio.wait_for(self.new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return web.json_response({"ok": True, "result": self.updates[:100]})
+
+    async def telegram_file(self, request: web.Request) -> web.Response:
+        self.calls["telegram.file"] += 1
+        await self.sleep("telegram")
+        # Contenido distinto por archivo, para que la caché por hash no los confunda
+        body = request.match_info["path"].encode() + self.audio
+        return web.Response(body=body, content_type="audio/ogg")
+
+    # --- Deepgram ---------------------------------------------------------
+
+    async def deepgram_listen(self, request: web.Request) -> web.Response:
+        self.calls["deepgram.listen"] += 1
+        await request.read()
+        await self.sleep("deepgram")
+        if self.fails("deepgram"):
+            return web.json_response({"err_msg": "overloaded"}, status=503)
+
+        self.transcripts += 1
+        n = self.transcripts
+        transcript = (
+            f"Hola, soy Participante {n}, tengo {20 + n % 30} años, soy desarrollador backend "
+            f"y estoy trabajando en el proyecto número {n} con Python. Me gusta escalar."
+        )
+        return web.json_response({
+            "metadata": {"request_id": str(n), "transaction_key": "", "sha256": "", "created": "",
+                         "duration": 30.0, "channels": 1, "models": [], "model_info": {}},
+            "results": {"channels": [{"alternatives": [
+                {"transcript": transcript, "confidence": 0.98, "words": []}
+            ]}]},
+        })
+
+    async def deepgram_head(self, request: web.Request) -> web.Response:
+        return web.Response()
+
+    # --- Gemini (REST) ----------------------------------------------------
+
+    async def gemini(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        action = request.match_info["model"].split(":")[-1]
+        self.calls[f"gemini.{action}"] += 1
+        await self.sleep("gemini")
+        if self.fails("gemini"):
+            return web.json_response(
+                {"error": {"code": 503, "message": "overloaded", "status": "UNAVAILABLE"}}, status=503
+            )
+
+        text = body["contents"][0]["parts"][0]["text"]
+        schema = body.get("generationConfig", {}).get("responseSchema", {})
+        if schema.get("type") in BATCH_SCHEMA_TYPES:
+            count = text.count("PRESENTACIÓN ")
+            payload = [{"indice": i, **self.extraction(i)} for i in range(count)]
+        else:
+            payload = self.extraction(len(text))
+        return web.json_response({
+            "candidates": [{"content": {"parts": [{"text": json.dumps(payload, ensure_ascii=False)}],
+                                        "role": "model"},
+                            "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": 300, "candidatesTokenCount": 60, "totalTokenCount": 360},
+        })
+
+    @staticmethod
+    def extraction(n: int) -> dict:
+        return {
+            "nombre": f"Participante {n}",
+            "edad": str(20 + n % 30),
+            "ocupacion": "Desarrollador backend",
+            "proyecto": f"Proyecto {n}",
+            "stack": "Python",
+            "hobby": "Escalar",
+            "info_adicional": "",
+        }
+
+    # --- Sheets -----------------------------------------------------------
+
+    async def sheets_append(self, request: web.Request) -> web.Response:
+        self.calls["sheets.append"] += 1
+        body = await request.json()
+        await self.sleep("sheets")
+        if self.fails("sheets"):
+            return web.json_response({"error": {"code": 429, "message": "quota"}}, status=429)
+        self.sheets_rows += len(body["rows"])
+        return web.json_response({"updates": {"updatedRows": len(body["rows"])}})
+
+    # --- Aplicación ---------------------------------------------------------
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/_bench/start", self.start_load)
+        app.router.add_get("/_bench/status", self.status)
+        app.router.add_route("*", "/bot{token}/{method}", self.telegram)
+        app.router.add_get("/file/bot{token}/{path:.*}", self.telegram_file)
+        app.router.add_post("/v1/listen", self.deepgram_listen)
+        app.router.add_route("HEAD", "/", self.deepgram_head)
+        app.router.add_post("/v1beta/models/{model}", self.gemini)
+        app.router.add_post("/sheets/append", self.sheets_append)
+
+        async def lifecycle(app):
+            self.http = ClientSession()
+            yield
+            await self.http.close()
+
+        app.cleanup_ctx.append(lifecycle)
+        return app
+
+def serve(port: int, profile: dict) -> None:
+    """Levanta todos los servicios falsos (bloquea hasta que terminen)"""
+    web.run_app(FakeServices(profile).app(), host="127.0.0.1", port=port, print=None, access_log=None)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8780)
+    for key, value in DEFAULT_PROFILE.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+    profile = {key: getattr(args, key) for key in DEFAULT_PROFILE}
+    serve(args.port, profile)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compara el prompt completo original con la salida estructurada de Gemini.
+
+Mide tokens por petición, latencia p50/p95 y fallos de parseo para cada modo.
+Usa la API real: requiere GEMINI_API_KEY (y el resto de variables del .env).
+
+    uv run python benchmarks/gemini_prompt.py --runs 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fakes import percentile  # type: ignore
+from networker_bot.services.gemini import GeminiService  # type: ignore
+
+SAMPLE_TRANSCRIPTS = [
+    "Hola, soy María González, tengo 28 años, soy desarrolladora fullstack, "
+    "actualmente trabajo en un proyecto de e-commerce usando React y Node.js, "
+    "y en mi tiempo libre me gusta practicar surf.",
+    "Qué tal, me llamo Pedro, estudio ingeniería de sistemas en Bogotá. "
+    "Estoy armando una startup de logística con Python y FastAPI. Me encanta el ajedrez.",
+    "Buenas, soy Ana, diseñadora UX desde hace cinco años. Vine al hackaton "
+    "para conocer gente y aprender sobre IA. Toco el violín.",
+]
+
+async def run_mode(structured: bool, runs: int) -> dict:
+    service = GeminiService(structured_output=structured)
+    latencies, prompt_tokens, output_tokens = [], [], []
+    parse_failures = 0
+
+    for i in range(runs):
+        transcript = SAMPLE_TRANSCRIPTS[i % len(SAMPLE_TRANSCRIPTS)]
+        started = time.perf_counter()
+        response = await service.generate(transcript)
+        latencies.append(time.perf_counter() - started)
+
+        usage = response.usage_metadata
+        prompt_tokens.append(usage.prompt_token_count)
+        output_tokens.append(usage.candidates_token_count)
+        try:
+            service.parse(response.text)
+        except ValueError:
+            parse_failures += 1
+
+    return {
+        "mode": "structured" if structured else "legacy",
+        "prompt_tokens": statistics.mean(prompt_tokens),
+        "output_tokens": statistics.mean(output_tokens),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "parse_failures": parse_failures,
+    }
+
+async def main(runs: int) -> None:
+    print(f"{'modo':<12}{'tokens in':>10}{'tokens out':>12}{'p50 (s)':>10}{'p95 (s)':>10}{'fallos':>8}")
+    for structured in (False, True):
+        result = await run_mode(structured, runs)
+        print(
+            f"{result['mode']:<12}{result['prompt_tokens']:>10.0f}{result['output_tokens']:>12.0f}"
+            f"{result['p50']:>10.2f}{result['p95']:>10.2f}{result['parse_failures']:>8}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="peticiones por modo")
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de punta a punta contra servicios falsos.
+
+Levanta la Application real (build_application de main.py) apuntando a un
+Telegram, Deepgram, Gemini y Sheets falsos (benchmarks/fakes.py, en otro
+proceso), reproduce N usuarios enviando notas de voz a la tasa indicada y
+reporta throughput, percentiles de latencia, pico de RSS y llamadas por API.
+Cada corrida se guarda como JSON en benchmarks/results/ para compararlas.
+
+Gemini se usa por REST (el endpoint falso no habla gRPC) y Sheets a través
+de SheetsService con una hoja falsa; el resto del camino es el de producción.
+Las variables PIPELINE_*, *_MAX_CONCURRENCY, etc. del entorno se respetan.
+Con --workers N el bot corre como ingress y N procesos worker (worker.py)
+consumen una cola SQLite compartida.
+
+    uv run python benchmarks/loadtest.py --users 50 --notes-per-user 2 --rate 10
+    uv run python benchmarks/loadtest.py --mode webhook --deepgram-errors 0.05 --label errores
+    uv run python benchmarks/loadtest.py --workers 4 --users 100 --rate 20
+    uv run python benchmarks/loadtest.py --compare benchmarks/results/a.json benchmarks/results/b.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import DEFAULT_PROFILE, FakeWorksheet, percentile, serve  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+WEBHOOK_SECRET = "bench-secret"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Los servicios falsos no respondieron en el puerto {port}")
+
+def create_fake_sheets(base_url: str, event=None):
+    from networker_bot.config import SHEETS_MAX_WORKERS, SHEETS_TIMEOUT
+    from networker_bot.services.http_pool import http_pool
+    from networker_bot.services.sheets import SheetsService
+
+    worksheet = FakeWorksheet(f"{base_url}/sheets/append", timeout=SHEETS_TIMEOUT)
+    sheets = SheetsService(worksheet=worksheet, event=event)
+    http_pool.mount(sheets.name, worksheet.session, SHEETS_MAX_WORKERS)
+    return sheets
+
+def configure_environment(base_url: str, workdir: str) -> None:
+    """Apunta el bot a los servicios falsos (antes de importar networker_bot)"""
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": "123456:BENCHMARK",
+        "DEEPGRAM_API_KEY": "bench",
+        "GEMINI_API_KEY": "bench",
+        "GOOGLE_SHEETS_ID": "bench",
+        "BOT_MODE": "polling",
+        "TELEGRAM_API_URL": base_url,
+        "DEEPGRAM_API_URL": base_url,
+        "GEMINI_API_ENDPOINT": base_url,
+        "JOURNAL_PATH": os.path.join(workdir, "journal.db"),
+        "CONTACTS_PATH": os.path.join(workdir, "contacts.db"),
+        "EVENTS_PATH": os.path.join(workdir, "events.db"),
+        "JOB_STORE_PATH": os.path.join(workdir, "voice_jobs.db"),
+        "CACHE_DIR": "",
+        "METRICS_PORT": "0",
+        "WORKER_METRICS_PORT": "0",
+    })
+
+def run_worker_process(base_url: str, workdir: str, worker_id: str, verbose: bool) -> None:
+    """Proceso worker (se lanza con spawn) que consume la cola SQLite de la corrida"""
+    configure_environment(base_url, workdir)
+    os.environ.update({"JOB_QUEUE_URL": f"sqlite:///{os.path.join(workdir, 'jobs.db')}",
+                       "WORKER_ID": worker_id})
+    from networker_bot.services.container import services
+    from networker_bot.worker import run_worker
+
+    logging.getLogger().setLevel(logging.INFO if verbose else logging.WARNING)
+    services.sheets_factory = lambda event: create_fake_sheets(base_url, event)
+    asyncio.run(run_worker())
+
+async def run_bot(args, base_url: str) -> dict:
+    from networker_bot.main import allowed_updates, build_application
+    from networker_bot.metrics import metrics
+    from networker_bot.services.container import services
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    services.sheets_factory = lambda event: create_fake_sheets(base_url, event)
+
+    application = build_application()
+    update_types = allowed_updates(application)
+    boot_started = time.perf_counter()
+    await application.initialize()
+    await application.post_init(application)
+    if args.mode == "webhook":
+        port = free_port()
+        await application.updater.start_webhook(
+            listen="127.0.0.1",
+            port=port,
+            url_path="telegram",
+            webhook_url=f"http://127.0.0.1:{port}/telegram",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=update_types
+        )
+    else:
+        await application.updater.start_polling(poll_interval=0, timeout=5, allowed_updates=update_types)
+    await application.start()
+    boot_seconds = time.perf_counter() - boot_started
+
+    total = args.users * args.notes_per_user
+    plan = {"users": args.users, "notes_per_user": args.notes_per_user, "rate": args.rate}
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        await client.post("/_bench/start", json=plan)
+        deadline = time.monotonic() + args.timeout
+        while time.monotonic() < deadline:
+            status = (await client.get("/_bench/status")).json()
+            if status["done"] >= total:
+                break
+            await asyncio.sleep(0.2)
+
+        # Tiempo hasta que el journal termina de replicarse a Sheets (con workers,
+        # hasta que llegan a Sheets todas las filas registradas)
+        drain_started = time.perf_counter()
+        if services.journal is not None:
+            while time.monotonic() < deadline and await services.journal.pending_count() > 0:
+                await asyncio.sleep(0.2)
+        else:
+            while time.monotonic() < deadline and status["sheets_rows"] < status["outcomes"].get("ok", 0):
+                await asyncio.sleep(0.2)
+                status = (await client.get("/_bench/status")).json()
+        drain_seconds = time.perf_counter() - drain_started
+
+        status = (await client.get("/_bench/status")).json()
+
+    provider_stats = services.stats()
+    await application.updater.stop()
+    await application.stop()
+    await application.post_stop(application)
+    await application.post_shutdown(application)
+    await application.shutdown()
+
+    latencies = status["latencies"]
+    elapsed = status["elapsed"] or 0.0
+    completed = status["outcomes"].get("ok", 0)
+    return {
+        "notes": total,
+        "finished": status["done"],
+        "outcomes": status["outcomes"],
+        "boot_seconds": round(boot_seconds, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_second": round(completed / elapsed, 3) if elapsed else 0.0,
+        "latency_seconds": {
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(max(latencies, default=0.0), 3),
+            "mean": round(statistics.mean(latencies), 3) if latencies else 0.0,
+        },
+        "journal_drain_seconds": round(drain_seconds, 3),
+        "sheets_rows": status["sheets_rows"],
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "api_calls": status["calls"],
+        "spans": metrics.snapshot(),
+        "providers": provider_stats,
+    }
+
+def save(result: dict, label: str) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{stamp}-{label}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    return path
+
+def print_summary(result: dict) -> None:
+    latency = result["latency_seconds"]
+    print(f"notas            {result['finished']}/{result['notes']}  {result['outcomes']}")
+    print(f"throughput       {result['throughput_per_second']:.2f} notas/s en {result['elapsed_seconds']:.1f}s")
+    print(f"latencia         p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  "
+          f"p99 {latency['p99']:.2f}s  máx {latency['max']:.2f}s")
+    print(f"journal → Sheets {result['sheets_rows']} filas, vaciado en {result['journal_drain_seconds']:.1f}s")
+    print(f"pico RSS         {result['peak_rss_mb']:.0f} MB")
+    print("llamadas         " + ", ".join(f"{k}={v}" for k, v in sorted(result["api_calls"].items())))
+
+def compare(paths: list) -> None:
+    """Muestra las métricas principales de varias corridas lado a lado"""
+    rows = [
+        ("throughput/s", lambda r: r["throughput_per_second"]),
+        ("p50 s", lambda r: r["latency_seconds"]["p50"]),
+        ("p95 s", lambda r: r["latency_seconds"]["p95"]),
+        ("p99 s", lambda r: r["latency_seconds"]["p99"]),
+        ("ok", lambda r: r["outcomes"].get("ok", 0)),
+        ("errores", lambda r: r["outcomes"].get("error", 0)),
+        ("rechazadas", lambda r: r["outcomes"].get("rejected", 0)),
+        ("reemplazadas", lambda r: r["outcomes"].get("replaced", 0)),
+        ("limitadas", lambda r: r["outcomes"].get("rate_limited", 0)),
+        ("pico RSS MB", lambda r: r["peak_rss_mb"]),
+        ("llamadas API", lambda r: sum(r["api_calls"].values())),
+    ]
+    results = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            results.append(json.load(f))
+
+    names = [os.path.basename(p).removesuffix(".json") for p in paths]
+    width = max(14, *(len(n) for n in names))
+    print(" " * 14 + "".join(f"{n:>{width + 2}}" for n in names))
+    for title, getter in rows:
+        print(f"{title:<14}" + "".join(f"{getter(r):>{width + 2}}" for r in results))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="usuarios simulados")
+    parser.add_argument("--notes-per-user", type=int, default=1, help="notas de voz por usuario")
+    parser.add_argument("--rate", type=float, default=5.0, help="notas por segundo (0 = todas a la vez)")
+    parser.add_argument("--mode", choices=("polling", "webhook"), default="polling")
+    parser.add_argument("--workers", type=int, default=0, help="procesos worker (0 = pipeline dentro del bot)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="segundos máximos de la corrida")
+    parser.add_argument("--label", default="", help="nombre para el archivo de resultados")
+    parser.add_argument("--verbose", action="store_true", help="mostrar los logs del bot")
+    parser.add_argument("--compare", nargs="+", metavar="JSON", help="comparar resultados guardados")
+    for key, value in DEFAULT_PROFILE.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return
+
+    profile = {key: getattr(args, key) for key in DEFAULT_PROFILE}
+    port = free_port()
+    spawn = multiprocessing.get_context("spawn")
+    fake = spawn.Process(target=serve, args=(port, profile), daemon=True)
+    fake.start()
+    workers = []
+    try:
+        wait_for_port(port)
+        base_url = f"http://127.0.0.1:{port}"
+        with tempfile.TemporaryDirectory() as workdir:
+            configure_environment(base_url, workdir)
+            if args.workers:
+                os.environ["JOB_QUEUE_URL"] = f"sqlite:///{os.path.join(workdir, 'jobs.db')}"
+            for n in range(args.workers):
+                worker = spawn.Process(target=run_worker_process,
+                                       args=(base_url, workdir, f"bench{n}", args.verbose))
+                worker.start()
+                workers.append(worker)
+            result = asyncio.run(run_bot(args, base_url))
+            # SIGTERM: cada worker termina lo que tiene en proceso y vacía su journal
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join(30)
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.kill()
+        fake.terminate()
+        fake.join()
+
+    label = args.label or f"{args.mode}-{args.users}x{args.notes_per_user}-r{args.rate:g}"
+    if args.workers and not args.label:
+        label += f"-w{args.workers}"
+    result = {
+        "label": label,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "mode": args.mode,
+            "workers": args.workers,
+            "users": args.users,
+            "notes_per_user": args.notes_per_user,
+            "rate": args.rate,
+            "profile": profile,
+            "env": {k: v for k, v in os.environ.items()
+                    if k.startswith(("PIPELINE_", "DEEPGRAM_MAX", "GEMINI_", "SHEETS_", "CONCURRENT_"))
+                    and "KEY" not in k},
+        },
+        **result,
+    }
+    print_summary(result)
+    print(f"\nResultados guardados en {save(result, label)}")
+
+if __name__ == "__main__":
+    main()
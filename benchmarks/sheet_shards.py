@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Mide cómo escala la escritura a Sheets con la cantidad de eventos (shards).
+
+Llena el journal con --rows registros repartidos entre N eventos y mide
+cuánto tardan los replicadores en vaciarlo, con una hoja falsa por evento
+que tarda --latency segundos por llamada y el límite de escrituras por
+minuto de cada hoja (SHEETS_SHARD_WRITES_PER_MINUTE). Con un solo evento
+todo pasa por una hoja y un límite; con N, cada hoja avanza por su cuenta.
+
+    uv run python benchmarks/sheet_shards.py --events 1 2 4 8
+    uv run python benchmarks/sheet_shards.py --rows 2000 --batch 50 --writes-per-minute 60
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fakes import FakeWorksheet  # type: ignore
+
+async def drain(shards: int, args, workdir: str) -> dict:
+    from networker_bot.services.events import Event
+    from networker_bot.services.journal import JournalReplicator, RegistrationJournal
+    from networker_bot.services.sheets import SheetsService
+
+    journal = RegistrationJournal(os.path.join(workdir, f"journal-{shards}.db"))
+    events = [Event(f"evento-{i}", f"Evento {i}", "bench", f"Evento {i}") for i in range(shards)]
+    for n in range(args.rows):
+        row = ["Ana", "30", "Dev", "Bot", "Python", "Escalar", "", "Bench", "2025-01-01 10:00", "ana", str(n)]
+        await journal.append(row, shard=events[n % shards].slug)
+
+    worksheets = [FakeWorksheet(latency=args.latency) for _ in events]
+    services = [SheetsService(worksheet=ws, event=event) for ws, event in zip(worksheets, events)]
+    replicators = [
+        JournalReplicator(journal, sheets, batch_size=args.batch, shard=event.slug)
+        for sheets, event in zip(services, events)
+    ]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(replicator.sync_once(drain=True) for replicator in replicators))
+    elapsed = time.perf_counter() - started
+
+    pending = await journal.pending_count()
+    for sheets in services:
+        await sheets.close()
+    journal.close()
+    return {
+        "events": shards,
+        "seconds": elapsed,
+        "rows_per_second": args.rows / elapsed,
+        "calls": sum(ws.calls for ws in worksheets),
+        "pending": pending,
+    }
+
+async def run(args) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [await drain(shards, args, workdir) for shards in args.events]
+
+    print(f"{'eventos':>8}{'segundos':>10}{'filas/s':>10}{'llamadas':>10}{'speedup':>9}")
+    base = results[0]["rows_per_second"]
+    for r in results:
+        print(f"{r['events']:>8}{r['seconds']:>10.2f}{r['rows_per_second']:>10.0f}{r['calls']:>10}"
+              f"{r['rows_per_second'] / base:>8.1f}x")
+    print(f"\n{args.rows} filas, lotes de {args.batch}, {args.latency:.2f}s por llamada, "
+          f"{args.writes_per_minute:.0f} escrituras/min por hoja (ráfaga {args.burst:.0f})")
+    if args.json:
+        print(json.dumps(results))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[1, 2, 4, 8], help="cantidades de eventos a medir")
+    parser.add_argument("--rows", type=int, default=600, help="registros en el journal")
+    parser.add_argument("--batch", type=int, default=20, help="filas por escritura (JOURNAL_SYNC_BATCH)")
+    parser.add_argument("--latency", type=float, default=0.3, help="segundos por llamada a la hoja")
+    parser.add_argument("--writes-per-minute", type=float, default=60, help="límite por hoja")
+    parser.add_argument("--burst", type=float, default=1, help="ráfaga del límite por hoja (1 = ritmo constante)")
+    parser.add_argument("--json", action="store_true", help="imprimir también los resultados en JSON")
+    args = parser.parse_args()
+
+    # Configuración del bot antes de importarlo: valores de relleno y el límite pedido
+    for var in ("TELEGRAM_BOT_TOKEN", "DEEPGRAM_API_KEY", "GEMINI_API_KEY", "GOOGLE_SHEETS_ID"):
+        os.environ.setdefault(var, "bench")
+    os.environ.update({
+        "SHEETS_SHARD_WRITES_PER_MINUTE": str(args.writes_per_minute),
+        "SHEETS_SHARD_WRITE_BURST": str(args.burst),
+    })
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Mide el arranque del bot: tiempo de import y tiempo hasta poder atender updates.
+
+Cada corrida usa un intérprete nuevo para que el tiempo de import sea real.
+"Listo" es el momento en que termina post_init (servicios creados y pipeline
+en marcha); a partir de ahí el bot puede procesar su primer update. La
+conexión a Google Sheets ocurre en segundo plano y se reporta aparte.
+
+    uv run python benchmarks/startup.py --runs 5
+    uv run python benchmarks/startup.py --offline   # sin llamar a la API de Telegram
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+CHILD = r'''
+import asyncio, json, sys, time
+started = time.perf_counter()
+from networker_bot.main import build_application
+import_time = time.perf_counter() - started
+from networker_bot.services.container import services
+
+async def run(offline, sheets_wait):
+    application = build_application()
+    if not offline:
+        await application.initialize()
+    await application.post_init(application)
+    ready = time.perf_counter() - started
+
+    deadline = time.perf_counter() + sheets_wait
+    while services.sheets is None and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    await application.post_shutdown(application)
+    if not offline:
+        await application.shutdown()
+    return ready
+
+ready = asyncio.run(run(sys.argv[1] == "1", float(sys.argv[2])))
+print(json.dumps({
+    "import": import_time,
+    "ready": ready,
+    "services": services.timings.get("services_ready"),
+    "sheets": services.timings.get("sheets_ready"),
+}))
+'''
+
+def run_once(offline: bool, sheets_wait: float) -> dict:
+    env = dict(os.environ, PYTHONPATH=SRC, PYTHONWARNINGS="ignore")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, "1" if offline else "0", str(sheets_wait)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="cantidad de arranques")
+    parser.add_argument("--offline", action="store_true", help="no inicializar el bot contra Telegram")
+    parser.add_argument("--sheets-wait", type=float, default=15.0,
+                        help="segundos máximos esperando la conexión a Sheets")
+    args = parser.parse_args()
+
+    results = [run_once(args.offline, args.sheets_wait) for _ in range(args.runs)]
+    for metric in ("import", "services", "ready", "sheets"):
+        values = [r[metric] for r in results if r[metric] is not None]
+        if values:
+            print(f"{metric:<10} mediana {statistics.median(values):6.2f}s  máx {max(values):6.2f}s")
+        else:
+            print(f"{metric:<10} sin datos")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Compara la transcripción con Deepgram y con el modelo local en CPU.
+
+Cada motor corre en un proceso nuevo sobre el mismo corpus de notas y se
+mide latencia p50/p95, notas por segundo, notas por segundo de CPU
+(rendimiento por núcleo) y memoria pico. Deepgram es el servidor falso de
+benchmarks/fakes.py con latencia configurable, así que su costo de CPU es
+solo el del cliente; el modelo local requiere faster-whisper.
+
+    uv run python benchmarks/transcription.py --corpus ~/notas --notes 40
+    uv run python benchmarks/transcription.py --backend local --model base --workers 2
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Configuración del bot antes de importar networker_bot (también en los procesos
+# hijos, que la heredan): valores de relleno y sin caché, para medir cada nota
+for var in ("TELEGRAM_BOT_TOKEN", "DEEPGRAM_API_KEY", "GEMINI_API_KEY", "GOOGLE_SHEETS_ID"):
+    os.environ.setdefault(var, "bench")
+os.environ.update({"CACHE_MAX_ENTRIES": "0", "CACHE_DIR": ""})
+
+from audio_preprocess import load_corpus, synthetic_note  # type: ignore
+from fakes import percentile  # type: ignore
+from loadtest import free_port  # type: ignore
+
+async def start_fake_deepgram(port: int, latency: float, jitter: float):
+    from aiohttp import web
+    from fakes import FakeServices  # type: ignore
+
+    fakes = FakeServices({"deepgram_latency": latency, "deepgram_jitter": jitter})
+    runner = web.AppRunner(fakes.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+async def measure(backend: str, notes: list, args) -> dict:
+    runner = None
+    if backend == "deepgram":
+        from networker_bot.services.deepgram import DeepgramService
+        port = int(os.environ["DEEPGRAM_API_URL"].rsplit(":", 1)[1])
+        runner = await start_fake_deepgram(port, args.deepgram_latency, args.deepgram_jitter)
+        service = DeepgramService()
+    else:
+        from networker_bot.services.local_asr import LocalWhisperService
+        if not LocalWhisperService.available():
+            return {"backend": backend, "error": "faster-whisper no está instalado"}
+        service = LocalWhisperService(model=args.model, workers=args.workers)
+        load_started = time.perf_counter()
+        await service.warm_up()
+        load_seconds = time.perf_counter() - load_started
+
+    limit = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def transcribe(data: bytes) -> None:
+        async with limit:
+            started = time.perf_counter()
+            await service.transcribe_audio(data)
+            latencies.append(time.perf_counter() - started)
+
+    cpu_before = os.times()
+    started = time.perf_counter()
+    await asyncio.gather(*(transcribe(data) for _, data in notes))
+    wall = time.perf_counter() - started
+
+    if backend == "local":
+        service.pool.shutdown(wait=True)  # Los procesos terminan: su CPU y RSS quedan en RUSAGE_CHILDREN
+    else:
+        await runner.cleanup()
+    cpu_after = os.times()
+    cpu = sum(cpu_after[:4]) - sum(cpu_before[:4])
+
+    rss_self = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    rss_child = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    workers = args.workers if backend == "local" else 0
+    return {
+        "backend": backend,
+        "notes": len(notes),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "throughput": len(notes) / wall,
+        "per_cpu_second": len(notes) / cpu if cpu else 0.0,
+        "cpu_seconds": cpu,
+        "rss_mb": rss_self + workers * rss_child,
+        "load_seconds": load_seconds if backend == "local" else 0.0,
+    }
+
+def child(backend: str, notes: list, args, results) -> None:
+    results.put(asyncio.run(measure(backend, notes, args)))
+
+def main(args) -> None:
+    if args.corpus:
+        notes = load_corpus(args.corpus)
+    else:
+        notes = [(f"sintética-{i}", synthetic_note(i)) for i in range(min(args.notes, 8))]
+    if not notes:
+        sys.exit("El corpus está vacío")
+    notes = [notes[i % len(notes)] for i in range(args.notes)]
+
+    backends = ["deepgram", "local"] if args.backend == "both" else [args.backend]
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    # El proceso hijo hereda el entorno: Deepgram apunta al servidor falso
+    os.environ["DEEPGRAM_API_URL"] = f"http://127.0.0.1:{free_port()}"
+    rows = []
+    for backend in backends:
+        process = context.Process(target=child, args=(backend, notes, args, results))
+        process.start()
+        rows.append(results.get())
+        process.join()
+
+    print(f"{'motor':<10}{'p50 (s)':>9}{'p95 (s)':>9}{'notas/s':>9}{'notas/s CPU':>13}{'RSS MB':>9}{'carga (s)':>11}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['backend']:<10}{row['error']}")
+            continue
+        print(
+            f"{row['backend']:<10}{row['p50']:>9.2f}{row['p95']:>9.2f}{row['throughput']:>9.2f}"
+            f"{row['per_cpu_second']:>13.2f}{row['rss_mb']:>9.0f}{row['load_seconds']:>11.1f}"
+        )
+    print(f"\n{args.notes} notas, {args.concurrency} a la vez; Deepgram falso con "
+          f"{args.deepgram_latency:.2f}s ± {args.deepgram_jitter:.2f}s de latencia")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=("deepgram", "local", "both"), default="both")
+    parser.add_argument("--corpus", help="directorio con notas de voz reales (.ogg/.oga/.opus)")
+    parser.add_argument("--notes", type=int, default=20, help="notas a transcribir por motor")
+    parser.add_argument("--concurrency", type=int, default=4, help="notas en curso a la vez")
+    parser.add_argument("--model", default=os.getenv("LOCAL_ASR_MODEL", "small"), help="modelo de faster-whisper")
+    parser.add_argument("--workers", type=int, default=1, help="procesos del modelo local")
+    parser.add_argument("--deepgram-latency", type=float, default=1.0)
+    parser.add_argument("--deepgram-jitter", type=float, default=0.3)
+    main(parser.parse_args())
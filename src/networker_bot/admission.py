@@ -0,0 +1,210 @@
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from networker_bot.config import (
+    USER_RATE_PER_MINUTE,
+    USER_RATE_BURST,
+    USER_RATE_LIMIT_DB,
+    JOB_VISIBILITY_TIMEOUT
+)
+from networker_bot.services.executor import BlockingExecutor
+
+logger = logging.getLogger(__name__)
+
+class MemoryBucketStore:
+    """Token buckets por usuario en memoria (se pierden al reiniciar)"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._buckets: dict = {}
+
+    async def take(self, key: int, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+        self._buckets[key] = (tokens - 1, now)
+        if len(self._buckets) > self.max_entries:
+            self._prune(now, rate, capacity)
+        return 0.0
+
+    async def give(self, key: int, rate: float, capacity: float) -> None:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        self._buckets[key] = (min(capacity, tokens + (now - updated) * rate + 1), now)
+
+    def _prune(self, now: float, rate: float, capacity: float) -> None:
+        # Un bucket que ya se rellenó equivale a no tener entrada
+        self._buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * rate < capacity
+        }
+
+    async def close(self) -> None:
+        pass
+
+class SQLiteBucketStore:
+    """
+    Token buckets por usuario en SQLite: sobreviven a reinicios y se comparten
+    entre procesos que usen el mismo archivo.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.executor = BlockingExecutor("rate-limit", 1)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_buckets (
+                user_id INTEGER PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        logger.info(f"✅ Límites por usuario persistidos en {path}")
+
+    def _take(self, key: int, rate: float, capacity: float) -> float:
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT tokens, updated FROM user_buckets WHERE user_id = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO user_buckets (user_id, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return wait
+
+    def _give(self, key: int, rate: float, capacity: float) -> None:
+        now = time.time()
+        self._conn.execute(
+            "UPDATE user_buckets SET tokens = MIN(?, tokens + MAX(0, ? - updated) * ? + 1), updated = ? "
+            "WHERE user_id = ?",
+            (capacity, now, rate, now, key)
+        )
+
+    async def take(self, key: int, rate: float, capacity: float) -> float:
+        return await self.executor.run(self._take, key, rate, capacity)
+
+    async def give(self, key: int, rate: float, capacity: float) -> None:
+        await self.executor.run(self._give, key, rate, capacity)
+
+    async def close(self) -> None:
+        self.executor.shutdown()
+        self._conn.close()
+
+class UserRateLimiter:
+    """
+    Limita las notas de voz por usuario con un token bucket: ráfagas de hasta
+    `burst` notas y luego `per_minute` notas por minuto.
+    """
+
+    def __init__(self, per_minute: float = USER_RATE_PER_MINUTE, burst: float = USER_RATE_BURST,
+                 store_path: str = USER_RATE_LIMIT_DB):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, burst)
+        self.store_path = store_path
+        self._store = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    async def check(self, user_id: int) -> float:
+        """
+        Consume un token del usuario.
+
+        Args:
+            user_id: ID de Telegram del usuario
+
+        Returns:
+            float: 0 si la nota se acepta; si no, segundos hasta el próximo token
+        """
+        if not self.enabled:
+            return 0.0
+        if self._store is None:
+            self._store = SQLiteBucketStore(self.store_path) if self.store_path else MemoryBucketStore()
+        try:
+            return await self._store.take(user_id, self.rate, self.capacity)
+        except Exception as e:
+            # Ante un error del almacenamiento se deja pasar la nota
+            logger.error(f"Error consultando el límite del usuario {user_id}: {e}")
+            return 0.0
+
+    async def refund(self, user_id: int) -> None:
+        """Devuelve el token de una nota que el bot rechazó (saturado o apagándose)"""
+        if not self.enabled or self._store is None:
+            return
+        try:
+            await self._store.give(user_id, self.rate, self.capacity)
+        except Exception as e:
+            logger.error(f"Error devolviendo el token del usuario {user_id}: {e}")
+
+    async def close(self) -> None:
+        if self._store is not None:
+            await self._store.close()
+            self._store = None
+
+@dataclass
+class Submission:
+    """Nota de voz de un usuario que todavía se está procesando"""
+    file_unique_id: str
+    handle: Any  # VoiceJob en el pipeline local, ID del job en modo ingress
+    processing_msg: Any
+    started: float = field(default_factory=time.monotonic)
+
+class InFlightNotes:
+    """
+    Última nota en proceso de cada usuario, para detectar reenvíos de la
+    misma nota y reemplazar la anterior cuando el usuario graba otra.
+
+    En modo ingress el bot no sabe cuándo termina un worker: las entradas
+    vencen tras `ttl` segundos.
+    """
+
+    def __init__(self, ttl: float = JOB_VISIBILITY_TIMEOUT):
+        self.ttl = ttl
+        self._by_user: dict = {}
+
+    def get(self, user_id: int) -> Optional[Submission]:
+        submission = self._by_user.get(user_id)
+        if submission is not None and time.monotonic() - submission.started > self.ttl:
+            del self._by_user[user_id]
+            return None
+        return submission
+
+    def add(self, user_id: int, submission: Submission) -> None:
+        self._by_user[user_id] = submission
+
+    def submissions(self) -> list:
+        """Notas en proceso de todos los usuarios"""
+        return list(self._by_user.values())
+
+    def discard(self, user_id: int, handle: Any) -> None:
+        """Quita la entrada del usuario si sigue siendo la de `handle`"""
+        submission = self._by_user.get(user_id)
+        if submission is not None and submission.handle is handle:
+            del self._by_user[user_id]
+
+rate_limiter = UserRateLimiter()
+in_flight = InFlightNotes()
@@ -13,6 +13,176 @@ GOOGLE_SHEETS_ID = os.getenv('GOOGLE_SHEETS_ID')
 EVENT_NAME = os.getenv('EVENT_NAME', 'Hackaton Release Before Ready')
 ORGANIZER = os.getenv('ORGANIZER', 'opino.tech')
 
+# Varios eventos a la vez, cada uno con su propia hoja (JSON; vacío = solo EVENT_NAME en sheet1)
+# {"meetup": {"name": "Meetup IA", "worksheet": "Meetup"}, "demo": {"name": "Demo Day", "spreadsheet_id": "..."}}
+# El evento "default" (EVENT_NAME en la primera hoja de GOOGLE_SHEETS_ID) siempre existe;
+# cada chat elige el suyo con /evento y EVENTS_PATH recuerda la elección
+EVENTS = os.getenv('EVENTS', '')
+DEFAULT_EVENT = os.getenv('DEFAULT_EVENT', 'default')
+EVENTS_PATH = os.getenv('EVENTS_PATH', 'data/events.db')
+
+# Modo de recepción de updates: 'polling' o 'webhook'
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '').rstrip('/')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+PORT = int(os.getenv('PORT', '8443'))
+
+# API de Telegram alternativa (p. ej. un servidor de pruebas); vacío = api.telegram.org
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '').rstrip('/')
+
+# Concurrencia: updates de Telegram procesados en paralelo
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '32'))
+
+# Límite global de llamadas a la API de Telegram y mensajes de progreso
+TELEGRAM_RATE_LIMIT = float(os.getenv('TELEGRAM_RATE_LIMIT', '25'))
+TELEGRAM_RATE_BURST = float(os.getenv('TELEGRAM_RATE_BURST', '30'))
+PROGRESS_CHAT_INTERVAL = float(os.getenv('PROGRESS_CHAT_INTERVAL', '1.0'))
+PROGRESS_MAX_RETRIES = int(os.getenv('PROGRESS_MAX_RETRIES', '3'))
+
+# Límite de notas de voz por usuario (token bucket; 0 = sin límite)
+# USER_RATE_LIMIT_DB vacío = en memoria; una ruta SQLite los conserva entre reinicios
+USER_RATE_PER_MINUTE = float(os.getenv('USER_RATE_PER_MINUTE', '2'))
+USER_RATE_BURST = float(os.getenv('USER_RATE_BURST', '3'))
+USER_RATE_LIMIT_DB = os.getenv('USER_RATE_LIMIT_DB', '')
+
+# Límite de llamadas simultáneas por servicio externo
+DEEPGRAM_MAX_CONCURRENCY = int(os.getenv('DEEPGRAM_MAX_CONCURRENCY', '8'))
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', '8'))
+SHEETS_MAX_WORKERS = int(os.getenv('SHEETS_MAX_WORKERS', '4'))
+
+# Reintentos de escritura a Google Sheets (los lotes los arma el replicador del journal)
+SHEETS_MAX_RETRIES = int(os.getenv('SHEETS_MAX_RETRIES', '5'))
+SHEETS_RETRY_BASE_DELAY = float(os.getenv('SHEETS_RETRY_BASE_DELAY', '1.0'))
+# Escrituras por minuto de cada hoja (token bucket propio por evento; 0 = sin límite)
+SHEETS_SHARD_WRITES_PER_MINUTE = float(os.getenv('SHEETS_SHARD_WRITES_PER_MINUTE', '60'))
+SHEETS_SHARD_WRITE_BURST = float(os.getenv('SHEETS_SHARD_WRITE_BURST', '10'))
+
+# Sincronización incremental con Sheets: edita la fila del contacto (usuario, evento y nombre) en lugar de duplicarla
+# (cache local de filas + cursor; la hoja solo se relee desde la última fila conocida)
+SHEETS_UPSERT = os.getenv('SHEETS_UPSERT', 'true').lower() == 'true'
+SHEETS_SYNC_PATH = os.getenv('SHEETS_SYNC_PATH', 'data/sheet_sync.db')
+SHEETS_SYNC_INTERVAL = float(os.getenv('SHEETS_SYNC_INTERVAL', '30'))
+
+# Journal local de registros (se replica a Google Sheets en segundo plano)
+JOURNAL_PATH = os.getenv('JOURNAL_PATH', 'data/journal.db')
+JOURNAL_SYNC_BATCH = int(os.getenv('JOURNAL_SYNC_BATCH', '100'))
+JOURNAL_SYNC_INTERVAL = float(os.getenv('JOURNAL_SYNC_INTERVAL', '2.0'))
+SHEETS_CONNECT_RETRY_DELAY = float(os.getenv('SHEETS_CONNECT_RETRY_DELAY', '10'))
+
+# Directorio local de contactos (copia indexada de lo guardado en Sheets para /buscar y /match)
+CONTACTS_PATH = os.getenv('CONTACTS_PATH', 'data/contacts.db')
+CONTACTS_BACKFILL = os.getenv('CONTACTS_BACKFILL', 'true').lower() == 'true'
+# Modo ingress: los workers escriben en su propio disco, así que el bot vuelve a
+# importar las hojas cada CONTACTS_REFRESH_INTERVAL segundos (0 = desactivado)
+CONTACTS_REFRESH_INTERVAL = float(os.getenv('CONTACTS_REFRESH_INTERVAL', '300'))
+
+# Audio: tamaño máximo que se mantiene en memoria antes de usar archivo temporal
+AUDIO_MEMORY_LIMIT = int(os.getenv('AUDIO_MEMORY_LIMIT', str(10 * 1024 * 1024)))
+
+# Preprocesamiento de audio antes de Deepgram: recorte de silencios y recodificación
+# (requiere ffmpeg y numpy; AUDIO_MAX_PAUSE=0 conserva las pausas internas completas)
+AUDIO_PREPROCESS = os.getenv('AUDIO_PREPROCESS', 'false').lower() == 'true'
+AUDIO_PREPROCESS_WORKERS = int(os.getenv('AUDIO_PREPROCESS_WORKERS', '2'))
+AUDIO_PREPROCESS_TIMEOUT = float(os.getenv('AUDIO_PREPROCESS_TIMEOUT', '20'))
+AUDIO_SAMPLE_RATE = int(os.getenv('AUDIO_SAMPLE_RATE', '16000'))
+AUDIO_BITRATE = os.getenv('AUDIO_BITRATE', '24k')
+AUDIO_SILENCE_DB = float(os.getenv('AUDIO_SILENCE_DB', '-50'))
+AUDIO_MAX_PAUSE = float(os.getenv('AUDIO_MAX_PAUSE', '1.0'))
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+
+# Transcripción por segmentos de las notas largas (también requiere ffmpeg y numpy)
+# Notas de al menos TRANSCRIBE_CHUNK_THRESHOLD segundos (0 = desactivado) se cortan en
+# silencios en segmentos de ~TRANSCRIBE_CHUNK_SECONDS que se transcriben en paralelo
+TRANSCRIBE_CHUNK_THRESHOLD = float(os.getenv('TRANSCRIBE_CHUNK_THRESHOLD', '0'))
+TRANSCRIBE_CHUNK_SECONDS = float(os.getenv('TRANSCRIBE_CHUNK_SECONDS', '30'))
+TRANSCRIBE_CHUNK_OVERLAP = float(os.getenv('TRANSCRIBE_CHUNK_OVERLAP', '1.0'))
+TRANSCRIBE_CHUNK_PARALLELISM = int(os.getenv('TRANSCRIBE_CHUNK_PARALLELISM', '4'))
+
+# Motor de transcripción: 'deepgram', 'local' (modelo Whisper en CPU) o 'auto'
+# (notas de hasta LOCAL_ASR_MAX_SECONDS en local y las más largas en Deepgram)
+# El modo local requiere faster-whisper; LOCAL_ASR_THREADS=0 reparte los núcleos entre procesos
+TRANSCRIBE_BACKEND = os.getenv('TRANSCRIBE_BACKEND', 'deepgram').lower()
+TRANSCRIBE_LOCAL_FALLBACK = os.getenv('TRANSCRIBE_LOCAL_FALLBACK', 'false').lower() == 'true'
+LOCAL_ASR_MODEL = os.getenv('LOCAL_ASR_MODEL', 'small')
+LOCAL_ASR_COMPUTE_TYPE = os.getenv('LOCAL_ASR_COMPUTE_TYPE', 'int8')
+LOCAL_ASR_WORKERS = int(os.getenv('LOCAL_ASR_WORKERS', '1'))
+LOCAL_ASR_THREADS = int(os.getenv('LOCAL_ASR_THREADS', '0'))
+LOCAL_ASR_MAX_SECONDS = float(os.getenv('LOCAL_ASR_MAX_SECONDS', '60'))
+LOCAL_ASR_TIMEOUT = float(os.getenv('LOCAL_ASR_TIMEOUT', '120'))
+
+# Deepgram: URL base (permite apuntar a un servidor local de pruebas) y modo streaming
+DEEPGRAM_API_URL = os.getenv('DEEPGRAM_API_URL', 'https://api.deepgram.com')
+DEEPGRAM_STREAMING = os.getenv('DEEPGRAM_STREAMING', 'false').lower() == 'true'
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', str(64 * 1024)))
+
+# Gemini: modelo y salida estructurada (JSON con esquema en lugar de prompt completo)
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+GEMINI_STRUCTURED_OUTPUT = os.getenv('GEMINI_STRUCTURED_OUTPUT', 'true').lower() == 'true'
+GEMINI_BATCH_SIZE = int(os.getenv('GEMINI_BATCH_SIZE', '8'))
+GEMINI_BATCH_WINDOW = float(os.getenv('GEMINI_BATCH_WINDOW', '0.1'))
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT', '')
+
+# Resiliencia de proveedores: deadline por llamada, reintentos y circuit breaker
+DEEPGRAM_TIMEOUT = float(os.getenv('DEEPGRAM_TIMEOUT', '60'))
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '30'))
+SHEETS_TIMEOUT = float(os.getenv('SHEETS_TIMEOUT', '30'))
+PROVIDER_MAX_RETRIES = int(os.getenv('PROVIDER_MAX_RETRIES', '2'))
+PROVIDER_RETRY_BASE_DELAY = float(os.getenv('PROVIDER_RETRY_BASE_DELAY', '0.5'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+DEEPGRAM_HEDGE_DELAY = float(os.getenv('DEEPGRAM_HEDGE_DELAY', '0'))
+
+# Pools de conexiones HTTP keep-alive hacia los proveedores (límites por proveedor)
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '20'))
+HTTP_MAX_KEEPALIVE = int(os.getenv('HTTP_MAX_KEEPALIVE', '10'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '60'))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'true').lower() == 'true'
+
+# Caché de transcripciones y extracciones (CACHE_DIR vacío = solo memoria)
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '1000'))
+CACHE_TTL = float(os.getenv('CACHE_TTL', str(24 * 3600)))
+CACHE_DIR = os.getenv('CACHE_DIR', '')
+CACHE_DISK_MAX_ENTRIES = int(os.getenv('CACHE_DISK_MAX_ENTRIES', '10000'))
+
+# Pipeline de notas de voz: workers por etapa y tamaño de las colas
+PIPELINE_DOWNLOAD_WORKERS = int(os.getenv('PIPELINE_DOWNLOAD_WORKERS', '4'))
+PIPELINE_TRANSCRIBE_WORKERS = int(os.getenv('PIPELINE_TRANSCRIBE_WORKERS', str(DEEPGRAM_MAX_CONCURRENCY)))
+PIPELINE_EXTRACT_WORKERS = int(os.getenv('PIPELINE_EXTRACT_WORKERS', str(GEMINI_MAX_CONCURRENCY)))
+PIPELINE_SAVE_WORKERS = int(os.getenv('PIPELINE_SAVE_WORKERS', str(SHEETS_MAX_WORKERS)))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '50'))
+PIPELINE_METRICS_INTERVAL = float(os.getenv('PIPELINE_METRICS_INTERVAL', '60'))
+
+# Ciclo de vida de las notas en proceso: etapa y resultados parciales en SQLite para
+# retomarlas tras un reinicio (vacío = desactivado). Con SIGTERM el bot deja de aceptar
+# notas y espera hasta SHUTDOWN_DRAIN_TIMEOUT segundos a las que están en curso
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', 'data/voice_jobs.db')
+JOB_RESUME_MAX_AGE = float(os.getenv('JOB_RESUME_MAX_AGE', '3600'))
+JOB_RESUME_MAX_ATTEMPTS = int(os.getenv('JOB_RESUME_MAX_ATTEMPTS', '3'))
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', '15'))
+
+# Cola de trabajos hacia procesos worker (vacío = el pipeline corre dentro del bot)
+# sqlite:///data/jobs.db para workers en la misma máquina, redis://host:6379/0 en red
+JOB_QUEUE_URL = os.getenv('JOB_QUEUE_URL', '')
+JOB_QUEUE_MAX_DEPTH = int(os.getenv('JOB_QUEUE_MAX_DEPTH', '1000'))
+JOB_VISIBILITY_TIMEOUT = float(os.getenv('JOB_VISIBILITY_TIMEOUT', '120'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', '5'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '0.5'))
+# Identificador del worker (Heroku define DYNO); cada worker usa su propio journal
+WORKER_ID = os.getenv('WORKER_ID') or os.getenv('DYNO', 'worker')
+WORKER_MAX_JOBS = int(os.getenv('WORKER_MAX_JOBS', '16'))
+
+# Métricas Prometheus en http://METRICS_HOST:METRICS_PORT/metrics (0 = desactivado)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9100'))
+# Puerto base de los workers: cada uno suma el número final de su WORKER_ID (w1 → 9101, w2 → 9102)
+WORKER_METRICS_PORT = int(os.getenv('WORKER_METRICS_PORT', '9101'))
+# Trace ID por nota de voz en los logs y fracción de notas con log detallado
+LOG_TRACE_IDS = os.getenv('LOG_TRACE_IDS', 'true').lower() == 'true'
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.1'))
+
 # Validar que todas las variables estén presentes
 required_vars = [
     'TELEGRAM_BOT_TOKEN',
@@ -24,3 +194,11 @@ required_vars = [
 for var in required_vars:
     if not os.getenv(var):
         raise ValueError(f"Variable de entorno {var} no encontrada")
+
+if BOT_MODE not in ('polling', 'webhook'):
+    raise ValueError(f"BOT_MODE inválido: {BOT_MODE} (usa 'polling' o 'webhook')")
+
+if BOT_MODE == 'webhook':
+    for var in ['WEBHOOK_URL', 'WEBHOOK_SECRET']:
+        if not os.getenv(var):
+            raise ValueError(f"Variable de entorno {var} no encontrada (requerida en modo webhook)")
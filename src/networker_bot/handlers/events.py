@@ -0,0 +1,52 @@
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from networker_bot.services.container import services
+
+logger = logging.getLogger(__name__)
+
+async def event_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Maneja el comando /evento [nombre]: sin argumentos muestra el evento
+    activo del chat y los disponibles; con un nombre cambia el evento donde
+    se guardan las próximas presentaciones.
+
+    Args:
+        update: Objeto Update de Telegram
+        context: Contexto de la conversación
+    """
+    try:
+        events = services.events
+        chat_id = update.effective_chat.id
+        current = events.for_chat(chat_id)
+        text = " ".join(context.args or [])
+
+        if not text:
+            lines = [
+                f"{'👉' if event.slug == current.slug else '▫️'} {event.name} — /evento {event.slug}"
+                for event in events.events.values()
+            ]
+            await update.message.reply_text(
+                f"📍 Evento actual: {current.name}\n\n"
+                "Eventos disponibles:\n" + "\n".join(lines)
+            )
+            return
+
+        event = events.find(text)
+        if event is None:
+            await update.message.reply_text(
+                f"🤔 No encontramos el evento \"{text}\". Usa /evento para ver la lista."
+            )
+            return
+
+        await events.select(chat_id, event)
+        await update.message.reply_text(
+            f"📍 Listo: tus próximas presentaciones se guardan en {event.name}.\n"
+            "/buscar y /match también buscan en este evento."
+        )
+        logger.info(f"Chat {chat_id} cambió al evento {event.slug}")
+
+    except Exception as e:
+        logger.error(f"Error en event_handler: {e}")
+        await update.message.reply_text("❌ Error al cambiar de evento. Inténtalo de nuevo.")
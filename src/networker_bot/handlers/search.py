@@ -0,0 +1,95 @@
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from networker_bot.metrics import metrics
+from networker_bot.services.container import services
+
+logger = logging.getLogger(__name__)
+
+FIELD_MAX_CHARS = 120  # Recorta campos largos para no superar el límite de 4096 caracteres
+
+def format_contact(contact: dict) -> str:
+    """Resume un perfil en pocas líneas (texto plano: los datos vienen del usuario)"""
+    contact = {key: str(value or "")[:FIELD_MAX_CHARS] for key, value in contact.items()}
+    lines = [f"👤 {contact.get('nombre') or 'Sin nombre'}"]
+    if contact.get("ocupacion"):
+        lines[0] += f" — {contact['ocupacion']}"
+    if contact.get("stack"):
+        lines.append(f"⚡ {contact['stack']}")
+    if contact.get("proyecto"):
+        lines.append(f"🚀 {contact['proyecto']}")
+    if contact.get("hobby"):
+        lines.append(f"🎯 {contact['hobby']}")
+    if contact.get("username"):
+        lines.append(f"💬 @{contact['username']}")
+    return "\n".join(lines)
+
+async def search_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Maneja el comando /buscar <término>: perfiles del evento del chat cuyo stack,
+    ocupación, proyecto o hobby contienen los términos.
+
+    Args:
+        update: Objeto Update de Telegram
+        context: Contexto de la conversación
+    """
+    try:
+        text = " ".join(context.args or [])
+        if not text:
+            await update.message.reply_text(
+                "🔎 Escribe qué buscas, por ejemplo:\n/buscar react\n/buscar diseño ux"
+            )
+            return
+
+        event = services.events.for_chat(update.effective_chat.id)
+        with metrics.span("contacts_search"):
+            results = await services.contacts.search(text, event.name)
+
+        if not results:
+            await update.message.reply_text(f"🔎 No encontramos perfiles para \"{text}\".")
+            return
+
+        await update.message.reply_text(
+            f"🔎 Perfiles para \"{text}\":\n\n"
+            + "\n\n".join(format_contact(contact) for contact in results)
+        )
+        logger.info(f"Usuario {update.effective_user.id} buscó '{text}' ({len(results)} resultados)")
+
+    except Exception as e:
+        logger.error(f"Error en search_handler: {e}")
+        await update.message.reply_text("❌ Error al buscar. Inténtalo de nuevo.")
+
+async def match_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Maneja el comando /match: perfiles del evento del chat más afines al del usuario.
+
+    Args:
+        update: Objeto Update de Telegram
+        context: Contexto de la conversación
+    """
+    try:
+        event = services.events.for_chat(update.effective_chat.id)
+        with metrics.span("contacts_match"):
+            results = await services.contacts.match(update.effective_user.id, event.name)
+
+        if results is None:
+            await update.message.reply_text(
+                "🎤 Primero envía tu presentación por nota de voz; "
+                "con tu perfil buscamos a las personas más afines."
+            )
+            return
+
+        if not results:
+            await update.message.reply_text("🤝 Todavía no hay perfiles afines al tuyo. ¡Prueba más tarde!")
+            return
+
+        await update.message.reply_text(
+            "🤝 Personas afines a tu perfil:\n\n"
+            + "\n\n".join(format_contact(contact) for contact in results)
+        )
+        logger.info(f"Usuario {update.effective_user.id} ejecutó /match ({len(results)} resultados)")
+
+    except Exception as e:
+        logger.error(f"Error en match_handler: {e}")
+        await update.message.reply_text("❌ Error al buscar coincidencias. Inténtalo de nuevo.")
@@ -1,8 +1,10 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
+from telegram.helpers import escape_markdown
 
 from networker_bot.config import ORGANIZER
+from networker_bot.services.container import services
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +23,8 @@ async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        # Mensaje de bienvenida
+        # Mensaje de bienvenida (con el evento activo del chat)
+        event = services.events.for_chat(update.effective_chat.id)
         welcome_message = f"""
 🤖 **¡Hola! Soy Networker Bot**
 
@@ -35,7 +38,9 @@ Automatizo el proceso de networking extrayendo información de tus presentacione
 3. Yo extraigo tu información automáticamente
 4. La guardo en una base de datos organizada
 
-**Evento:** Hackaton Release Before Ready
+**Evento:** {escape_markdown(event.name)} (cámbialo con /evento)
+
+Luego usa /buscar <tema> o /match para encontrar personas afines.
 
 ¡Presiona el botón para empezar! 👇
         """
@@ -1,155 +1,578 @@
+import io
 import logging
-import os
+import math
+import tempfile
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
-from telegram import Update
+from typing import AsyncIterator, BinaryIO, Optional
+import httpx
+from telegram import Bot, File, Message, Update, User
 from telegram.ext import ContextTypes
 
-from networker_bot.services.deepgram import DeepgramService
-from networker_bot.services.gemini import GeminiService
-from networker_bot.services.sheets import SheetsService
+from networker_bot.config import (
+    PIPELINE_DOWNLOAD_WORKERS,
+    PIPELINE_TRANSCRIBE_WORKERS,
+    PIPELINE_EXTRACT_WORKERS,
+    PIPELINE_SAVE_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_METRICS_INTERVAL,
+    AUDIO_MEMORY_LIMIT,
+    AUDIO_PREPROCESS,
+    AUDIO_PREPROCESS_WORKERS,
+    DEEPGRAM_STREAMING,
+    TRANSCRIBE_CHUNK_THRESHOLD,
+    STREAM_CHUNK_SIZE,
+    JOB_QUEUE_MAX_DEPTH,
+    JOB_RESUME_MAX_AGE,
+    JOB_RESUME_MAX_ATTEMPTS,
+    LOG_TRACE_IDS
+)
+from networker_bot.admission import Submission, in_flight, rate_limiter
+from networker_bot.metrics import log_sampled, metrics, new_trace_id, trace_id_var
+from networker_bot.pipeline import Pipeline, Stage
+from networker_bot.progress import progress
+from networker_bot.services.container import services
+from networker_bot.services.job_queue import Lease
 
 logger = logging.getLogger(__name__)
 
-# Crear directorio temp si no existe
-os.makedirs("temp", exist_ok=True)
+SATURATED_TEXT = (
+    "⚠️ Estamos recibiendo muchas presentaciones en este momento.\n"
+    "Por favor, intenta de nuevo en unos minutos."
+)
 
-deepgram_service = DeepgramService()
-gemini_service = GeminiService()
-sheets_service = SheetsService()
+DUPLICATE_TEXT = "👀 Ya recibimos esta nota de voz y la estamos procesando."
 
-async def voice_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Procesa notas de voz y extrae información para networking"""
-    
-    if not update.message or not update.message.voice:
-        return
-    
-    user = update.effective_user
-    chat_id = update.effective_chat.id
-    
-    # Enviar mensaje de procesamiento
-    processing_msg = await update.message.reply_text(
+RATE_LIMITED_TEXT = (
+    "⏳ Estás enviando muchas notas de voz seguidas.\n"
+    "Por favor, espera {seconds} segundos antes de enviar otra."
+)
+
+REPLACED_TEXT = "⏭️ Reemplazada por tu nota de voz más reciente."
+
+RESTARTING_TEXT = (
+    "🔄 El bot se está reiniciando.\n"
+    "⏳ Retomaremos tu presentación en cuanto vuelva."
+)
+
+RESUMING_TEXT = (
+    "🔄 Retomando tu presentación...\n"
+    "⏳ Esto puede tomar unos segundos."
+)
+
+INTERRUPTED_TEXT = (
+    "❌ Tu presentación se interrumpió por un reinicio del bot.\n"
+    "Por favor, envía la nota de voz de nuevo."
+)
+
+@dataclass
+class VoiceJob:
+    """Estado de una nota de voz a lo largo del pipeline"""
+    message: Message
+    user: User
+    processing_msg: Message
+    audio: Optional[BinaryIO] = None
+    telegram_file: Optional[File] = None  # Solo en modo streaming
+    transcript: str = ""
+    structured_info: dict = field(default_factory=dict)
+    trace_id: str = "-"
+    outcome: str = "discarded"  # ok | error | replaced | discarded (transcripción o extracción vacía)
+    started: float = field(default_factory=time.perf_counter)
+    lease: Optional[Lease] = None  # Solo en los procesos worker
+    cancelled: bool = False  # El usuario envió otra nota antes de que esta terminara
+    event: str = "default"  # Evento del chat al recibir la nota (define la hoja de destino)
+
+    @property
+    def job_id(self) -> str:
+        """Identificador estable de la nota (sirve para retomarla tras un reinicio)"""
+        return f"{self.message.chat_id}:{self.message.message_id}"
+
+def job_payload(message: Message, processing_msg: Message, trace_id: str, event: str = "default") -> dict:
+    """Serializa lo que un worker necesita para procesar la nota (file_id, chat, mensajes, evento)"""
+    return {
+        "message": message.to_dict(),
+        "processing_msg": processing_msg.to_dict(),
+        "trace_id": trace_id,
+        "event": event,
+    }
+
+def job_from_payload(payload: dict, bot: Bot, lease: Optional[Lease] = None) -> VoiceJob:
+    """Reconstruye el job en un worker; los mensajes quedan asociados a su Bot"""
+    message = Message.de_json(payload["message"], bot)
+    return VoiceJob(
+        message=message,
+        user=message.from_user,
+        processing_msg=Message.de_json(payload["processing_msg"], bot),
+        trace_id=payload.get("trace_id", "-"),
+        lease=lease,
+        event=payload.get("event", "default"),
+        transcript=payload.get("transcript", ""),
+        structured_info=payload.get("structured", {})
+    )
+
+def job_progress(job: VoiceJob, payload: dict) -> dict:
+    """Payload del job con los resultados parciales, para que un reintento no vuelva a pagarlos"""
+    progress_payload = dict(payload)
+    if job.transcript:
+        progress_payload["transcript"] = job.transcript
+    if job.structured_info:
+        progress_payload["structured"] = job.structured_info
+    return progress_payload
+
+def processing_text(position: int) -> str:
+    """Texto del mensaje de progreso inicial según la posición en la cola"""
+    if position > 0:
+        return (
+            f"🕐 Estás en la posición #{position} de la cola.\n"
+            "⏳ Procesaremos tu presentación en cuanto sea tu turno."
+        )
+    return (
         "🎧 Procesando tu presentación...\n"
         "⏳ Esto puede tomar unos segundos."
     )
-    
-    try:
-        # 1. Descargar el archivo de audio
-        voice_file = await update.message.voice.get_file()
-        
-        # Descargar archivo
-        file_path = f"temp/voice_{user.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ogg"
-        await voice_file.download_to_drive(file_path)
-        
-        logger.info(f"Audio descargado: {file_path}")
-        
-        # 2. Transcribir audio con Deepgram
-        await processing_msg.edit_text(
-            "🎧 Audio descargado\n"
-            "📝 Transcribiendo..."
+
+def audio_buffer(file_size: Optional[int]) -> BinaryIO:
+    """
+    Crea el buffer donde se descarga el audio.
+
+    Las notas normales quedan en memoria; solo los audios que superan
+    AUDIO_MEMORY_LIMIT van a un archivo temporal anónimo.
+    """
+    if file_size and file_size > AUDIO_MEMORY_LIMIT:
+        return tempfile.TemporaryFile()
+    return io.BytesIO()
+
+def audio_bytes(buffer: BinaryIO) -> bytes:
+    """Retorna el contenido del buffer (sin copia si está en memoria)"""
+    if isinstance(buffer, io.BytesIO):
+        return buffer.getvalue()
+    buffer.seek(0)
+    return buffer.read()
+
+async def stream_voice_file(job: VoiceJob) -> AsyncIterator[bytes]:
+    """Descarga el audio por partes, guardando una copia en el buffer del job"""
+    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0)) as client:
+        async with client.stream("GET", job.telegram_file.file_path) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                job.audio.write(chunk)
+                yield chunk
+
+def is_long_note(job: VoiceJob) -> bool:
+    """Notas que se transcriben por segmentos en paralelo (requiere el procesador de audio)"""
+    return (
+        TRANSCRIBE_CHUNK_THRESHOLD > 0
+        and services.audio is not None
+        and (job.message.voice.duration or 0) >= TRANSCRIBE_CHUNK_THRESHOLD
+    )
+
+def edit_status(job: VoiceJob, text: str, final: bool = False, **kwargs) -> None:
+    """Programa la actualización del mensaje de progreso sin esperar a Telegram"""
+    if job.cancelled:
+        return
+    progress.edit(job.processing_msg, text, final=final, **kwargs)
+
+async def download_stage(job: VoiceJob) -> bool:
+    """1. Descargar el archivo de audio (en streaming solo se obtiene su URL)"""
+    if job.transcript:
+        return True  # Retomada tras un reinicio: ya no hace falta el audio
+
+    voice = job.message.voice
+    with metrics.span("telegram_get_file"):
+        voice_file = await voice.get_file()
+
+    job.audio = audio_buffer(voice.file_size)
+
+    if DEEPGRAM_STREAMING and services.transcriber.streams(voice.duration) and not is_long_note(job):
+        # La descarga ocurre durante la transcripción
+        job.telegram_file = voice_file
+        return True
+
+    with metrics.span("telegram_download"):
+        await voice_file.download_to_memory(out=job.audio)
+
+    logger.debug(f"Audio descargado: {voice.file_unique_id} ({voice.file_size} bytes)")
+    return True
+
+async def preprocess_stage(job: VoiceJob) -> bool:
+    """1b. Recortar silencios y recodificar el audio antes de subirlo a Deepgram"""
+    if services.audio is None or job.telegram_file is not None or job.audio is None:
+        return True  # Desactivado, el audio se sube mientras se descarga, o ya hay transcripción
+
+    original = audio_bytes(job.audio)
+    with metrics.span("audio_preprocess"):
+        audio, stats = await services.audio.process(original)
+
+    if audio is not original:
+        job.audio.close()
+        job.audio = io.BytesIO(audio)
+        metrics.inc("networker_audio_bytes_saved_total", stats["original_bytes"] - stats["bytes"])
+        metrics.inc("networker_audio_seconds_saved_total", stats["original_seconds"] - stats["seconds"])
+        logger.debug(
+            f"Audio preprocesado: {stats['original_bytes']} → {stats['bytes']} bytes, "
+            f"{stats['original_seconds']:.1f}s → {stats['seconds']:.1f}s"
         )
-        
-        transcript = await deepgram_service.transcribe_audio(file_path)
-        
-        if not transcript:
-            await processing_msg.edit_text(
-                "❌ No se pudo transcribir el audio.\n"
-                "Por favor, intenta de nuevo con una nota de voz más clara."
-            )
-            return
-        
-        logger.info(f"Transcripción completada: {transcript[:100]}...")
-        
-        # 3. Extraer información estructurada con Gemini
-        await processing_msg.edit_text(
-            "🎧 Audio descargado ✅\n"
-            "📝 Transcripción completada ✅\n"
-            "🤖 Extrayendo información..."
+    return True
+
+async def transcribe_stage(job: VoiceJob) -> bool:
+    """2. Transcribir audio (Deepgram o modelo local)"""
+    if job.transcript:
+        return True
+
+    edit_status(
+        job,
+        "🎧 Audio descargado\n"
+        "📝 Transcribiendo..."
+    )
+
+    voice = job.message.voice
+    if job.telegram_file is not None:
+        job.transcript = await services.transcriber.transcribe_stream(
+            stream_voice_file(job), cache_key=voice.file_unique_id
         )
-        
-        structured_info = await gemini_service.extract_info(transcript)  # type: ignore[attr-defined]
-        
-        if not structured_info:
-            await processing_msg.edit_text(
-                "❌ No se pudo extraer información estructurada.\n"
-                "Por favor, intenta de nuevo con una presentación más detallada."
-            )
-            return
-        
-        logger.info(f"Información extraída: {structured_info}")
-        
-        # 4. Preparar datos para Google Sheets
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        row_data = [
-            structured_info.get("nombre", ""),
-            structured_info.get("edad", ""),
-            structured_info.get("ocupacion", ""),
-            structured_info.get("proyecto", ""),
-            structured_info.get("stack", ""),
-            structured_info.get("hobby", ""),
-            structured_info.get("info_adicional", ""),
-            structured_info.get('lugar_conocimos', ''),  # ← Cambiado
-            current_time,                      # Fecha/Hora
-            user.username or "",               # Username
-            str(user.id)                       # User ID
-        ]
-        
-        # 5. Guardar en Google Sheets
-        await processing_msg.edit_text(
-            "🎧 Audio descargado ✅\n"
-            "📝 Transcripción completada ✅\n"
-            "🤖 Información extraída ✅\n"
-            "📊 Guardando en base de datos..."
+    else:
+        # El router elige Deepgram o el modelo local según la duración;
+        # las notas largas que van a Deepgram se envían por segmentos
+        job.transcript = await services.transcriber.transcribe_audio(
+            audio_bytes(job.audio),
+            cache_key=voice.file_unique_id,
+            duration=voice.duration,
+            split=services.audio.split if is_long_note(job) else None
+        )
+
+    if not job.transcript:
+        edit_status(
+            job,
+            "❌ No se pudo transcribir el audio.\n"
+            "Por favor, intenta de nuevo con una nota de voz más clara.",
+            final=True
         )
-        
-        success = await sheets_service.add_row(row_data)  # type: ignore[attr-defined]
-        
-        if success:
-            # Mostrar resumen al usuario
-            summary_text = "✅ **¡Presentación procesada exitosamente!**\n\n"
-            summary_text += "📋 **Información extraída:**\n"
-            
-            if structured_info.get("nombre"):
-                summary_text += f"👤 **Nombre:** {structured_info['nombre']}\n"
-            if structured_info.get("edad"):
-                summary_text += f"🎂 **Edad:** {structured_info['edad']}\n"
-            if structured_info.get("ocupacion"):
-                summary_text += f"💼 **Ocupación:** {structured_info['ocupacion']}\n"
-            if structured_info.get("proyecto"):
-                summary_text += f"🚀 **Proyecto:** {structured_info['proyecto']}\n"
-            if structured_info.get("stack"):
-                summary_text += f"⚡ **Stack/Expertise:** {structured_info['stack']}\n"
-            if structured_info.get("hobby"):
-                summary_text += f"🎯 **Hobby/Dato Curioso:** {structured_info['hobby']}\n"
-            
-            summary_text += "\n🎉 **¡Tu información ha sido guardada para networking!**"
-            
-            await processing_msg.edit_text(summary_text, parse_mode="Markdown")
-            
-            # Ofrecer enviar otra presentación
-            await update.message.reply_text(
-                "¿Quieres enviar otra presentación? 🎤\n"
-                "Simplemente envía otra nota de voz o usa /start para ver el menú."
-            )
-            
-        else:
-            await processing_msg.edit_text(
-                "❌ Error al guardar la información.\n"
-                "Por favor, intenta de nuevo."
-            )
-        
+        return False
+
+    logger.debug(f"Transcripción completada: {len(job.transcript)} caracteres")
+    return True
+
+async def extract_stage(job: VoiceJob) -> bool:
+    """3. Extraer información estructurada con Gemini"""
+    if job.structured_info:
+        return True
+
+    edit_status(
+        job,
+        "🎧 Audio descargado ✅\n"
+        "📝 Transcripción completada ✅\n"
+        "🤖 Extrayendo información..."
+    )
+
+    job.structured_info = await services.gemini.extract_info(job.transcript)  # type: ignore[attr-defined]
+
+    if not job.structured_info:
+        edit_status(
+            job,
+            "❌ No se pudo extraer información estructurada.\n"
+            "Por favor, intenta de nuevo con una presentación más detallada.",
+            final=True
+        )
+        return False
+
+    logger.debug(f"Información extraída: {list(job.structured_info)}")
+    return True
+
+async def save_stage(job: VoiceJob) -> bool:
+    """4. Guardar en el journal (se replica a Google Sheets) y mostrar el resumen"""
+    structured_info = job.structured_info
+    user = job.user
+    event = services.events.get(job.event)
+
+    # Preparar datos para Google Sheets
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    row_data = [
+        structured_info.get("nombre", ""),
+        structured_info.get("edad", ""),
+        structured_info.get("ocupacion", ""),
+        structured_info.get("proyecto", ""),
+        structured_info.get("stack", ""),
+        structured_info.get("hobby", ""),
+        structured_info.get("info_adicional", ""),
+        event.name,                        # Lugar/evento (el activo del chat)
+        current_time,                      # Fecha/Hora
+        user.username or "",               # Username
+        str(user.id)                       # User ID
+    ]
+
+    if job.cancelled:
+        return False
+
+    try:
+        # Las filas se confirman primero en el journal local y luego el
+        # replicador del evento las envía a su hoja
+        with metrics.span("journal"):
+            await services.journal.append(row_data, shard=event.slug)
     except Exception as e:
-        logger.error(f"Error procesando nota de voz: {str(e)}")
-        await processing_msg.edit_text(
+        logger.error(f"Error al guardar en el journal: {e}")
+        edit_status(
+            job,
+            "❌ Error al guardar la información.\n"
+            "Por favor, intenta de nuevo.",
+            final=True
+        )
+        return False
+
+    services.notify_replicator(event.slug)
+
+    try:
+        # Copia indexada para /buscar y /match; si falla, el registro ya está a salvo
+        await services.contacts.add_rows([row_data], event.name)
+    except Exception as e:
+        logger.warning(f"No se pudo actualizar el directorio de contactos: {e}")
+
+    # Mostrar resumen al usuario
+    summary_text = "✅ **¡Presentación procesada exitosamente!**\n\n"
+    summary_text += "📋 **Información extraída:**\n"
+
+    if structured_info.get("nombre"):
+        summary_text += f"👤 **Nombre:** {structured_info['nombre']}\n"
+    if structured_info.get("edad"):
+        summary_text += f"🎂 **Edad:** {structured_info['edad']}\n"
+    if structured_info.get("ocupacion"):
+        summary_text += f"💼 **Ocupación:** {structured_info['ocupacion']}\n"
+    if structured_info.get("proyecto"):
+        summary_text += f"🚀 **Proyecto:** {structured_info['proyecto']}\n"
+    if structured_info.get("stack"):
+        summary_text += f"⚡ **Stack/Expertise:** {structured_info['stack']}\n"
+    if structured_info.get("hobby"):
+        summary_text += f"🎯 **Hobby/Dato Curioso:** {structured_info['hobby']}\n"
+
+    summary_text += "\n🎉 **¡Tu información ha sido guardada para networking!**"
+
+    edit_status(job, summary_text, final=True, parse_mode="Markdown")
+
+    # Ofrecer enviar otra presentación
+    progress.reply(
+        job.message,
+        "¿Quieres enviar otra presentación? 🎤\n"
+        "Simplemente envía otra nota de voz o usa /start para ver el menú."
+    )
+    job.outcome = "ok"
+    return True
+
+async def on_job_error(job: VoiceJob, error: Exception) -> None:
+    """Avisa al usuario cuando una etapa falla"""
+    job.outcome = "error"
+    logger.error(f"Error procesando nota de voz: {str(error)}")
+    edit_status(
+        job,
+        "❌ Ocurrió un error al procesar tu presentación.\n"
+        "Por favor, intenta de nuevo.",
+        final=True
+    )
+
+async def on_job_finish(job: VoiceJob) -> None:
+    """Libera el buffer de audio y registra el resultado cuando el job sale del pipeline"""
+    if job.audio is not None:
+        job.audio.close()
+        job.audio = None
+    in_flight.discard(job.user.id, job)
+    if services.job_store is not None:
+        await services.job_store.finish(job.job_id)
+
+    elapsed = time.perf_counter() - job.started
+    metrics.inc("networker_voice_notes_total", outcome=job.outcome)
+    metrics.observe("networker_span_seconds", elapsed, span="voice_note")
+    log_sampled(logger, "voice_note", outcome=job.outcome, seconds=round(elapsed, 3),
+                transcript_chars=len(job.transcript))
+
+async def on_stage_done(job: VoiceJob, stage: str) -> None:
+    """Anota la etapa completada y los resultados parciales para poder retomar la nota"""
+    if services.job_store is not None:
+        await services.job_store.advance(job.job_id, stage, job.transcript, job.structured_info)
+
+voice_pipeline = Pipeline(
+    [
+        Stage("download", download_stage, PIPELINE_DOWNLOAD_WORKERS, PIPELINE_QUEUE_SIZE),
+        *([Stage("preprocess", preprocess_stage, AUDIO_PREPROCESS_WORKERS, PIPELINE_QUEUE_SIZE)]
+          if AUDIO_PREPROCESS else []),
+        Stage("transcribe", transcribe_stage, PIPELINE_TRANSCRIBE_WORKERS, PIPELINE_QUEUE_SIZE),
+        Stage("extract", extract_stage, PIPELINE_EXTRACT_WORKERS, PIPELINE_QUEUE_SIZE),
+        Stage("save", save_stage, PIPELINE_SAVE_WORKERS, PIPELINE_QUEUE_SIZE),
+    ],
+    on_error=on_job_error,
+    on_finish=on_job_finish,
+    metrics_interval=PIPELINE_METRICS_INTERVAL,
+    on_stage_done=on_stage_done
+)
+
+async def voice_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Procesa notas de voz y extrae información para networking"""
+
+    if not update.message or not update.message.voice:
+        return
+
+    trace_id = new_trace_id() if LOG_TRACE_IDS else "-"
+    trace_id_var.set(trace_id)
+
+    # Respuestas inmediatas y baratas antes de gastar cuota de Deepgram/Gemini
+    user_id = update.effective_user.id
+    previous = in_flight.get(user_id)
+    if previous is not None and previous.file_unique_id == update.message.voice.file_unique_id:
+        metrics.inc("networker_voice_notes_total", outcome="duplicate")
+        logger.info(f"Nota de voz repetida de {user_id}, ya está en proceso")
+        progress.reply(update.message, DUPLICATE_TEXT)
+        return
+
+    wait = await rate_limiter.check(user_id)
+    if wait > 0:
+        metrics.inc("networker_voice_notes_total", outcome="rate_limited")
+        logger.warning(f"Usuario {user_id} superó el límite de notas de voz")
+        progress.reply(update.message, RATE_LIMITED_TEXT.format(seconds=math.ceil(wait)))
+        return
+
+    if services.job_queue is not None:
+        await enqueue_voice_note(update, trace_id, previous)
+        return
+
+    position = voice_pipeline.position()
+
+    if position is None or voice_pipeline.draining:
+        metrics.inc("networker_voice_notes_total", outcome="rejected")
+        logger.warning(f"Pipeline saturado, nota de voz de {update.effective_user.id} rechazada")
+        progress.reply(update.message, SATURATED_TEXT)
+        await rate_limiter.refund(user_id)  # El rechazo no es culpa del usuario
+        return
+
+    # Enviar mensaje de procesamiento (o posición en la cola); se necesita el
+    # Message para editarlo después, así que esta llamada sí se espera
+    with metrics.span("telegram_send"):
+        processing_msg = await progress.call(lambda: update.message.reply_text(processing_text(position)))
+
+    job = VoiceJob(
+        message=update.message,
+        user=update.effective_user,
+        processing_msg=processing_msg,
+        trace_id=trace_id,
+        event=services.events.for_chat(update.effective_chat.id).slug
+    )
+
+    if services.job_store is not None:
+        await services.job_store.add(job.job_id, job_payload(update.message, processing_msg, trace_id, job.event))
+
+    if not voice_pipeline.submit(job):
+        metrics.inc("networker_voice_notes_total", outcome="rejected")
+        edit_status(job, SATURATED_TEXT, final=True)
+        if services.job_store is not None:
+            await services.job_store.finish(job.job_id)
+        await rate_limiter.refund(user_id)
+        return
+
+    if previous is not None:
+        await replace_previous(previous)
+    in_flight.add(user_id, Submission(update.message.voice.file_unique_id, job, processing_msg))
+
+async def replace_previous(previous: Submission) -> None:
+    """Cancela la nota anterior del usuario si todavía no terminó; la nueva la reemplaza"""
+    if services.job_queue is not None:
+        # Si un worker ya la tomó, se deja terminar
+        if not await services.job_queue.cancel(previous.handle):
+            return
+        metrics.inc("networker_voice_notes_total", outcome="replaced")
+    else:
+        previous.handle.cancelled = True
+        previous.handle.outcome = "replaced"
+        if services.job_store is not None:
+            # Que no se retome tras un reinicio si el pipeline aún no la soltó
+            await services.job_store.finish(previous.handle.job_id)
+    logger.info("⏭️ Nota de voz anterior reemplazada por una nueva del mismo usuario")
+    progress.edit(previous.processing_msg, REPLACED_TEXT, final=True)
+
+async def resume_voice_jobs(bot: Bot) -> int:
+    """
+    Vuelve a encolar las notas que quedaron a medias en el último reinicio.
+
+    Cada nota conserva su transcripción y sus datos extraídos, así que las
+    etapas ya completadas se saltan. Las demasiado viejas o que ya fallaron
+    varias veces se descartan avisando al usuario.
+
+    Returns:
+        int: Notas retomadas
+    """
+    job_store = services.job_store
+    if job_store is None:
+        return 0
+
+    resumed = 0
+    for record in await job_store.unfinished():
+        job = job_from_payload(record["payload"], bot)
+        job.transcript = record["transcript"]
+        job.structured_info = record["structured"]
+
+        expired = time.time() - record["created"] > JOB_RESUME_MAX_AGE
+        if expired or record["attempts"] > JOB_RESUME_MAX_ATTEMPTS or not voice_pipeline.submit(job):
+            metrics.inc("networker_voice_notes_total", outcome="abandoned")
+            logger.warning(f"Nota de voz {record['job_id']} descartada tras el reinicio (etapa {record['stage']})")
+            progress.edit(job.processing_msg, INTERRUPTED_TEXT, final=True)
+            await job_store.finish(record["job_id"])
+            continue
+
+        progress.edit(job.processing_msg, RESUMING_TEXT)
+        in_flight.add(job.user.id, Submission(job.message.voice.file_unique_id, job, job.processing_msg))
+        metrics.inc("networker_voice_notes_resumed_total")
+        resumed += 1
+
+    if resumed:
+        logger.info(f"🔄 {resumed} notas de voz retomadas tras el reinicio")
+    return resumed
+
+def pause_in_flight() -> int:
+    """
+    Avisa a los usuarios cuyas notas no terminaron antes del apagado.
+
+    Returns:
+        int: Notas avisadas
+    """
+    paused = 0
+    for submission in in_flight.submissions():
+        job = submission.handle
+        if isinstance(job, VoiceJob) and not job.cancelled:
+            edit_status(job, RESTARTING_TEXT)
+            paused += 1
+    return paused
+
+async def enqueue_voice_note(update: Update, trace_id: str, previous: Optional[Submission] = None) -> None:
+    """Modo ingress: deja la nota en la cola para que la procese un worker"""
+    job_queue = services.job_queue
+    position = await job_queue.depth()
+
+    if position >= JOB_QUEUE_MAX_DEPTH:
+        metrics.inc("networker_voice_notes_total", outcome="rejected")
+        logger.warning(f"Cola de trabajos llena, nota de voz de {update.effective_user.id} rechazada")
+        progress.reply(update.message, SATURATED_TEXT)
+        await rate_limiter.refund(update.effective_user.id)
+        return
+
+    with metrics.span("telegram_send"):
+        processing_msg = await progress.call(lambda: update.message.reply_text(processing_text(position)))
+
+    try:
+        event = services.events.for_chat(update.effective_chat.id)
+        job_id = await job_queue.enqueue(job_payload(update.message, processing_msg, trace_id, event.slug))
+    except Exception as e:
+        logger.error(f"No se pudo encolar la nota de voz: {e}")
+        progress.edit(
+            processing_msg,
             "❌ Ocurrió un error al procesar tu presentación.\n"
-            "Por favor, intenta de nuevo."
+            "Por favor, intenta de nuevo.",
+            final=True
         )
-    
-    finally:
-        # Limpiar archivo temporal
-        try:
-            if 'file_path' in locals() and os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f"Archivo temporal eliminado: {file_path}")
-        except Exception as e:
-            logger.error(f"Error eliminando archivo temporal: {str(e)}")
+        await rate_limiter.refund(update.effective_user.id)
+        return
+
+    metrics.inc("networker_jobs_enqueued_total")
+    if previous is not None:
+        await replace_previous(previous)
+    in_flight.add(
+        update.effective_user.id,
+        Submission(update.message.voice.file_unique_id, job_id, processing_msg)
+    )
+    logger.debug(f"Nota de voz encolada como job {job_id} (posición {position})")
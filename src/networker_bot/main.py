@@ -3,38 +3,155 @@ import asyncio
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
 from telegram import Update
 
-from networker_bot.config import TELEGRAM_BOT_TOKEN
+from networker_bot.config import (
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_API_URL,
+    CONCURRENT_UPDATES,
+    BOT_MODE,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_MAX_CONNECTIONS,
+    PORT,
+    JOB_QUEUE_URL,
+    SHUTDOWN_DRAIN_TIMEOUT,
+    METRICS_HOST,
+    METRICS_PORT
+)
+from networker_bot.admission import rate_limiter
 from networker_bot.handlers.start import start_handler
 from networker_bot.handlers.callback import callback_handler
-from networker_bot.handlers.voice import voice_handler
-import os
-
-# Crear directorio temp si no existe
-os.makedirs("temp", exist_ok=True)
+from networker_bot.handlers.events import event_handler
+from networker_bot.handlers.search import match_handler, search_handler
+from networker_bot.handlers.voice import pause_in_flight, resume_voice_jobs, voice_handler, voice_pipeline
+from networker_bot.metrics import MetricsServer, configure_logging, metrics
+from networker_bot.progress import progress
+from networker_bot.services.container import services
 
-# Configurar logging más detallado
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Configurar logging (con el trace ID de la nota de voz si está activado)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+metrics_server = MetricsServer(metrics, METRICS_HOST, METRICS_PORT) if METRICS_PORT else None
+
+# Tipo de update que necesita cada clase de handler registrada
+HANDLER_UPDATE_TYPES = {
+    CommandHandler: Update.MESSAGE,
+    MessageHandler: Update.MESSAGE,
+    CallbackQueryHandler: Update.CALLBACK_QUERY,
+}
+
+def allowed_updates(application: Application) -> list:
+    """
+    Calcula los tipos de update que usan los handlers registrados,
+    para no suscribirse a updates que el bot ignora
+    """
+    update_types = set()
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            update_types.add(HANDLER_UPDATE_TYPES[type(handler)])
+    return sorted(update_types)
+
+async def post_init(application: Application) -> None:
+    """
+    Inicializa los servicios y los workers del pipeline de notas de voz.
+
+    Con JOB_QUEUE_URL el bot solo recibe updates y encola las notas de voz;
+    los procesos worker (worker.py) ejecutan el pipeline. Sin cola, al
+    arrancar se retoman las notas que el último apagado dejó a medias.
+    """
+    if JOB_QUEUE_URL:
+        await services.open_job_queue()
+        await services.open_contacts()
+        await services.open_events()
+        await services.mirror_contacts()
+        logger.info("📤 Modo ingress: las notas de voz se procesan en los workers")
+    else:
+        await services.start()
+        await services.open_job_store()
+        await voice_pipeline.start()
+        await resume_voice_jobs(application.bot)
+        metrics.add_collector(services.collect)
+        metrics.add_collector(voice_pipeline.collect)
+    if metrics_server is not None:
+        await metrics_server.start()
+
+async def post_stop(application: Application) -> None:
+    """
+    Con SIGTERM: deja de aceptar notas y espera a las que están en curso.
+
+    Corre antes de cerrar el Bot, así que todavía se pueden editar los
+    mensajes de progreso; las notas que no terminan a tiempo quedan en el
+    registro para retomarlas al volver.
+    """
+    if not voice_pipeline.running:
+        return
+    pending = await voice_pipeline.drain(SHUTDOWN_DRAIN_TIMEOUT)
+    await voice_pipeline.stop()
+    if pending:
+        paused = pause_in_flight()
+        logger.warning(f"🔄 {paused} notas de voz quedan pendientes para el próximo arranque")
+    await progress.flush()
+
+async def post_shutdown(application: Application) -> None:
+    """
+    Detiene el pipeline, vacía el journal y libera los recursos de los servicios
+    """
+    if metrics_server is not None:
+        await metrics_server.stop()
+    await voice_pipeline.stop()
+    await progress.flush()
+    await rate_limiter.close()
+    await services.close()
+
+def build_application() -> Application:
+    """
+    Crea la aplicación con sus handlers registrados
+    """
+    builder = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_stop(post_stop)
+        .post_shutdown(post_shutdown)
+    )
+    if TELEGRAM_API_URL:
+        builder = builder.base_url(f"{TELEGRAM_API_URL}/bot").base_file_url(f"{TELEGRAM_API_URL}/file/bot")
+    application = builder.build()
+    
+    # Registrar handlers
+    application.add_handler(CommandHandler("start", start_handler))
+    application.add_handler(CommandHandler("buscar", search_handler))
+    application.add_handler(CommandHandler("match", match_handler))
+    application.add_handler(CommandHandler("evento", event_handler))
+    application.add_handler(CallbackQueryHandler(callback_handler))
+    application.add_handler(MessageHandler(filters.VOICE, voice_handler))
+    return application
+
 def main():
     """
     Función principal del bot
     """
     try:
-        # Crear aplicación
-        application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
-        
-        # Registrar handlers
-        application.add_handler(CommandHandler("start", start_handler))
-        application.add_handler(CallbackQueryHandler(callback_handler))
-        application.add_handler(MessageHandler(filters.VOICE, voice_handler))
+        application = build_application()
         
         # Iniciar bot
-        logger.info("🤖 Networker Bot iniciado en producción")
-        application.run_polling(allowed_updates=Update.ALL_TYPES)
+        update_types = allowed_updates(application)
+        if BOT_MODE == 'webhook':
+            logger.info(f"🤖 Networker Bot iniciado en modo webhook (puerto {PORT})")
+            application.run_webhook(
+                listen="0.0.0.0",
+                port=PORT,
+                url_path=WEBHOOK_PATH,
+                webhook_url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=update_types
+            )
+        else:
+            logger.info("🤖 Networker Bot iniciado en modo polling")
+            application.run_polling(allowed_updates=update_types)
         
     except Exception as e:
         logger.error(f"💥 Error crítico al iniciar bot: {e}")
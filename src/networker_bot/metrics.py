@@ -0,0 +1,266 @@
+import asyncio
+import bisect
+import contextvars
+import json
+import logging
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+from networker_bot.config import LOG_SAMPLE_RATE, LOG_TRACE_IDS
+
+logger = logging.getLogger(__name__)
+
+# Límites (en segundos) de los buckets de los histogramas de latencia
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Histogramas que además exportan sus percentiles como gauges
+QUANTILE_FAMILIES = {
+    "networker_span_seconds": "networker_span_quantile_seconds",
+    "networker_stage_seconds": "networker_stage_quantile_seconds",
+}
+
+METRIC_HELP = {
+    "networker_span_seconds": "Duración de cada operación de una nota de voz",
+    "networker_span_quantile_seconds": "p50/p95/p99 de las últimas duraciones de cada operación",
+    "networker_stage_seconds": "Duración de cada etapa del pipeline",
+    "networker_stage_quantile_seconds": "p50/p95/p99 de las últimas duraciones de cada etapa",
+    "networker_errors_total": "Operaciones que terminaron con error",
+    "networker_voice_notes_total": "Notas de voz recibidas por resultado",
+}
+
+# Trace ID de la nota de voz en curso; "-" fuera de un job
+trace_id_var: contextvars.ContextVar = contextvars.ContextVar("trace_id", default="-")
+
+def new_trace_id() -> str:
+    """Genera un identificador corto para seguir una nota de voz en los logs"""
+    return uuid.uuid4().hex[:12]
+
+class TraceIdFilter(logging.Filter):
+    """Agrega el trace ID actual a cada registro de log (campo %(trace_id)s)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        return True
+
+def configure_logging() -> None:
+    """Configura el logging del proceso (con el trace ID de la nota de voz si está activado)"""
+    logging.basicConfig(
+        format=(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s'
+            if LOG_TRACE_IDS else
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ),
+        level=logging.INFO
+    )
+    if LOG_TRACE_IDS:
+        for log_handler in logging.getLogger().handlers:
+            log_handler.addFilter(TraceIdFilter())
+
+def log_sampled(log: logging.Logger, event: str, **fields) -> None:
+    """
+    Escribe un registro estructurado (JSON) solo para una fracción de los eventos.
+
+    Reemplaza los logs INFO del camino crítico: con LOG_SAMPLE_RATE=0.1 se
+    registra una de cada diez notas de voz. Los errores se loguean siempre
+    por separado.
+    """
+    if LOG_SAMPLE_RATE < 1 and random.random() >= LOG_SAMPLE_RATE:
+        return
+    record = {"event": event, "trace_id": trace_id_var.get(), **fields}
+    log.info(json.dumps(record, ensure_ascii=False, default=str))
+
+class Histogram:
+    """
+    Histograma con buckets acumulables (formato Prometheus) y una muestra
+    acotada de las últimas observaciones para calcular percentiles.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, reservoir: int = 1024):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.samples: deque = deque(maxlen=reservoir)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.samples.append(value)
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels_text(labels: tuple, extra: Optional[tuple] = None) -> str:
+    pairs = labels + (extra or ())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+class MetricsRegistry:
+    """
+    Histogramas y contadores del bot, más colectores que leen contadores
+    existentes (resiliencia, cachés, pools, pipeline) al momento de exportar.
+
+    Los colectores retornan tuplas (nombre, tipo, labels, valor), donde tipo
+    es "counter" o "gauge".
+    """
+
+    def __init__(self):
+        self._histograms: dict = {}
+        self._counters: dict = {}
+        self._collectors: list = []
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Registra una duración en el histograma name"""
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        if key not in series:
+            series[key] = Histogram()
+        series[key].observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Incrementa el contador name"""
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + amount
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Mide la duración de un bloque y cuenta sus errores.
+
+        Uso:
+            with metrics.span("deepgram"):
+                response = await ...
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("networker_errors_total", span=name)
+            raise
+        finally:
+            self.observe("networker_span_seconds", time.perf_counter() - start, span=name)
+
+    def add_collector(self, collector: Callable[[], Iterable[tuple]]) -> None:
+        """Registra una función que aporta métricas al exportar"""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        """Conteo y percentiles de cada histograma, para logs y benchmarks"""
+        result = {}
+        for name, series in self._histograms.items():
+            for key, histogram in series.items():
+                label = ",".join(f"{k}={v}" for k, v in key) or name
+                result[label] = {
+                    "count": histogram.count,
+                    **{f"p{int(q * 100)}": round(histogram.quantile(q), 4) for q in QUANTILES},
+                }
+        return result
+
+    def render(self) -> str:
+        """Exporta todas las métricas en formato de texto Prometheus"""
+        lines: list = []
+
+        def header(name: str, kind: str) -> None:
+            lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, series in self._histograms.items():
+            header(name, "histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_labels_text(key, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels_text(key)} {histogram.sum}")
+                lines.append(f"{name}_count{_labels_text(key)} {histogram.count}")
+
+        for name, family in QUANTILE_FAMILIES.items():
+            series = self._histograms.get(name)
+            if not series:
+                continue
+            header(family, "gauge")
+            for key, histogram in series.items():
+                for q in QUANTILES:
+                    labels = _labels_text(key, (("quantile", q),))
+                    lines.append(f"{family}{labels} {histogram.quantile(q)}")
+
+        for name, series in self._counters.items():
+            header(name, "counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_labels_text(key)} {value}")
+
+        collected: dict = {}
+        for collector in self._collectors:
+            try:
+                for name, kind, labels, value in collector():
+                    collected.setdefault((name, kind), []).append((labels, value))
+            except Exception as e:
+                logger.warning(f"Error en colector de métricas: {e}")
+        for (name, kind), samples in collected.items():
+            header(name, kind)
+            for labels, value in samples:
+                lines.append(f"{name}{_labels_text(tuple(sorted(labels.items())))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """Servidor HTTP mínimo que responde GET /metrics"""
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"📈 Métricas disponibles en http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"Not Found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+metrics = MetricsRegistry()
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from networker_bot.metrics import metrics, trace_id_var
+
+logger = logging.getLogger(__name__)
+
+StageHandler = Callable[[Any], Awaitable[bool]]
+
+@dataclass
+class Stage:
+    """Etapa del pipeline con su propio pool de workers"""
+    name: str
+    handler: StageHandler
+    workers: int = 1
+    queue_size: int = 50
+
+@dataclass
+class StageMetrics:
+    """Métricas acumuladas de una etapa"""
+    processed: int = 0
+    failed: int = 0
+    busy: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=500))
+
+    def observe(self, seconds: float) -> None:
+        self.processed += 1
+        self.latencies.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))
+        return ordered[index]
+
+class Pipeline:
+    """
+    Scheduler de etapas encadenadas con colas acotadas.
+
+    Cada etapa tiene N workers que consumen de su cola y pasan el job a la
+    cola de la siguiente etapa. Si la siguiente cola está llena, el worker
+    espera (backpressure) en lugar de acumular trabajos en memoria. Un job
+    con el atributo `cancelled` en True sale del pipeline antes de su
+    siguiente etapa. Con drain() deja de aceptar jobs y espera a que
+    terminen los que están en curso.
+    """
+
+    def __init__(
+        self,
+        stages: list,
+        on_error: Optional[Callable[[Any, Exception], Awaitable[None]]] = None,
+        on_finish: Optional[Callable[[Any], Awaitable[None]]] = None,
+        metrics_interval: float = 0,
+        on_stage_done: Optional[Callable[[Any, str], Awaitable[None]]] = None
+    ):
+        self.stages = stages
+        self.metrics = {stage.name: StageMetrics() for stage in stages}
+        self._on_error = on_error
+        self._on_finish = on_finish
+        self._on_stage_done = on_stage_done
+        self._metrics_interval = metrics_interval
+        self._queues: list = []
+        self._tasks: list = []
+        self._in_flight = 0
+        self.draining = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Crea las colas y lanza los workers de cada etapa"""
+        if self.running:
+            return
+
+        self.draining = False
+        self._queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                task = asyncio.create_task(
+                    self._worker(index),
+                    name=f"pipeline-{stage.name}-{n}"
+                )
+                self._tasks.append(task)
+
+        if self._metrics_interval > 0:
+            self._tasks.append(asyncio.create_task(self._log_metrics()))
+
+        logger.info(
+            "✅ Pipeline iniciado: "
+            + ", ".join(f"{s.name}={s.workers}" for s in self.stages)
+        )
+
+    async def stop(self) -> None:
+        """Cancela los workers del pipeline"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Pipeline detenido")
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Deja de aceptar jobs y espera a que terminen los que están en curso.
+
+        Args:
+            timeout (float): Segundos máximos de espera
+
+        Returns:
+            int: Jobs que seguían en curso al vencer el plazo
+        """
+        self.draining = True
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self._in_flight:
+            logger.warning(f"⏳ Pipeline drenado con {self._in_flight} jobs aún en curso")
+        else:
+            logger.info("✅ Pipeline drenado")
+        return self._in_flight
+
+    def position(self) -> Optional[int]:
+        """
+        Estima la posición que tendría un nuevo job en la cola de entrada.
+
+        Returns:
+            int: Jobs que esperan delante (0 si un worker está libre),
+            o None si la cola de entrada está llena
+        """
+        queue = self._queues[0]
+        if queue.full():
+            return None
+        idle_workers = self.stages[0].workers - self.metrics[self.stages[0].name].busy
+        return max(0, queue.qsize() + 1 - idle_workers)
+
+    def submit(self, job: Any) -> bool:
+        """
+        Encola un job en la primera etapa sin bloquear.
+
+        Args:
+            job: Trabajo a procesar
+
+        Returns:
+            bool: False si el pipeline está saturado o drenándose
+        """
+        if self.draining:
+            return False
+        try:
+            self._queues[0].put_nowait(job)
+        except asyncio.QueueFull:
+            return False
+
+        self._in_flight += 1
+        return True
+
+    def snapshot(self) -> dict:
+        """
+        Retorna profundidad de colas y latencias por etapa.
+
+        Returns:
+            dict: Métricas del pipeline
+        """
+        stages = {}
+        for index, stage in enumerate(self.stages):
+            stage_metrics = self.metrics[stage.name]
+            stages[stage.name] = {
+                "queue_depth": self._queues[index].qsize() if self._queues else 0,
+                "queue_size": stage.queue_size,
+                "workers": stage.workers,
+                "busy": stage_metrics.busy,
+                "processed": stage_metrics.processed,
+                "failed": stage_metrics.failed,
+                "latency_p50": stage_metrics.percentile(0.50),
+                "latency_p95": stage_metrics.percentile(0.95),
+            }
+        return {"in_flight": self._in_flight, "stages": stages}
+
+    def collect(self) -> list:
+        """Profundidad de colas y workers ocupados, como métricas Prometheus"""
+        samples = [("networker_pipeline_in_flight", "gauge", {}, self._in_flight)]
+        for index, stage in enumerate(self.stages):
+            labels = {"stage": stage.name}
+            depth = self._queues[index].qsize() if self._queues else 0
+            samples.append(("networker_pipeline_queue_depth", "gauge", labels, depth))
+            samples.append(("networker_pipeline_busy_workers", "gauge", labels, self.metrics[stage.name].busy))
+        return samples
+
+    async def _worker(self, index: int) -> None:
+        stage = self.stages[index]
+        queue = self._queues[index]
+        stage_metrics = self.metrics[stage.name]
+        is_last = index == len(self.stages) - 1
+
+        while True:
+            job = await queue.get()
+            # Cada worker es una tarea propia: el trace ID viaja en el job
+            trace_id_var.set(getattr(job, 'trace_id', '-'))
+
+            if getattr(job, 'cancelled', False):
+                # Cancelado mientras esperaba: no se ejecutan las etapas restantes
+                queue.task_done()
+                self._in_flight -= 1
+                if self._on_finish:
+                    await self._safe_call(self._on_finish, job)
+                continue
+
+            stage_metrics.busy += 1
+            start = time.perf_counter()
+            try:
+                proceed = await stage.handler(job)
+                elapsed = time.perf_counter() - start
+                stage_metrics.observe(elapsed)
+                metrics.observe("networker_stage_seconds", elapsed, stage=stage.name)
+            except Exception as e:
+                stage_metrics.failed += 1
+                metrics.inc("networker_errors_total", span=stage.name)
+                proceed = False
+                logger.error(f"Error en etapa '{stage.name}': {e}")
+                if self._on_error:
+                    await self._safe_call(self._on_error, job, e)
+            finally:
+                stage_metrics.busy -= 1
+                queue.task_done()
+
+            if proceed and not is_last:
+                if self._on_stage_done:
+                    await self._safe_call(self._on_stage_done, job, stage.name)
+                # Bloquea si la siguiente etapa está llena (backpressure)
+                await self._queues[index + 1].put(job)
+            else:
+                self._in_flight -= 1
+                if self._on_finish:
+                    await self._safe_call(self._on_finish, job)
+
+    async def _safe_call(self, callback, *args) -> None:
+        try:
+            await callback(*args)
+        except Exception as e:
+            logger.error(f"Error en callback del pipeline: {e}")
+
+    async def _log_metrics(self) -> None:
+        while True:
+            await asyncio.sleep(self._metrics_interval)
+            logger.info(f"📈 Métricas del pipeline: {self.snapshot()}")
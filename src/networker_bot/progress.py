@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter
+
+from networker_bot.config import (
+    TELEGRAM_RATE_LIMIT,
+    TELEGRAM_RATE_BURST,
+    PROGRESS_CHAT_INTERVAL,
+    PROGRESS_MAX_RETRIES
+)
+from networker_bot.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def retry_seconds(error: RetryAfter) -> float:
+    """Segundos de espera que pide Telegram (int o timedelta según la versión de PTB)"""
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+class TokenBucket:
+    """
+    Token bucket global: como máximo `rate` llamadas por segundo, con ráfagas
+    de hasta `capacity`. Los que esperan se atienden en orden de llegada.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+@dataclass
+class _Operation:
+    kind: str  # "edit" o "reply"
+    message: Message
+    text: str
+    kwargs: dict = field(default_factory=dict)
+    final: bool = False
+
+@dataclass
+class _ChatOutbox:
+    operations: deque = field(default_factory=deque)
+    task: Optional[asyncio.Task] = None
+    last_sent: float = 0.0
+
+class ProgressReporter:
+    """
+    Envía los mensajes de progreso sin bloquear el pipeline.
+
+    Cada chat tiene una cola propia que se procesa en segundo plano, en orden.
+    Si llega un nuevo estado para un mensaje cuya edición todavía no se envió,
+    se reemplaza el texto pendiente: los estados intermedios que ya quedaron
+    viejos no se envían. Las ediciones intermedias respetan un intervalo
+    mínimo por chat; los estados finales y las respuestas salen en cuanto el
+    token bucket global lo permite. Ante RetryAfter se espera lo que pide
+    Telegram y se reintenta con el texto más reciente: si durante la espera
+    llegó otro estado para el mismo mensaje, se fusiona y sale una sola edición.
+    """
+
+    def __init__(
+        self,
+        rate: float = TELEGRAM_RATE_LIMIT,
+        burst: float = TELEGRAM_RATE_BURST,
+        chat_interval: float = PROGRESS_CHAT_INTERVAL,
+        max_retries: int = PROGRESS_MAX_RETRIES
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self._outboxes: dict = {}
+
+    def edit(self, message: Message, text: str, final: bool = False, **kwargs) -> None:
+        """
+        Programa la edición de un mensaje de progreso.
+
+        Args:
+            message: Mensaje a editar
+            text: Nuevo texto
+            final: True para el último estado (resumen o error), que no se
+                reemplaza ni espera el intervalo por chat
+            **kwargs: Argumentos de edit_text (p. ej. parse_mode)
+        """
+        outbox = self._outbox(message.chat_id)
+        for operation in outbox.operations:
+            if operation.kind == "edit" and operation.message.message_id == message.message_id:
+                if operation.final:
+                    return
+                operation.text, operation.kwargs, operation.final = text, kwargs, final
+                metrics.inc("networker_progress_coalesced_total")
+                return
+        outbox.operations.append(_Operation("edit", message, text, kwargs, final))
+        self._wake(message.chat_id, outbox)
+
+    def reply(self, message: Message, text: str, **kwargs) -> None:
+        """Programa una respuesta, enviada después de las ediciones pendientes del chat"""
+        outbox = self._outbox(message.chat_id)
+        outbox.operations.append(_Operation("reply", message, text, kwargs, final=True))
+        self._wake(message.chat_id, outbox)
+
+    async def call(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Ejecuta una llamada a la API de Telegram respetando el límite global.
+
+        Para los mensajes cuyo resultado se necesita de inmediato (p. ej. el
+        mensaje de progreso inicial). Reintenta si Telegram responde RetryAfter.
+
+        Args:
+            request: Función sin argumentos que crea la corrutina de la llamada
+
+        Returns:
+            El resultado de la llamada
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                return await request()
+            except RetryAfter as e:
+                metrics.inc("networker_telegram_retry_after_total")
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(retry_seconds(e))
+
+    async def flush(self, timeout: float = 10.0) -> None:
+        """Espera a que se envíen los mensajes pendientes (al apagar el bot)"""
+        tasks = [outbox.task for outbox in self._outboxes.values() if outbox.task is not None]
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"{len(pending)} chats con mensajes de progreso sin enviar al apagar")
+
+    def _outbox(self, chat_id: int) -> _ChatOutbox:
+        if chat_id not in self._outboxes:
+            self._outboxes[chat_id] = _ChatOutbox()
+        return self._outboxes[chat_id]
+
+    def _wake(self, chat_id: int, outbox: _ChatOutbox) -> None:
+        if outbox.task is None:
+            outbox.task = asyncio.create_task(self._drain(chat_id, outbox))
+
+    async def _drain(self, chat_id: int, outbox: _ChatOutbox) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while outbox.operations:
+                operation = outbox.operations[0]
+                if not operation.final:
+                    wait = outbox.last_sent + self.chat_interval - loop.time()
+                    if wait > 0:
+                        # Mientras espera, el estado pendiente puede reemplazarse
+                        await asyncio.sleep(wait)
+                        continue
+                outbox.operations.popleft()
+                await self._send(operation, outbox)
+                outbox.last_sent = loop.time()
+        finally:
+            if not outbox.operations:
+                self._outboxes.pop(chat_id, None)
+            else:
+                outbox.task = None
+
+    def _merge_pending(self, operation: _Operation, outbox: _ChatOutbox) -> None:
+        """Toma el estado más reciente que llegó para el mismo mensaje mientras se esperaba"""
+        if operation.kind != "edit":
+            return
+        for pending in outbox.operations:
+            if pending.kind == "edit" and pending.message.message_id == operation.message.message_id:
+                operation.text, operation.kwargs = pending.text, pending.kwargs
+                operation.final = operation.final or pending.final
+                outbox.operations.remove(pending)
+                metrics.inc("networker_progress_coalesced_total")
+                return
+
+    async def _send(self, operation: _Operation, outbox: _ChatOutbox) -> None:
+        span = "telegram_edit" if operation.kind == "edit" else "telegram_send"
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                with metrics.span(span):
+                    if operation.kind == "edit":
+                        await operation.message.edit_text(operation.text, **operation.kwargs)
+                    else:
+                        await operation.message.reply_text(operation.text, **operation.kwargs)
+                return
+            except RetryAfter as e:
+                metrics.inc("networker_telegram_retry_after_total")
+                logger.warning(f"⏳ Telegram pidió esperar {retry_seconds(e):.0f}s (chat {operation.message.chat_id})")
+                await asyncio.sleep(retry_seconds(e))
+                self._merge_pending(operation, outbox)
+            except BadRequest as e:
+                if "not modified" not in str(e).lower():
+                    logger.error(f"Telegram rechazó el mensaje de progreso: {e}")
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"No se pudo enviar el mensaje de progreso: {e}")
+                    return
+                await asyncio.sleep(2 ** attempt)
+        logger.error(f"Mensaje de progreso descartado tras {self.max_retries} reintentos")
+
+progress = ProgressReporter()
@@ -0,0 +1,292 @@
+import asyncio
+import functools
+import importlib.util
+import logging
+import multiprocessing
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from networker_bot.config import (
+    AUDIO_PREPROCESS_WORKERS,
+    AUDIO_PREPROCESS_TIMEOUT,
+    AUDIO_SAMPLE_RATE,
+    AUDIO_BITRATE,
+    AUDIO_SILENCE_DB,
+    AUDIO_MAX_PAUSE,
+    FFMPEG_BINARY,
+    TRANSCRIBE_CHUNK_SECONDS,
+    TRANSCRIBE_CHUNK_OVERLAP
+)
+
+logger = logging.getLogger(__name__)
+
+FRAME_SECONDS = 0.02       # Ventanas de 20 ms para medir energía
+PADDING_SECONDS = 0.2      # Margen de audio que se conserva alrededor de la voz
+NOISE_MARGIN_DB = 10.0     # La voz debe superar el ruido de fondo por este margen
+PEAK_MARGIN_DB = 30.0      # ...pero nunca exigir más que el pico menos este margen
+OPUS_COMPRESSION_LEVEL = 0  # 5 veces más rápido que el nivel 10 y solo ~2% más grande
+
+def decode(data: bytes, sample_rate: int, ffmpeg: str = FFMPEG_BINARY):
+    """Decodifica cualquier audio que entienda ffmpeg a PCM mono float32"""
+    import numpy as np
+    result = subprocess.run(
+        [ffmpeg, "-nostdin", "-v", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+        input=data, capture_output=True, check=True, timeout=AUDIO_PREPROCESS_TIMEOUT
+    )
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+def encode(samples, sample_rate: int, bitrate: str = AUDIO_BITRATE, ffmpeg: str = FFMPEG_BINARY) -> bytes:
+    """Codifica PCM mono a Opus en OGG (el mismo formato que las notas de voz de Telegram)"""
+    import numpy as np
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    result = subprocess.run(
+        [ffmpeg, "-nostdin", "-v", "error", "-f", "s16le", "-ac", "1", "-ar", str(sample_rate),
+         "-i", "pipe:0", "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+         "-compression_level", str(OPUS_COMPRESSION_LEVEL), "-f", "ogg", "pipe:1"],
+        input=pcm, capture_output=True, check=True, timeout=AUDIO_PREPROCESS_TIMEOUT
+    )
+    return result.stdout
+
+def cut(data: bytes, start: float, end: Optional[float] = None, ffmpeg: str = FFMPEG_BINARY) -> bytes:
+    """Extrae un tramo del OGG sin recodificar (copia los paquetes Opus)"""
+    bounds = ["-ss", f"{start:.3f}"] + (["-to", f"{end:.3f}"] if end is not None else [])
+    result = subprocess.run(
+        [ffmpeg, "-nostdin", "-v", "error", *bounds, "-i", "pipe:0", "-c", "copy", "-f", "ogg", "pipe:1"],
+        input=data, capture_output=True, check=True, timeout=AUDIO_PREPROCESS_TIMEOUT
+    )
+    return result.stdout
+
+def frame_energy(samples, sample_rate: int):
+    """Energía en dB de cada ventana de FRAME_SECONDS"""
+    import numpy as np
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    return 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+
+def speech_frames(samples, sample_rate: int, silence_db: float = AUDIO_SILENCE_DB,
+                  max_pause: float = AUDIO_MAX_PAUSE):
+    """
+    VAD por energía: decide qué ventanas de 20 ms se conservan.
+
+    Una ventana es voz si su energía supera tanto `silence_db` (dBFS) como el
+    ruido de fondo estimado más NOISE_MARGIN_DB. Se quitan los silencios del
+    principio y del final, y las pausas internas más largas que `max_pause`
+    se acortan a esa duración (0 = no acortarlas).
+
+    Returns:
+        tuple: (ventanas de shape (n, frame), máscara booleana de las que se conservan)
+    """
+    import numpy as np
+
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    if count == 0:
+        return frames, np.zeros(0, dtype=bool)
+
+    energy_db = frame_energy(samples, sample_rate)
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(silence_db, min(noise_floor + NOISE_MARGIN_DB, energy_db.max() - PEAK_MARGIN_DB))
+    voiced = energy_db > threshold
+    if not voiced.any():
+        return frames, voiced
+
+    # Margen alrededor de cada tramo de voz para no cortar consonantes
+    padding = int(PADDING_SECONDS / FRAME_SECONDS)
+    voiced = np.convolve(voiced, np.ones(2 * padding + 1), mode="same") > 0
+
+    # Tramos consecutivos (voz / silencio): inicio, largo y posición dentro del tramo
+    edges = np.flatnonzero(np.diff(voiced.astype(np.int8))) + 1
+    starts = np.concatenate(([0], edges))
+    lengths = np.diff(np.concatenate((starts, [count])))
+    run = np.repeat(np.arange(len(starts)), lengths)
+    position = np.arange(count) - starts[run]
+    run_length = lengths[run]
+
+    keep = voiced.copy()
+    if max_pause > 0:
+        half = max(1, int(max_pause / FRAME_SECONDS) // 2)
+        keep |= (position < half) | (position >= run_length - half)
+
+    # Silencio inicial y final: se descarta entero
+    keep[run == 0] &= voiced[0]
+    keep[run == run[-1]] &= voiced[-1]
+    return frames, keep
+
+def preprocess_audio(data: bytes, sample_rate: int = AUDIO_SAMPLE_RATE) -> tuple:
+    """
+    Recorta silencios y recodifica una nota de voz (se ejecuta en un proceso del pool).
+
+    Args:
+        data (bytes): Audio original (OGG/Opus de Telegram)
+        sample_rate (int): Frecuencia de salida (16000 basta para reconocimiento de voz)
+
+    Returns:
+        tuple: (audio procesado o None si no conviene usarlo, estadísticas)
+    """
+    samples = decode(data, sample_rate)
+    frames, keep = speech_frames(samples, sample_rate)
+    stats = {
+        "original_bytes": len(data),
+        "original_seconds": len(samples) / sample_rate,
+        "bytes": len(data),
+        "seconds": len(samples) / sample_rate,
+    }
+    if not keep.any():
+        return None, stats  # Sin voz detectada: que Deepgram decida con el original
+
+    trimmed = frames[keep].reshape(-1)
+    audio = encode(trimmed, sample_rate)
+    if len(audio) >= len(data) and len(trimmed) >= len(samples):
+        return None, stats
+
+    stats["bytes"] = len(audio)
+    stats["seconds"] = len(trimmed) / sample_rate
+    return audio, stats
+
+def split_points(samples, sample_rate: int, segment_seconds: float) -> list:
+    """
+    Elige dónde cortar el audio: cerca de cada múltiplo de `segment_seconds`,
+    en el tramo más silencioso (energía media de 0.3 s) de una ventana de
+    ±25% alrededor. Así los cortes caen en pausas y no a mitad de palabra.
+
+    Returns:
+        list: Muestras de corte, de menor a mayor (sin el 0 ni el final)
+    """
+    import numpy as np
+
+    energy = frame_energy(samples, sample_rate)
+    smooth = max(1, int(0.3 / FRAME_SECONDS))
+    energy = np.convolve(energy, np.ones(smooth) / smooth, mode="same")
+
+    target = int(segment_seconds / FRAME_SECONDS)
+    window = max(1, target // 4)
+    cuts, previous = [], 0
+    while len(energy) - previous > target + window:
+        low = previous + target - window
+        high = min(len(energy), previous + target + window)
+        cut = low + int(np.argmin(energy[low:high]))
+        cuts.append(cut)
+        previous = cut
+
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    return [cut * frame for cut in cuts]
+
+def split_audio(data: bytes, segment_seconds: float = TRANSCRIBE_CHUNK_SECONDS,
+                overlap: float = TRANSCRIBE_CHUNK_OVERLAP, sample_rate: int = AUDIO_SAMPLE_RATE) -> list:
+    """
+    Divide una nota larga en segmentos Opus (se ejecuta en un proceso del pool).
+
+    El audio se decodifica solo para elegir los cortes; los segmentos se
+    extraen copiando los paquetes Opus, sin recodificar. Cada uno empieza
+    `overlap` segundos antes del corte anterior, para que una palabra en el
+    borde quede entera en alguno de los dos; el texto repetido se elimina al
+    unir las transcripciones.
+
+    Returns:
+        list: Segmentos en orden; [data] si la nota cabe en un solo segmento
+    """
+    samples = decode(data, sample_rate)
+    cuts = split_points(samples, sample_rate, segment_seconds)
+    if not cuts:
+        return [data]
+
+    seconds = [point / sample_rate for point in cuts]
+    bounds = zip([0.0] + seconds, seconds + [None])
+    return [cut(data, max(0.0, start - overlap), end) for start, end in bounds]
+
+def _ping() -> bool:
+    import numpy  # noqa: F401 - carga numpy en el proceso durante el warm-up
+    return True
+
+class AudioPreprocessor:
+    """
+    Procesamiento de audio previo a la transcripción.
+
+    Decodifica el Opus de Telegram con ffmpeg, recorta silencios con un VAD
+    por energía en NumPy y recodifica a Opus mono de 16 kHz; también divide
+    las notas largas en segmentos. Es trabajo de CPU, así que corre en un
+    pool de procesos y no bloquea el bot. Ante cualquier error o timeout se
+    usa el audio original.
+    """
+
+    def __init__(self, workers: int = AUDIO_PREPROCESS_WORKERS, sample_rate: int = AUDIO_SAMPLE_RATE):
+        self.workers = workers
+        self.sample_rate = sample_rate
+        self._pool: Optional[ProcessPoolExecutor] = None
+        logger.info(f"✅ Procesador de audio listo ({workers} procesos, {sample_rate} Hz)")
+
+    @staticmethod
+    def available() -> bool:
+        """ffmpeg y numpy son dependencias opcionales: sin ellos la etapa no se activa"""
+        if shutil.which(FFMPEG_BINARY) is None:
+            logger.warning(f"⚠️ No se encontró ffmpeg ({FFMPEG_BINARY}); preprocesamiento de audio desactivado")
+            return False
+        if importlib.util.find_spec("numpy") is None:
+            logger.warning("⚠️ numpy no está instalado; preprocesamiento de audio desactivado")
+            return False
+        return True
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: el bot tiene hilos activos y fork los copiaría a medias
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def warm_up(self) -> None:
+        """Lanza los procesos del pool antes de la primera nota de voz"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ping) for _ in range(self.workers)))
+        logger.info("🔥 Pool de preprocesamiento de audio precalentado")
+
+    async def process(self, data: bytes) -> tuple:
+        """
+        Preprocesa el audio en el pool de procesos.
+
+        Args:
+            data (bytes): Audio original
+
+        Returns:
+            tuple: (audio a transcribir, que puede ser `data` si no conviene
+            cambiarlo; estadísticas, o None si el preprocesamiento falló)
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            audio, stats = await asyncio.wait_for(
+                loop.run_in_executor(self.pool, functools.partial(preprocess_audio, data, self.sample_rate)),
+                AUDIO_PREPROCESS_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Preprocesamiento de audio falló, se usa el original: {e!r}")
+            return data, None
+        return (data if audio is None else audio), stats
+
+    async def split(self, data: bytes) -> list:
+        """
+        Divide una nota larga en segmentos cortados en silencios.
+
+        Returns:
+            list: Segmentos en orden ([data] si no se pudo o no hace falta dividirla)
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.pool, functools.partial(split_audio, data, sample_rate=self.sample_rate)),
+                AUDIO_PREPROCESS_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"No se pudo dividir el audio, se transcribe completo: {e!r}")
+            return [data]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Agrupa las peticiones que llegan dentro de una ventana corta.
+
+    El lote se envía al llenarse (max_batch) o al cerrar la ventana
+    (max_wait segundos desde la primera petición). Un lote de un solo
+    elemento usa la función individual, así con poco tráfico no cambia nada.
+    Los elementos que el lote no pudo resolver se reintentan de a uno.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list], Awaitable[list]],
+        process_one: Callable[[Any], Awaitable[Any]],
+        max_batch: int = 8,
+        max_wait: float = 0.1
+    ):
+        self._process_batch = process_batch
+        self._process_one = process_one
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: list = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Referencias a los lotes en curso: el loop solo guarda referencias débiles
+        self._tasks: set = set()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Agrega un elemento al lote actual y espera su resultado.
+
+        Args:
+            item: Elemento a procesar
+
+        Returns:
+            El resultado correspondiente a ese elemento
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list) -> None:
+        items = [item for item, _ in batch]
+
+        if len(batch) == 1:
+            results = [None]
+        else:
+            try:
+                results = await self._process_batch(items)
+                logger.info(f"📦 Lote de {len(batch)} elementos procesado en una petición")
+            except Exception as e:
+                logger.warning(f"Lote de {len(batch)} elementos falló, se procesan de a uno: {e}")
+                results = [None] * len(batch)
+
+        await asyncio.gather(*[
+            self._resolve(item, future, result)
+            for (item, future), result in zip(batch, results)
+        ])
+
+    async def _resolve(self, item: Any, future: asyncio.Future, result: Any) -> None:
+        # El llamador pudo haber sido cancelado (timeout o apagado) mientras esperaba
+        if future.done():
+            return
+        try:
+            if result is None:
+                result = await self._process_one(item)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from networker_bot.services.executor import BlockingExecutor
+
+logger = logging.getLogger(__name__)
+
+def hash_bytes(data: bytes) -> str:
+    """Hash SHA-256 del contenido de un audio"""
+    return hashlib.sha256(data).hexdigest()
+
+def normalize_transcript(transcript: str) -> str:
+    """Normaliza un transcript para que reenvíos equivalentes compartan clave"""
+    return re.sub(r"\s+", " ", transcript).strip().lower()
+
+def transcript_key(transcript: str) -> str:
+    """Clave de caché para un transcript normalizado"""
+    return hashlib.sha256(normalize_transcript(transcript).encode("utf-8")).hexdigest()
+
+class SQLiteCacheBackend:
+    """
+    Respaldo en disco (SQLite) para entradas de caché serializables en JSON.
+
+    El archivo se mantiene acotado a `max_entries` filas: al pasarse se
+    borran las vencidas y, si no alcanza, las más antiguas.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.executor = BlockingExecutor("cache", 1)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires_at)")
+        self._conn.commit()
+        with self._conn:
+            self._rows = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            self._prune()
+
+    def _prune(self) -> None:
+        # Se llama dentro de una transacción; el índice evita recorrer la tabla
+        if self._rows <= self.max_entries:
+            return
+        self._rows -= self._conn.execute(
+            "DELETE FROM cache WHERE expires_at < ?", (time.time(),)
+        ).rowcount
+        excess = self._rows - self.max_entries
+        if excess > 0:
+            self._rows -= self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)",
+                (excess,)
+            ).rowcount
+
+    def _get(self, key: str) -> Optional[Any]:
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < time.time():
+            with self._conn:
+                self._rows -= self._conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+            return None
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Any, expires_at: float) -> None:
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._conn:
+            updated = self._conn.execute(
+                "UPDATE cache SET value = ?, expires_at = ? WHERE key = ?", (serialized, expires_at, key)
+            ).rowcount
+            if not updated:
+                self._conn.execute(
+                    "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?)", (key, serialized, expires_at)
+                )
+                self._rows += 1
+                self._prune()
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await self.executor.run(self._get, key)
+
+    async def set(self, key: str, value: Any, expires_at: float) -> None:
+        await self.executor.run(self._set, key, value, expires_at)
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        self._conn.close()
+
+class TTLCache:
+    """
+    Caché LRU en memoria con expiración por TTL y respaldo opcional en disco.
+
+    Lleva contadores de aciertos y fallos para exponerlos como métricas.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1000, ttl: float = 86400,
+                 backend: Optional[SQLiteCacheBackend] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Busca una entrada vigente en memoria y luego en disco.
+
+        Args:
+            key (str): Clave de la entrada
+
+        Returns:
+            El valor guardado o None si no existe o expiró
+        """
+        return await self.get_any([key])
+
+    async def get_any(self, keys: list) -> Optional[Any]:
+        """
+        Busca el mismo valor bajo varias claves alternativas (p. ej. el
+        file_unique_id y el hash del audio): cuenta un solo acierto o fallo.
+
+        Args:
+            keys (list): Claves en orden de preferencia
+
+        Returns:
+            El primer valor vigente encontrado o None
+        """
+        for key in keys:
+            value = await self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    async def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at >= time.time():
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+
+        if self.backend is not None:
+            value = await self.backend.get(key)
+            if value is not None:
+                self._remember(key, value, time.time() + self.ttl)
+                return value
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        """Guarda una entrada en memoria (y en disco si hay respaldo)"""
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        if self.backend is not None:
+            await self.backend.set(key, value, expires_at)
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Contadores de la caché"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        """Cierra el respaldo en disco, si lo hay"""
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
+def create_cache(name: str, max_entries: int, ttl: float, cache_dir: str,
+                 disk_max_entries: int = 10000) -> TTLCache:
+    """
+    Crea una caché con respaldo en disco si se configuró un directorio.
+
+    Args:
+        name (str): Nombre de la caché (y del archivo en disco)
+        max_entries (int): Entradas máximas en memoria
+        ttl (float): Segundos de vigencia de cada entrada
+        cache_dir (str): Directorio del respaldo en disco, vacío para solo memoria
+        disk_max_entries (int): Filas máximas del respaldo en disco
+
+    Returns:
+        TTLCache: Caché lista para usar
+    """
+    backend = None
+    if cache_dir:
+        backend = SQLiteCacheBackend(os.path.join(cache_dir, f"{name}.db"), disk_max_entries)
+    logger.info(f"✅ Caché '{name}' creada ({max_entries} entradas, TTL {ttl:.0f}s)")
+    return TTLCache(name, max_entries=max_entries, ttl=ttl, backend=backend)
@@ -0,0 +1,229 @@
+import logging
+import os
+import re
+import sqlite3
+from typing import Optional
+
+from networker_bot.config import EVENT_NAME
+from networker_bot.services.executor import BlockingExecutor
+from networker_bot.services.sheet_sync import contact_name
+
+logger = logging.getLogger(__name__)
+
+# Orden de las columnas en Google Sheets (ver save_stage)
+SHEET_COLUMNS = [
+    "nombre", "edad", "ocupacion", "proyecto", "stack", "hobby",
+    "info_adicional", "evento", "fecha", "username", "user_id"
+]
+
+# Columnas indexadas en FTS5 y su peso en el ranking bm25
+SEARCH_COLUMNS = ("stack", "ocupacion", "proyecto", "hobby")
+SEARCH_WEIGHTS = (3.0, 2.0, 1.5, 1.0)
+
+STOPWORDS = {
+    "con", "del", "los", "las", "una", "unos", "unas", "para", "por", "que", "como",
+    "sus", "mas", "más", "muy", "sobre", "entre", "desde", "and", "the", "for", "with"
+}
+
+def query_terms(text: str) -> list:
+    """Palabras de un texto aptas para una consulta FTS5 (sin operadores ni comillas)"""
+    return [word for word in re.findall(r"\w+", text.lower()) if len(word) > 1]
+
+class ContactStore:
+    """
+    Copia local de los perfiles guardados en Google Sheets, indexada para
+    búsquedas rápidas.
+
+    SQLite en modo WAL con una tabla FTS5 (external content) sobre stack,
+    ocupación, proyecto y hobby, e índices por usuario y por evento. La
+    clave es la misma que la del upsert en Sheets (ver sheet_sync.row_key):
+    usuario, evento y nombre normalizado del contacto, así que cada contacto
+    que un usuario presenta en un evento es un perfil aparte.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.executor = BlockingExecutor("contacts", 1)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.create_function("contact_name", 1, lambda name: contact_name(name or ""), deterministic=True)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(contacts)")]
+        migrate = bool(columns) and "contacto" not in columns
+        if migrate:
+            # Tabla anterior, con un solo perfil por usuario y evento
+            self._conn.executescript("""
+                DROP TRIGGER IF EXISTS contacts_ai;
+                DROP TRIGGER IF EXISTS contacts_ad;
+                DROP TRIGGER IF EXISTS contacts_au;
+                DROP TABLE IF EXISTS contacts_fts;
+                DROP INDEX IF EXISTS idx_contacts_evento;
+                ALTER TABLE contacts RENAME TO contacts_old;
+            """)
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS contacts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                evento TEXT NOT NULL,
+                username TEXT,
+                nombre TEXT,
+                edad TEXT,
+                ocupacion TEXT,
+                proyecto TEXT,
+                stack TEXT,
+                hobby TEXT,
+                info_adicional TEXT,
+                fecha TEXT,
+                contacto TEXT NOT NULL DEFAULT '',
+                UNIQUE (user_id, evento, contacto)
+            );
+            CREATE INDEX IF NOT EXISTS idx_contacts_evento ON contacts (evento);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+                {", ".join(SEARCH_COLUMNS)},
+                content='contacts', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS contacts_ai AFTER INSERT ON contacts BEGIN
+                INSERT INTO contacts_fts (rowid, {", ".join(SEARCH_COLUMNS)})
+                VALUES (new.id, {", ".join(f"new.{c}" for c in SEARCH_COLUMNS)});
+            END;
+            CREATE TRIGGER IF NOT EXISTS contacts_ad AFTER DELETE ON contacts BEGIN
+                INSERT INTO contacts_fts (contacts_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+                VALUES ('delete', old.id, {", ".join(f"old.{c}" for c in SEARCH_COLUMNS)});
+            END;
+            CREATE TRIGGER IF NOT EXISTS contacts_au AFTER UPDATE ON contacts BEGIN
+                INSERT INTO contacts_fts (contacts_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+                VALUES ('delete', old.id, {", ".join(f"old.{c}" for c in SEARCH_COLUMNS)});
+                INSERT INTO contacts_fts (rowid, {", ".join(SEARCH_COLUMNS)})
+                VALUES (new.id, {", ".join(f"new.{c}" for c in SEARCH_COLUMNS)});
+            END;
+        """)
+        if migrate:
+            columns = ", ".join(SHEET_COLUMNS)
+            self._conn.executescript(f"""
+                INSERT OR REPLACE INTO contacts ({columns}, contacto)
+                    SELECT {columns}, contact_name(nombre) FROM contacts_old ORDER BY id;
+                DROP TABLE contacts_old;
+            """)
+            logger.info("🔄 Directorio de contactos migrado a un perfil por contacto")
+        self._conn.commit()
+        logger.info(f"✅ Directorio de contactos abierto en {path}")
+
+    def _upsert(self, rows: list, event: Optional[str]) -> int:
+        records = []
+        for row in rows:
+            record = dict(zip(SHEET_COLUMNS, [str(value) for value in row]))
+            if not record.get("user_id", "").isdigit():
+                continue  # Encabezados o filas sin usuario de Telegram
+            record["evento"] = event or record.get("evento") or EVENT_NAME
+            record["contacto"] = contact_name(record.get("nombre", ""))
+            records.append(record)
+
+        keys = [*SHEET_COLUMNS, "contacto"]
+        columns = ", ".join(keys)
+        placeholders = ", ".join(f":{c}" for c in keys)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in SHEET_COLUMNS if c not in ("user_id", "evento"))
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO contacts ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT (user_id, evento, contacto) DO UPDATE SET {updates}",
+                [{c: record.get(c, "") for c in keys} for record in records]
+            )
+        return len(records)
+
+    def _search(self, query: str, event: Optional[str], limit: int, exclude_user: str = "") -> list:
+        weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+        sql = (
+            "SELECT c.nombre, c.ocupacion, c.proyecto, c.stack, c.hobby, c.username, c.user_id, c.evento "
+            "FROM contacts_fts JOIN contacts c ON c.id = contacts_fts.rowid "
+            "WHERE contacts_fts MATCH ? AND c.user_id != ?"
+        )
+        params = [query, exclude_user]
+        if event:
+            sql += " AND c.evento = ?"
+            params.append(event)
+        sql += f" ORDER BY bm25(contacts_fts, {weights}) LIMIT ?"
+        params.append(limit)
+
+        cursor = self._conn.execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def _profile(self, user_id: str, event: Optional[str]) -> Optional[dict]:
+        sql = "SELECT * FROM contacts WHERE user_id = ?"
+        params = [user_id]
+        if event:
+            sql += " AND evento = ?"
+            params.append(event)
+        cursor = self._conn.execute(sql + " ORDER BY id DESC LIMIT 1", params)
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([d[0] for d in cursor.description], row))
+
+    def _count(self, event: Optional[str]) -> int:
+        if event is None:
+            return self._conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+        return self._conn.execute("SELECT COUNT(*) FROM contacts WHERE evento = ?", (event,)).fetchone()[0]
+
+    async def add_rows(self, rows: list, event: Optional[str] = None) -> int:
+        """
+        Agrega o actualiza perfiles a partir de filas con el formato de Sheets.
+
+        Args:
+            rows (list): Filas en el orden de SHEET_COLUMNS
+            event (str): Evento de todas las filas (None = el de la columna evento)
+
+        Returns:
+            int: Filas guardadas (se ignoran las que no tienen user_id)
+        """
+        return await self.executor.run(self._upsert, rows, event)
+
+    async def search(self, text: str, event: Optional[str] = EVENT_NAME, limit: int = 10) -> list:
+        """
+        Busca perfiles que contengan todas las palabras (o prefijos) de `text`.
+
+        Args:
+            text (str): Términos de búsqueda, p. ej. "react node"
+            event (str): Evento al que se limita la búsqueda (None = todos)
+            limit (int): Máximo de resultados
+
+        Returns:
+            list: Perfiles ordenados por relevancia
+        """
+        terms = query_terms(text)
+        if not terms:
+            return []
+        query = " ".join(f'"{term}"*' for term in terms)
+        return await self.executor.run(self._search, query, event, limit)
+
+    async def match(self, user_id: str, event: Optional[str] = EVENT_NAME, limit: int = 5) -> Optional[list]:
+        """
+        Perfiles más afines al del usuario (stack, ocupación, proyecto y hobby en común).
+
+        Returns:
+            list: Perfiles ordenados por afinidad, o None si el usuario no tiene perfil
+        """
+        profile = await self.executor.run(self._profile, str(user_id), event)
+        if profile is None:
+            return None
+
+        text = " ".join(profile.get(column) or "" for column in SEARCH_COLUMNS)
+        terms = list(dict.fromkeys(t for t in query_terms(text) if len(t) > 2 and t not in STOPWORDS))
+        if not terms:
+            return []
+        query = " OR ".join(f'"{term}"' for term in terms[:30])
+        return await self.executor.run(self._search, query, event, limit, str(user_id))
+
+    async def count(self, event: Optional[str] = None) -> int:
+        """Cantidad de perfiles guardados (de un evento, o de todos)"""
+        return await self.executor.run(self._count, event)
+
+    def close(self) -> None:
+        """Cierra la conexión y el pool del directorio"""
+        self.executor.shutdown()
+        self._conn.close()
@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from networker_bot.config import (
+    AUDIO_PREPROCESS,
+    TRANSCRIBE_CHUNK_THRESHOLD,
+    CONTACTS_PATH,
+    CONTACTS_BACKFILL,
+    CONTACTS_REFRESH_INTERVAL,
+    EVENTS_PATH,
+    JOB_QUEUE_URL,
+    JOB_MAX_ATTEMPTS,
+    JOB_STORE_PATH,
+    JOURNAL_PATH,
+    JOURNAL_SYNC_BATCH,
+    JOURNAL_SYNC_INTERVAL,
+    SHEETS_CONNECT_RETRY_DELAY,
+    TRANSCRIBE_BACKEND,
+    TRANSCRIBE_LOCAL_FALLBACK
+)
+from networker_bot.services.http_pool import http_pool
+from networker_bot.services.contacts import ContactStore
+from networker_bot.services.events import Event, EventRegistry
+from networker_bot.services.job_queue import JobQueue, create_job_queue
+from networker_bot.services.job_store import JobStore
+from networker_bot.services.journal import JournalReplicator, RegistrationJournal
+from networker_bot.services.transcription import TranscriptionRouter
+
+logger = logging.getLogger(__name__)
+
+def _create_deepgram():
+    from networker_bot.services.deepgram import DeepgramService
+    return DeepgramService()
+
+def _create_gemini():
+    from networker_bot.services.gemini import GeminiService
+    return GeminiService()
+
+def _create_audio():
+    from networker_bot.services.audio import AudioPreprocessor
+    return AudioPreprocessor() if AudioPreprocessor.available() else None
+
+def _create_local_asr():
+    from networker_bot.services.local_asr import LocalWhisperService
+    return LocalWhisperService() if LocalWhisperService.available() else None
+
+def _create_sheets(event: Event):
+    from networker_bot.services.sheets import SheetsService
+    return SheetsService(event=event)
+
+class ServiceContainer:
+    """
+    Crea y guarda los servicios del bot.
+
+    Los SDKs pesados se importan recién en start(), dentro de hilos y en
+    paralelo, durante el post_init de la aplicación. La hoja de cada evento
+    se conecta en segundo plano: si falla al arrancar, el bot sigue
+    funcionando y los registros quedan en el journal hasta que la conexión
+    se establezca.
+    """
+
+    def __init__(self, sheets_factory=_create_sheets, journal_path: str = JOURNAL_PATH):
+        self.sheets_factory = sheets_factory
+        self.journal_path = journal_path
+        self.deepgram = None
+        self.gemini = None
+        self.shards: dict = {}  # Evento → SheetsService de su hoja
+        self.journal: Optional[RegistrationJournal] = None
+        self.replicators: dict = {}  # Evento → JournalReplicator
+        self.events: Optional[EventRegistry] = None
+        self.job_queue: Optional[JobQueue] = None
+        self.job_store: Optional[JobStore] = None
+        self.contacts: Optional[ContactStore] = None
+        self.audio = None
+        self.local_asr = None
+        self.transcriber: Optional[TranscriptionRouter] = None
+        self._background: list = []
+        self.timings: dict = {}
+
+    @property
+    def sheets(self):
+        """Hoja del evento default (None mientras no se conecta)"""
+        return self.shards.get("default")
+
+    async def start(self) -> None:
+        """Inicializa journal, contactos, eventos, Deepgram y Gemini en paralelo y lanza la conexión a Sheets"""
+        started = time.perf_counter()
+        self.journal, self.deepgram, self.gemini, _, _ = await asyncio.gather(
+            asyncio.to_thread(RegistrationJournal, self.journal_path),
+            asyncio.to_thread(_create_deepgram),
+            asyncio.to_thread(_create_gemini),
+            self.open_contacts(),
+            self.open_events()
+        )
+        if AUDIO_PREPROCESS or TRANSCRIBE_CHUNK_THRESHOLD > 0:
+            self.audio = await asyncio.to_thread(_create_audio)
+        if TRANSCRIBE_BACKEND != "deepgram" or TRANSCRIBE_LOCAL_FALLBACK:
+            self.local_asr = await asyncio.to_thread(_create_local_asr)
+        self.transcriber = TranscriptionRouter(self.deepgram, self.local_asr)
+        self.timings["services_ready"] = time.perf_counter() - started
+        logger.info(f"✅ Servicios listos en {self.timings['services_ready']:.2f}s")
+
+        for event in self.events.events.values():
+            self._background.append(asyncio.create_task(self._connect_sheets(event, started)))
+        self._background.append(asyncio.create_task(self._warm_up()))
+
+    async def open_job_queue(self, url: str = JOB_QUEUE_URL) -> JobQueue:
+        """Abre la cola de trabajos compartida con los procesos worker"""
+        if self.job_queue is None:
+            self.job_queue = await asyncio.to_thread(create_job_queue, url, JOB_MAX_ATTEMPTS)
+        return self.job_queue
+
+    async def open_job_store(self, path: str = JOB_STORE_PATH) -> Optional[JobStore]:
+        """Abre el registro de notas en proceso del pipeline local (None si está desactivado)"""
+        if self.job_store is None and path:
+            self.job_store = await asyncio.to_thread(JobStore, path)
+        return self.job_store
+
+    async def open_contacts(self) -> ContactStore:
+        """Abre el directorio local de contactos (también en modo ingress, para /buscar)"""
+        if self.contacts is None:
+            self.contacts = await asyncio.to_thread(ContactStore, CONTACTS_PATH)
+        return self.contacts
+
+    async def open_events(self) -> EventRegistry:
+        """Abre el registro de eventos (también en modo ingress, para /evento)"""
+        if self.events is None:
+            self.events = await asyncio.to_thread(EventRegistry, EVENTS_PATH)
+        return self.events
+
+    async def mirror_contacts(self) -> None:
+        """
+        Modo ingress: mantiene el directorio local al día con las hojas.
+
+        Los perfiles los guardan los workers, cada uno en su propio disco;
+        el bot (que responde /buscar y /match) importa la hoja de cada evento
+        al arrancar y luego cada CONTACTS_REFRESH_INTERVAL segundos.
+        """
+        if CONTACTS_REFRESH_INTERVAL <= 0:
+            return
+        for event in self.events.events.values():
+            self._background.append(asyncio.create_task(self._mirror_contacts(event)))
+
+    async def _mirror_contacts(self, event: Event) -> None:
+        await self._open_sheets(event)
+        while True:
+            await self._import_contacts(event)
+            await asyncio.sleep(CONTACTS_REFRESH_INTERVAL)
+
+    async def _import_contacts(self, event: Event) -> None:
+        """Copia al directorio local los perfiles que hay en la hoja del evento"""
+        get_all_values = getattr(self.shards[event.slug].sheet, 'get_all_values', None)
+        if get_all_values is None:
+            return
+        try:
+            rows = await asyncio.to_thread(get_all_values)
+            added = await self.contacts.add_rows(rows, event.name)
+            logger.info(f"📇 {added} perfiles de {event.name} importados desde Google Sheets al directorio local")
+        except Exception as e:
+            logger.warning(f"No se pudo importar la hoja de {event.name} al directorio de contactos: {e}")
+
+    async def _backfill_contacts(self, event: Event) -> None:
+        """Si el directorio local no tiene perfiles del evento, lo llena con lo que ya hay en su hoja"""
+        if await self.contacts.count(event.name) == 0:
+            await self._import_contacts(event)
+
+    async def _open_sheets(self, event: Event):
+        """Conecta la hoja de un evento, reintentando hasta lograrlo"""
+        sheets = None
+        while sheets is None:
+            try:
+                sheets = await asyncio.to_thread(self.sheets_factory, event)
+            except Exception as e:
+                logger.error(
+                    f"No se pudo conectar a Google Sheets para {event.name} ({e}); "
+                    f"reintento en {SHEETS_CONNECT_RETRY_DELAY:.0f}s"
+                )
+                await asyncio.sleep(SHEETS_CONNECT_RETRY_DELAY)
+        self.shards[event.slug] = sheets
+        return sheets
+
+    async def _connect_sheets(self, event: Event, started: float) -> None:
+        """Conecta la hoja de un evento y arranca su replicador, independiente de los demás"""
+        sheets = await self._open_sheets(event)
+
+        elapsed = time.perf_counter() - started
+        if event.slug == "default":
+            self.timings["sheets_ready"] = elapsed
+        logger.info(f"✅ Google Sheets conectado para {event.name} en {elapsed:.2f}s")
+
+        replicator = JournalReplicator(
+            self.journal,
+            sheets,
+            batch_size=JOURNAL_SYNC_BATCH,
+            interval=JOURNAL_SYNC_INTERVAL,
+            shard=event.slug
+        )
+        self.replicators[event.slug] = replicator
+        await replicator.start()
+
+        if CONTACTS_BACKFILL:
+            await self._backfill_contacts(event)
+
+    async def _warm_up(self) -> None:
+        """Abre conexiones con los proveedores antes de la primera nota de voz"""
+        for service in (self.deepgram, self.gemini, self.audio, self.local_asr):
+            warm_up = getattr(service, 'warm_up', None)
+            if warm_up is None:
+                continue
+            try:
+                await warm_up()
+            except Exception as e:
+                logger.warning(f"Warm-up de {type(service).__name__} falló: {e}")
+
+    def stats(self) -> dict:
+        """Estadísticas de los pools HTTP y de la resiliencia de cada proveedor"""
+        providers = {
+            name: service.resilience.snapshot()
+            for name, service in (("deepgram", self.deepgram), ("gemini", self.gemini))
+            if service is not None
+        }
+        for sheets in list(self.shards.values()):
+            providers[sheets.name] = sheets.resilience.snapshot()
+        return {"http": http_pool.stats(), "providers": providers}
+
+    def collect(self) -> list:
+        """Contadores de proveedores, cachés y pools HTTP como métricas Prometheus"""
+        samples = []
+        stats = self.stats()
+        for provider, snapshot in stats["providers"].items():
+            labels = {"provider": provider}
+            for counter in ("calls", "retries", "failures", "timeouts", "rejected", "hedged"):
+                samples.append((f"networker_provider_{counter}_total", "counter", labels, snapshot[counter]))
+            samples.append(("networker_circuit_open", "gauge", labels, int(snapshot["circuit"] != "closed")))
+
+        for service in (self.deepgram, self.gemini, self.local_asr):
+            cache = getattr(service, 'cache', None)
+            if cache is None:
+                continue
+            labels = {"cache": cache.name}
+            cache_stats = cache.stats()
+            samples.append(("networker_cache_hits_total", "counter", labels, cache_stats["hits"]))
+            samples.append(("networker_cache_misses_total", "counter", labels, cache_stats["misses"]))
+            samples.append(("networker_cache_entries", "gauge", labels, cache_stats["entries"]))
+
+        for slug, sheets in list(self.shards.items()):
+            sync = getattr(sheets, 'sync', None)
+            if sync is None:
+                continue
+            for result in ("appended", "updated", "unchanged"):
+                labels = {"result": result, "event": slug}
+                samples.append(("networker_sheet_rows_total", "counter", labels, sync.stats[result]))
+            samples.append(("networker_sheet_rows_read_total", "counter", {"event": slug}, sync.stats["rows_read"]))
+
+        for pool, pool_stats in stats["http"].items():
+            labels = {"pool": pool}
+            samples.append(("networker_http_requests_total", "counter", labels, pool_stats["requests"]))
+            samples.append(("networker_http_connections_opened_total", "counter", labels, pool_stats["connections_opened"]))
+            samples.append(("networker_http_idle_connections", "gauge", labels, pool_stats["idle"]))
+        return samples
+
+    def notify_replicator(self, shard: str = "default") -> None:
+        """Avisa al replicador del evento que hay filas nuevas en el journal"""
+        replicator = self.replicators.get(shard)
+        if replicator is not None:
+            replicator.notify()
+
+    async def close(self) -> None:
+        """Detiene las tareas de fondo, vacía el journal y libera los servicios"""
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._background = []
+
+        # Cada evento vacía su parte del journal hacia su hoja, en paralelo
+        await asyncio.gather(*(replicator.stop() for replicator in self.replicators.values()))
+        await asyncio.gather(*(sheets.close() for sheets in self.shards.values()))
+        self.replicators = {}
+        self.shards = {}
+        if self.journal is not None:
+            self.journal.close()
+        if self.job_queue is not None:
+            await self.job_queue.close()
+        if self.job_store is not None:
+            self.job_store.close()
+        if self.contacts is not None:
+            self.contacts.close()
+        if self.events is not None:
+            self.events.close()
+        if self.audio is not None:
+            self.audio.close()
+        if self.local_asr is not None:
+            self.local_asr.close()
+        for service in (self.deepgram, self.gemini):
+            if service is not None:
+                service.cache.close()
+
+        logger.info(f"📈 Pools HTTP al cerrar: {http_pool.stats()}")
+        await http_pool.close()
+
+services = ServiceContainer()
@@ -1,108 +1,224 @@
-import os
+import re
+import time
+import asyncio
 import logging
-from dotenv import load_dotenv
-from deepgram import DeepgramClient, PrerecordedOptions
+from typing import AsyncIterator, Awaitable, Callable, Optional
+import httpx
+from deepgram import DeepgramClient, DeepgramClientOptions, PrerecordedOptions
 
-load_dotenv()
+from networker_bot.config import (
+    DEEPGRAM_API_KEY,
+    DEEPGRAM_MAX_CONCURRENCY,
+    DEEPGRAM_API_URL,
+    DEEPGRAM_TIMEOUT,
+    DEEPGRAM_HEDGE_DELAY,
+    TRANSCRIBE_CHUNK_PARALLELISM,
+    PROVIDER_MAX_RETRIES,
+    PROVIDER_RETRY_BASE_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL,
+    CACHE_DIR,
+    CACHE_DISK_MAX_ENTRIES
+)
+from networker_bot.metrics import metrics
+from networker_bot.services.cache import create_cache, hash_bytes
+from networker_bot.services.http_pool import http_pool
+from networker_bot.services.resilience import CircuitBreaker, ResilientClient
+from networker_bot.services.transcription import TranscriptionBackend
 
-DEEPGRAM_API_KEY = os.getenv('DEEPGRAM_API_KEY')
 logger = logging.getLogger(__name__)
 
-class DeepgramService:
+# Parámetros de transcripción de todas las llamadas (prerecorded, segmentos y streaming)
+TRANSCRIPTION_PARAMS = {
+    "model": "nova-2",
+    "language": "es",
+    "smart_format": "true",
+    "punctuate": "true",
+    "diarize": "false",
+}
+
+MAX_OVERLAP_WORDS = 12  # Palabras que puede ocupar el solapamiento entre segmentos
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+def stitch_transcripts(parts: list) -> str:
+    """
+    Une las transcripciones de segmentos consecutivos quitando lo repetido.
+
+    Cada segmento empieza un poco antes del corte, así que sus primeras
+    palabras suelen repetir las últimas del anterior. Se busca el solape más
+    largo (ignorando mayúsculas y puntuación), permitiendo descartar hasta
+    dos palabras iniciales que pueden haber quedado cortadas.
+    """
+    words: list = []
+    for part in parts:
+        following = part.split()
+        if not following:
+            continue
+        tail = [_normalize(w) for w in words[-MAX_OVERLAP_WORDS:]]
+        head = [_normalize(w) for w in following[:MAX_OVERLAP_WORDS + 2]]
+        skip = 0
+        for offset in range(3):
+            for size in range(min(len(tail), len(head) - offset), 0, -1):
+                # Una sola palabra repetida solo cuenta si no es una palabra corta común
+                if size < 2 and (offset > 0 or len(tail[-1]) <= 3):
+                    break
+                if tail[-size:] == head[offset:offset + size]:
+                    skip = offset + size
+                    break
+            if skip:
+                break
+        words.extend(following[skip:])
+    return " ".join(words)
+
+class DeepgramService(TranscriptionBackend):
+    name = "deepgram"
+
     def __init__(self):
-        self.client = DeepgramClient(DEEPGRAM_API_KEY)
+        client_options = DeepgramClientOptions(url=DEEPGRAM_API_URL)
+        self.api_url = client_options.url
+        self.client = DeepgramClient(DEEPGRAM_API_KEY, client_options)
+        # Pool keep-alive compartido: el SDK crea un cliente httpx por llamada,
+        # pero con este transporte reutiliza las conexiones TLS ya abiertas
+        self.transport = http_pool.transport("deepgram")
+        self.http = httpx.AsyncClient(
+            transport=self.transport,
+            timeout=httpx.Timeout(DEEPGRAM_TIMEOUT, connect=10.0)
+        )
+        self._semaphore = asyncio.Semaphore(DEEPGRAM_MAX_CONCURRENCY)
+        self.cache = create_cache("transcripts", CACHE_MAX_ENTRIES, CACHE_TTL, CACHE_DIR, CACHE_DISK_MAX_ENTRIES)
+        self.resilience = ResilientClient(
+            "deepgram",
+            DEEPGRAM_TIMEOUT,
+            max_retries=PROVIDER_MAX_RETRIES,
+            base_delay=PROVIDER_RETRY_BASE_DELAY,
+            breaker=CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+        )
         logger.info("✅ DeepgramService inicializado correctamente")
     
-    async def transcribe_audio(self, file_path: str) -> str:
+    async def warm_up(self) -> None:
+        """Opens the pooled connection to Deepgram before the first voice note"""
+        await self.http.head(self.api_url)
+        logger.info("🔥 Conexión con Deepgram precalentada")
+    
+    async def _cached(self, keys: list) -> Optional[str]:
+        if not keys:
+            return None
+        transcript = await self.cache.get_any(keys)
+        if transcript:
+            logger.debug("⚡ Transcripción obtenida de la caché")
+            return transcript
+        return None
+    
+    async def _remember(self, keys: list, transcript: str) -> None:
+        if transcript:
+            for key in keys:
+                await self.cache.set(key, transcript)
+    
+    async def transcribe_audio(self, audio_data: bytes, cache_key: Optional[str] = None) -> str:
         """
-        Transcribe audio file to text using Deepgram API.
+        Transcribe audio to text using Deepgram API.
         
         Args:
-            file_path: Path to the audio file
+            audio_data: Audio content already loaded in memory
+            cache_key: Telegram file_unique_id, used together with the
+                audio hash to reuse previous transcripts
             
         Returns:
             Transcribed text
         """
-        try:
-            logger.info(f"🎵 Iniciando transcripción de: {file_path}")
-            
-            # Verificar que el archivo existe
-            if not os.path.exists(file_path):
-                logger.error(f"❌ Archivo no encontrado: {file_path}")
-                raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
-            
-            # Verificar tamaño del archivo
-            file_size = os.path.getsize(file_path)
-            logger.info(f"📊 Tamaño del archivo: {file_size} bytes")
-            
-            # Configurar opciones de transcripción
-            logger.info("⚙️ Configurando opciones de transcripción...")
-            options = PrerecordedOptions(
-                model="nova-2",
-                language="es",
-                smart_format=True,
-                punctuate=True,
-                diarize=False
+        keys = [f"sha:{hash_bytes(audio_data)}"]
+        if cache_key:
+            keys.insert(0, f"file:{cache_key}")
+        
+        cached = await self._cached(keys)
+        if cached:
+            return cached
+        
+        transcript = await self._transcribe(audio_data)
+        await self._remember(keys, transcript)
+        return transcript
+    
+    async def transcribe_segments(self, audio_data: bytes,
+                                  split: Callable[[bytes], Awaitable[list]],
+                                  cache_key: Optional[str] = None) -> str:
+        """
+        Transcribe a long note as segments sent concurrently to Deepgram.
+
+        Args:
+            audio_data: Full audio
+            split: Coroutine that splits the audio at silences
+            cache_key: Telegram file_unique_id
+
+        Returns:
+            Transcribed text, segments stitched in order
+        """
+        keys = [f"sha:{hash_bytes(audio_data)}"]
+        if cache_key:
+            keys.insert(0, f"file:{cache_key}")
+
+        cached = await self._cached(keys)
+        if cached:
+            return cached
+
+        segments = await split(audio_data)
+        if len(segments) == 1:
+            transcript = await self._transcribe(segments[0])
+        else:
+            limit = asyncio.Semaphore(TRANSCRIBE_CHUNK_PARALLELISM)
+
+            async def transcribe_one(segment: bytes) -> str:
+                async with limit:
+                    return await self._transcribe(segment)
+
+            started = time.perf_counter()
+            parts = await asyncio.gather(*(transcribe_one(segment) for segment in segments))
+            transcript = stitch_transcripts(parts)
+            logger.info(
+                f"🧩 Nota larga transcrita en {len(segments)} segmentos "
+                f"en {time.perf_counter() - started:.2f}s"
             )
-            logger.info("✅ Opciones configuradas")
-            
-            # Leer archivo de audio
-            logger.info(f"📖 Leyendo archivo: {file_path}")
-            with open(file_path, 'rb') as audio_file:
-                audio_data = audio_file.read()
+            metrics.inc("networker_transcript_segments_total", len(segments))
+
+        await self._remember(keys, transcript)
+        return transcript
+    
+    async def _transcribe(self, audio_data: bytes) -> str:
+        try:
+            logger.debug(f"🎵 Iniciando transcripción: {len(audio_data)} bytes")
             
-            logger.info(f"✅ Archivo leído: {len(audio_data)} bytes")
+            # Mismos parámetros que el streaming y los segmentos
+            options = PrerecordedOptions(**TRANSCRIPTION_PARAMS)
             
-            # Probar diferentes sintaxis de la API
-            logger.info("🔄 Intentando transcribir con Deepgram...")
+            # Transcribir con el cliente async nativo (no bloquea el event loop)
+            payload = {"buffer": audio_data}
             
-            # Opción 1: Sintaxis más simple
-            try:
-                logger.info("🔄 Probando sintaxis v1...")
-                response = self.client.listen.prerecorded.v("1").transcribe_file(
-                    audio_data,
-                    options
+            def request():
+                return self.client.listen.asyncrest.v("1").transcribe_file(
+                    payload,
+                    options,
+                    timeout=httpx.Timeout(DEEPGRAM_TIMEOUT, connect=10.0),
+                    transport=self.transport
                 )
-                logger.info("✅ Sintaxis v1 exitosa")
-            except Exception as e1:
-                logger.error(f"❌ Sintaxis v1 falló: {e1}")
-                
-                # Opción 2: Sintaxis alternativa  
-                try:
-                    logger.info("🔄 Probando sintaxis v2...")
-                    response = self.client.listen.rest.v("1").transcribe_file(
-                        audio_data,
-                        options
-                    )
-                    logger.info("✅ Sintaxis v2 exitosa")
-                except Exception as e2:
-                    logger.error(f"❌ Sintaxis v2 falló: {e2}")
-                    
-                    # Opción 3: Usando payload dict
-                    try:
-                        logger.info("🔄 Probando sintaxis v3 con payload...")
-                        payload = {"buffer": audio_data}
-                        response = self.client.listen.prerecorded.v("1").transcribe_file(
-                            payload,
-                            options
-                        )
-                        logger.info("✅ Sintaxis v3 exitosa")
-                    except Exception as e3:
-                        logger.error(f"❌ Sintaxis v3 falló: {e3}")
-                        raise Exception(f"Todos los métodos fallaron: v1={e1}, v2={e2}, v3={e3}")
             
-            # Extraer texto transcrito
-            logger.info("📝 Procesando respuesta...")
-            logger.info(f"🔍 Tipo de respuesta: {type(response)}")
+            started = time.perf_counter()
+            async with self._semaphore:
+                with metrics.span("deepgram"):
+                    if DEEPGRAM_HEDGE_DELAY > 0:
+                        response = await self.resilience.hedged(request, DEEPGRAM_HEDGE_DELAY)
+                    else:
+                        response = await self.resilience.call(request)
+            logger.debug(f"✅ Transcripción recibida de Deepgram en {time.perf_counter() - started:.2f}s")
             
+            # Extraer texto transcrito
             if hasattr(response, 'results') and response.results:
-                logger.info("✅ Respuesta contiene resultados")
                 if hasattr(response.results, 'channels') and response.results.channels:
-                    logger.info(f"✅ Encontrados {len(response.results.channels)} canales")
                     if response.results.channels[0].alternatives:
                         transcript = response.results.channels[0].alternatives[0].transcript
-                        logger.info(f"🎉 Transcripción exitosa: {len(transcript)} caracteres")
-                        logger.info(f"📝 Transcripción: {transcript[:100]}...")
+                        logger.debug(f"🎉 Transcripción exitosa: {len(transcript)} caracteres")
                         return transcript
                     else:
                         logger.error("❌ No hay alternativas en el canal")
@@ -110,7 +226,6 @@ class DeepgramService:
                     logger.error("❌ No hay canales en los resultados")
             else:
                 logger.error("❌ No hay resultados en la respuesta")
-                logger.error(f"🔍 Respuesta completa: {response}")
             
             logger.error("❌ No se pudo obtener transcripción del audio")
             return ""
@@ -120,4 +235,65 @@ class DeepgramService:
             logger.error(f"🔍 Tipo de error: {type(e)}")
             import traceback
             logger.error(f"🔍 Traceback: {traceback.format_exc()}")
-            raise Exception(f"Error al transcribir audio: {e}")
+            raise Exception(f"Error al transcribir audio: {e}") from e
+    
+    async def transcribe_stream(self, chunks: AsyncIterator[bytes],
+                                cache_key: Optional[str] = None) -> str:
+        """
+        Transcribe audio while it is still being downloaded.
+
+        The chunks are sent to Deepgram as a chunked upload, so the transfer
+        from Telegram and the upload to Deepgram overlap.
+
+        Args:
+            chunks: Async iterator producing the audio bytes
+            cache_key: Telegram file_unique_id; on a cache hit nothing is
+                downloaded or uploaded
+
+        Returns:
+            Transcribed text
+        """
+        keys = [f"file:{cache_key}"] if cache_key else []
+        cached = await self._cached(keys)
+        if cached:
+            return cached
+        
+        transcript = await self._transcribe_stream(chunks)
+        await self._remember(keys, transcript)
+        return transcript
+    
+    async def _transcribe_stream(self, chunks: AsyncIterator[bytes]) -> str:
+        try:
+            logger.debug("🎵 Iniciando transcripción en streaming...")
+            started = time.perf_counter()
+            async def request():
+                response = await self.http.post(
+                    f"{self.api_url}/v1/listen",
+                    params=TRANSCRIPTION_PARAMS,
+                    headers={
+                        "Authorization": f"Token {DEEPGRAM_API_KEY}",
+                        "Content-Type": "audio/ogg",
+                    },
+                    content=chunks
+                )
+                response.raise_for_status()
+                return response
+            
+            async with self._semaphore:
+                # Un stream ya consumido no se puede reenviar: sin reintentos
+                with metrics.span("deepgram"):
+                    response = await self.resilience.call(request, retry=False)
+
+            logger.debug(f"✅ Transcripción (streaming) recibida en {time.perf_counter() - started:.2f}s")
+            alternatives = response.json()["results"]["channels"][0]["alternatives"]
+            if not alternatives:
+                logger.error("❌ No hay alternativas en el canal")
+                return ""
+
+            transcript = alternatives[0]["transcript"]
+            logger.debug(f"🎉 Transcripción exitosa: {len(transcript)} caracteres")
+            return transcript
+
+        except Exception as e:
+            logger.error(f"💥 Error crítico al transcribir audio en streaming: {e}")
+            raise Exception(f"Error al transcribir audio: {e}") from e
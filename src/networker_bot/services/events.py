@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from networker_bot.config import EVENTS, DEFAULT_EVENT, EVENT_NAME, GOOGLE_SHEETS_ID
+from networker_bot.services.executor import BlockingExecutor
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Event:
+    """Un evento y la hoja (shard) donde se guardan sus registros"""
+    slug: str
+    name: str
+    spreadsheet_id: str
+    worksheet: Optional[str] = None  # None = primera hoja del documento
+
+def load_events(raw: str = EVENTS) -> dict:
+    """
+    Lee la configuración de eventos (EVENTS, en JSON).
+
+    Args:
+        raw (str): {"slug": {"name": ..., "spreadsheet_id": ..., "worksheet": ...}}
+
+    Returns:
+        dict: Eventos por slug; siempre incluye "default" (EVENT_NAME en sheet1)
+    """
+    events = {"default": Event("default", EVENT_NAME, GOOGLE_SHEETS_ID)}
+    if not raw:
+        return events
+
+    try:
+        config = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"EVENTS no es un JSON válido: {e}")
+
+    for slug, options in config.items():
+        if not re.fullmatch(r"[a-z0-9_-]+", slug):
+            raise ValueError(f"Evento inválido en EVENTS: '{slug}' (usa minúsculas, números, - o _)")
+        options = options or {}
+        name = options.get("name") or slug
+        worksheet = options.get("worksheet")
+        if not worksheet and not options.get("spreadsheet_id"):
+            worksheet = name  # Sin documento propio: una hoja con el nombre del evento en GOOGLE_SHEETS_ID
+        events[slug] = Event(slug, name, options.get("spreadsheet_id") or GOOGLE_SHEETS_ID, worksheet)
+
+    shards = [(event.spreadsheet_id, event.worksheet) for event in events.values()]
+    if len(set(shards)) != len(shards):
+        raise ValueError("EVENTS: dos eventos no pueden compartir la misma hoja")
+    return events
+
+def shard_path(path: str, slug: str) -> str:
+    """Archivo propio por evento (el evento default conserva el original)"""
+    if slug == "default":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{slug}{ext}"
+
+class EventRegistry:
+    """
+    Evento activo de cada chat, elegido con /evento.
+
+    La elección se guarda en SQLite (compartido entre el bot y los workers de
+    la misma máquina) y se mantiene en memoria, así que resolver el evento de
+    una nota de voz no toca el disco.
+    """
+
+    def __init__(self, path: str, events: Optional[dict] = None, default: str = DEFAULT_EVENT):
+        self.events = events if events is not None else load_events()
+        if default not in self.events:
+            raise ValueError(f"DEFAULT_EVENT '{default}' no está en EVENTS")
+        self.default = self.events[default]
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.executor = BlockingExecutor("events", 1)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_events (
+                chat_id INTEGER PRIMARY KEY,
+                slug TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self._chats = {
+            chat_id: slug
+            for chat_id, slug in self._conn.execute("SELECT chat_id, slug FROM chat_events")
+            if slug in self.events
+        }
+        logger.info(f"✅ {len(self.events)} eventos configurados ({len(self._chats)} chats con evento elegido)")
+
+    def _select(self, chat_id: int, slug: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_events (chat_id, slug, updated) VALUES (?, ?, ?)",
+                (chat_id, slug, time.time())
+            )
+
+    def get(self, slug: Optional[str]) -> Event:
+        """Evento por slug; los desconocidos (configuración cambiada) van al default"""
+        event = self.events.get(slug or self.default.slug)
+        if event is None:
+            logger.warning(f"⚠️ Evento '{slug}' no configurado; se usa '{self.default.slug}'")
+            return self.default
+        return event
+
+    def for_chat(self, chat_id: int) -> Event:
+        """Evento activo del chat"""
+        return self.get(self._chats.get(chat_id))
+
+    def find(self, text: str) -> Optional[Event]:
+        """Busca un evento por slug o por nombre (sin distinguir mayúsculas)"""
+        text = text.strip().lower()
+        for event in self.events.values():
+            if text in (event.slug, event.name.lower()):
+                return event
+        return None
+
+    async def select(self, chat_id: int, event: Event) -> None:
+        """
+        Cambia el evento activo de un chat.
+
+        Args:
+            chat_id (int): Chat de Telegram
+            event (Event): Evento elegido
+        """
+        await self.executor.run(self._select, chat_id, event.slug)
+        self._chats[chat_id] = event.slug
+
+    def close(self) -> None:
+        """Cierra la conexión y el pool del registro"""
+        self.executor.shutdown()
+        self._conn.close()
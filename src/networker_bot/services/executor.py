@@ -0,0 +1,41 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class BlockingExecutor:
+    """Pool de hilos dedicado para ejecutar llamadas bloqueantes de un servicio"""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"{name}-worker"
+        )
+        logger.info(f"✅ Pool '{name}' inicializado con {max_workers} hilos")
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Ejecuta una función bloqueante en el pool sin detener el event loop.
+
+        Args:
+            func: Función síncrona a ejecutar
+            *args: Argumentos posicionales
+            **kwargs: Argumentos con nombre
+
+        Returns:
+            El valor retornado por la función
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool,
+            functools.partial(func, *args, **kwargs)
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Detiene el pool esperando las tareas pendientes"""
+        self._pool.shutdown(wait=wait)
+        logger.info(f"Pool '{self.name}' detenido")
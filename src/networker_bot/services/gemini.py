@@ -1,33 +1,99 @@
 import google.generativeai as genai
-import os
+from google.generativeai import client as genai_client
 import json
+import asyncio
 import logging
-from networker_bot.config import GEMINI_API_KEY
+from networker_bot.config import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    GEMINI_STRUCTURED_OUTPUT,
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_BATCH_SIZE,
+    GEMINI_BATCH_WINDOW,
+    GEMINI_API_ENDPOINT,
+    GEMINI_TIMEOUT,
+    PROVIDER_MAX_RETRIES,
+    PROVIDER_RETRY_BASE_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL,
+    CACHE_DIR,
+    CACHE_DISK_MAX_ENTRIES
+)
+from networker_bot.metrics import metrics
+from networker_bot.services.batcher import MicroBatcher
+from networker_bot.services.cache import create_cache, transcript_key
+from networker_bot.services.executor import BlockingExecutor
+from networker_bot.services.http_pool import http_pool
+from networker_bot.services.resilience import CircuitBreaker, ResilientClient
 
 logger = logging.getLogger(__name__)
 
-class GeminiService:
-    """Servicio para extraer información estructurada usando Gemini 1.5 Flash"""
-    
-    def __init__(self):
-        genai.configure(api_key=GEMINI_API_KEY)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
-    
-    async def extract_info(self, transcript: str) -> dict:
-        """
-        Extrae información estructurada del transcript de audio.
-        
-        Args:
-            transcript (str): Texto transcrito del audio
-            
-        Returns:
-            dict: Diccionario con información del usuario
-            
-        Raises:
-            Exception: Si hay error en la API o parsing JSON
-        """
-        try:
-            prompt = f"""
+EXTRACTION_FIELDS = [
+    "nombre",
+    "edad",
+    "ocupacion",
+    "proyecto",
+    "stack",
+    "hobby",
+    "info_adicional",
+]
+
+# Esquema de respuesta: Gemini devuelve JSON válido con exactamente estos campos
+EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {field: {"type": "string"} for field in EXTRACTION_FIELDS},
+    "required": EXTRACTION_FIELDS,
+}
+
+# Instrucciones fijas, enviadas una vez como system_instruction del modelo
+SYSTEM_INSTRUCTION = """
+Analiza la presentación personal que recibirás y extrae la información más relevante para cada campo.
+La persona puede presentarse de manera formal, informal, completa o parcial.
+
+INSTRUCCIONES:
+- Analiza el contenido y mapea la información a los campos correspondientes
+- Si no hay información clara para un campo, usa "No especificado"
+- Información relevante que no encaje en campos específicos va en "info_adicional"
+- Sé flexible con diferentes formas de expresar la misma información
+
+CAMPOS A COMPLETAR:
+- nombre: Nombre completo o como se presenta la persona
+- edad: Edad numérica, rango de edad, o "No especificado"
+- ocupacion: Trabajo, profesión, carrera, estudios, o rol principal
+- proyecto: Proyecto actual, trabajo en curso, startup, idea, o actividad principal
+- stack: Tecnologías, herramientas, lenguajes, frameworks, áreas de expertise, habilidades técnicas
+- hobby: Pasatiempos, intereses personales, deportes, aficiones
+- info_adicional: Cualquier información relevante que no encaje en los campos anteriores (ubicación, experiencia, metas, context del hackaton, etc.)
+
+EJEMPLOS DE MAPEO:
+- "Soy de México" → info_adicional: "De México"
+- "Llevo 5 años programando" → info_adicional: "5 años de experiencia programando"
+- "Quiero aprender IA" → info_adicional: "Interesado en aprender IA"
+- "Vine al hackaton para conocer gente" → info_adicional: "Participante del hackaton, busca networking"
+"""
+
+# Lotes: varias presentaciones por petición, respondidas como arreglo
+BATCH_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "indice": {"type": "integer"},
+            **EXTRACTION_SCHEMA["properties"],
+        },
+        "required": ["indice", *EXTRACTION_FIELDS],
+    },
+}
+
+BATCH_INSTRUCTION = SYSTEM_INSTRUCTION + """
+Recibirás varias presentaciones numeradas. Retorna un arreglo con un objeto por
+presentación, con su número en "indice". No mezcles información entre presentaciones.
+"""
+
+# Prompt completo original, usado cuando GEMINI_STRUCTURED_OUTPUT=false
+LEGACY_PROMPT = """
             Analiza esta presentación personal y extrae la información más relevante para cada campo.
             La persona puede presentarse de manera formal, informal, completa o parcial.
             
@@ -68,24 +134,191 @@ class GeminiService:
             
             IMPORTANTE: Solo retorna el JSON, sin explicaciones adicionales.
             """
+
+class GeminiService:
+    """Servicio para extraer información estructurada usando Gemini 1.5 Flash"""
+    
+    def __init__(self, structured_output: bool = GEMINI_STRUCTURED_OUTPUT):
+        self.rest_executor = None
+        if GEMINI_API_ENDPOINT:
+            # Endpoint alternativo (p. ej. servidor local de pruebas) vía REST.
+            # El transporte REST es síncrono, así que usa su propio pool de hilos.
+            genai.configure(
+                api_key=GEMINI_API_KEY,
+                transport="rest",
+                client_options={"api_endpoint": GEMINI_API_ENDPOINT}
+            )
+            self.rest_executor = BlockingExecutor("gemini", GEMINI_MAX_CONCURRENCY)
+            # La sesión requests del cliente REST, con una conexión por hilo
+            rest_client = genai_client.get_default_generative_client()
+            session = getattr(rest_client._transport, '_session', None)
+            if session is not None:
+                http_pool.mount("gemini", session, GEMINI_MAX_CONCURRENCY)
+        else:
+            # gRPC mantiene un único canal HTTP/2 por proceso, multiplexado y reutilizado
+            genai.configure(api_key=GEMINI_API_KEY)
+        self.structured_output = structured_output
+        if structured_output:
+            self.model = genai.GenerativeModel(
+                GEMINI_MODEL,
+                system_instruction=SYSTEM_INSTRUCTION,
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=EXTRACTION_SCHEMA
+                )
+            )
+        else:
+            self.model = genai.GenerativeModel(GEMINI_MODEL)
+        self._semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+        self.cache = create_cache("extractions", CACHE_MAX_ENTRIES, CACHE_TTL, CACHE_DIR, CACHE_DISK_MAX_ENTRIES)
+        self.resilience = ResilientClient(
+            "gemini",
+            GEMINI_TIMEOUT,
+            max_retries=PROVIDER_MAX_RETRIES,
+            base_delay=PROVIDER_RETRY_BASE_DELAY,
+            breaker=CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+        )
+        
+        # Micro-lotes: solo con salida estructurada, que garantiza el arreglo JSON
+        self.batcher = None
+        if structured_output and GEMINI_BATCH_SIZE > 1:
+            self.batch_model = genai.GenerativeModel(
+                GEMINI_MODEL,
+                system_instruction=BATCH_INSTRUCTION,
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=BATCH_SCHEMA
+                )
+            )
+            self.batcher = MicroBatcher(
+                self.extract_batch,
+                self._extract,
+                max_batch=GEMINI_BATCH_SIZE,
+                max_wait=GEMINI_BATCH_WINDOW
+            )
+    
+    async def warm_up(self) -> None:
+        """Abre el canal con Gemini con una petición barata (conteo de tokens)"""
+        if self.rest_executor is None:
+            await self.model.count_tokens_async("hola")
+            logger.info("🔥 Conexión con Gemini precalentada")
+    
+    async def extract_info(self, transcript: str) -> dict:
+        """
+        Extrae información estructurada del transcript de audio.
+        
+        Args:
+            transcript (str): Texto transcrito del audio
+            
+        Returns:
+            dict: Diccionario con información del usuario
+            
+        Raises:
+            Exception: Si hay error en la API o parsing JSON
+        """
+        key = transcript_key(transcript)
+        cached = await self.cache.get(key)
+        if cached:
+            logger.debug("⚡ Información obtenida de la caché")
+            return dict(cached)
+        
+        if self.batcher is not None:
+            user_data = await self.batcher.submit(transcript)
+        else:
+            user_data = await self._extract(transcript)
+        if user_data:
+            await self.cache.set(key, user_data)
+        return user_data
+    
+    async def extract_batch(self, transcripts: list) -> list:
+        """
+        Extrae la información de varios transcripts en una sola petición.
+        
+        Args:
+            transcripts (list): Textos transcritos
+            
+        Returns:
+            list: Un diccionario por transcript, o None en las posiciones
+            que la respuesta no cubrió correctamente
+        """
+        content = "\n\n".join(
+            f'PRESENTACIÓN {index}:\n"{transcript}"'
+            for index, transcript in enumerate(transcripts)
+        )
+        async with self._semaphore:
+            with metrics.span("gemini_batch"):
+                response = await self.resilience.call(
+                    lambda: self._generate_content(self.batch_model, content)
+                )
+        
+        results = [None] * len(transcripts)
+        for entry in json.loads(response.text):
+            index = entry.pop("indice", None)
+            if isinstance(index, int) and 0 <= index < len(transcripts):
+                if all(field in entry for field in EXTRACTION_FIELDS):
+                    results[index] = entry
+        return results
+    
+    async def generate(self, transcript: str):
+        """
+        Envía el transcript a Gemini y retorna la respuesta sin procesar.
+        
+        Args:
+            transcript (str): Texto transcrito del audio
             
-            response = self.model.generate_content(prompt)
+        Returns:
+            Respuesta de Gemini (incluye usage_metadata con los tokens usados)
+        """
+        if self.structured_output:
+            # Las instrucciones viajan como system_instruction del modelo
+            content = f'AUDIO TRANSCRITO:\n"{transcript}"'
+        else:
+            content = LEGACY_PROMPT.format(transcript=transcript)
+        
+        async with self._semaphore:
+            with metrics.span("gemini"):
+                return await self.resilience.call(
+                    lambda: self._generate_content(self.model, content)
+                )
+    
+    async def _generate_content(self, model, content: str):
+        request_options = {"timeout": GEMINI_TIMEOUT}
+        if self.rest_executor is not None:
+            return await self.rest_executor.run(
+                model.generate_content, content, request_options=request_options
+            )
+        return await model.generate_content_async(content, request_options=request_options)
+    
+    def parse(self, text: str) -> dict:
+        """
+        Convierte el texto de la respuesta en un diccionario.
+        
+        Args:
+            text (str): Texto de la respuesta de Gemini
             
-            # Limpiar respuesta y parsear JSON
-            clean_response = response.text.strip()
+        Returns:
+            dict: Información del usuario
+        """
+        clean_response = text.strip()
+        if not self.structured_output:
+            # Sin esquema, el modelo puede envolver el JSON en bloques de código
             if clean_response.startswith('```json'):
                 clean_response = clean_response[7:-3]
             elif clean_response.startswith('```'):
                 clean_response = clean_response[3:-3]
-            
-            user_data = json.loads(clean_response)
-            logger.info(f"Información extraída: {user_data.get('nombre', 'Sin nombre')}")
+        return json.loads(clean_response)
+    
+    async def _extract(self, transcript: str) -> dict:
+        try:
+            response = await self.generate(transcript)
+            user_data = self.parse(response.text)
+            logger.debug(f"Información extraída: {user_data.get('nombre', 'Sin nombre')}")
             
             return user_data
             
         except json.JSONDecodeError as e:
             logger.error(f"Error parsing JSON de Gemini: {e}")
-            raise Exception(f"Error al parsear respuesta de Gemini: {str(e)}")
+            raise Exception(f"Error al parsear respuesta de Gemini: {str(e)}") from e
         except Exception as e:
             logger.error(f"Error en Gemini API: {e}")
-            raise Exception(f"Error al extraer información: {str(e)}")
+            raise Exception(f"Error al extraer información: {str(e)}") from e
@@ -0,0 +1,167 @@
+import logging
+import ssl
+import weakref
+from typing import Optional
+
+import httpx
+
+from networker_bot.config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2_ENABLED
+)
+
+logger = logging.getLogger(__name__)
+
+def http2_available() -> bool:
+    """HTTP/2 en httpx requiere el paquete opcional h2 (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+class SharedTransport(httpx.AsyncHTTPTransport):
+    """
+    Transporte httpx con pool keep-alive que sobrevive a sus clientes.
+
+    El SDK de Deepgram crea y cierra un httpx.AsyncClient por cada petición;
+    al cerrarse, el cliente cierra también su transporte. Aquí aclose() y
+    __aexit__() no hacen nada, así las conexiones TLS quedan abiertas para la siguiente
+    llamada. El pool se cierra de verdad con close().
+    """
+
+    def __init__(self, name: str, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.requests = 0
+        self.connections_opened = 0
+        self._seen = weakref.WeakSet()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        response = await super().handle_async_request(request)
+        for connection in self._pool.connections:
+            if connection not in self._seen:
+                self._seen.add(connection)
+                self.connections_opened += 1
+        return response
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        """Cierra las conexiones del pool"""
+        await super().aclose()
+
+    def stats(self) -> dict:
+        connections = self._pool.connections
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "open": len(connections),
+            "idle": sum(1 for c in connections if c.is_idle()),
+            "http2": sum(1 for c in connections if "HTTP/2" in c.info()),
+        }
+
+class HttpPool:
+    """
+    Capa común de conexiones HTTP hacia los proveedores.
+
+    Cada proveedor tiene su propio pool keep-alive (los límites aplican por
+    proveedor, que en la práctica es un host), y todos comparten un mismo
+    contexto SSL, de modo que los certificados raíz se cargan una sola vez.
+    También ajusta el pool de las sesiones requests (gspread y Gemini REST)
+    al número de hilos que las usan.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = HTTP2_ENABLED
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._transports: dict = {}
+        self._adapters: dict = {}
+
+    @property
+    def ssl_context(self) -> ssl.SSLContext:
+        if self._ssl_context is None:
+            self._ssl_context = httpx.create_ssl_context()
+        return self._ssl_context
+
+    def transport(self, name: str) -> SharedTransport:
+        """
+        Devuelve el transporte compartido de un proveedor, creándolo si hace falta.
+
+        Args:
+            name: Nombre del proveedor (p. ej. "deepgram")
+
+        Returns:
+            SharedTransport: Transporte para pasar a httpx o al SDK
+        """
+        if name not in self._transports:
+            if self.http2 and not http2_available():
+                logger.warning("HTTP/2 no disponible (falta el paquete h2), se usa HTTP/1.1")
+                self.http2 = False
+            self._transports[name] = SharedTransport(
+                name,
+                verify=self.ssl_context,
+                http2=self.http2,
+                limits=self.limits
+            )
+            logger.info(f"✅ Pool HTTP '{name}' creado (http2={self.http2})")
+        return self._transports[name]
+
+    def mount(self, name: str, session, pool_size: int) -> None:
+        """
+        Reemplaza los adaptadores de una sesión requests por uno con pool propio.
+
+        Args:
+            name: Nombre del proveedor
+            session: requests.Session (o AuthorizedSession) a ajustar
+            pool_size: Conexiones keep-alive por host, normalmente los hilos que la usan
+        """
+        from requests.adapters import HTTPAdapter
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self._adapters[name] = adapter
+        logger.info(f"✅ Pool HTTP '{name}' ajustado a {pool_size} conexiones")
+
+    def stats(self) -> dict:
+        """Estadísticas de cada pool: peticiones, conexiones abiertas y reutilización"""
+        stats = {name: transport.stats() for name, transport in self._transports.items()}
+        for name, adapter in self._adapters.items():
+            pools = adapter.poolmanager.pools
+            hosts = [pools[key] for key in list(pools.keys())]
+            stats[name] = {
+                "requests": sum(p.num_requests for p in hosts),
+                "connections_opened": sum(p.num_connections for p in hosts),
+                "idle": sum(1 for p in hosts for c in list(p.pool.queue) if c is not None),
+            }
+        return stats
+
+    async def close(self) -> None:
+        """Cierra todas las conexiones"""
+        for transport in self._transports.values():
+            await transport.close()
+        for adapter in self._adapters.values():
+            adapter.close()
+        self._transports = {}
+        self._adapters = {}
+
+http_pool = HttpPool()
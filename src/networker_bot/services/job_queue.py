@@ -0,0 +1,417 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+from networker_bot.services.executor import BlockingExecutor
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Lease:
+    """Job entregado a un worker; el token identifica esta entrega en particular"""
+    id: str
+    payload: dict
+    attempts: int
+    token: str
+
+class JobQueue(ABC):
+    """
+    Cola de trabajos entre el bot (ingress) y los procesos worker.
+
+    Entrega at-least-once: dequeue() reserva un job por `visibility_timeout`
+    segundos; si el worker no confirma con ack() ni renueva con extend() antes
+    de que venza, el job vuelve a la cola para otro worker. Tras `max_attempts`
+    entregas fallidas el job pasa a la lista de muertos.
+    """
+
+    def __init__(self, max_attempts: int = 3):
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    async def enqueue(self, payload: dict) -> str:
+        """Agrega un job y retorna su ID"""
+
+    @abstractmethod
+    async def dequeue(self, worker: str, visibility_timeout: float) -> Optional[Lease]:
+        """Reserva el próximo job disponible (None si no hay)"""
+
+    @abstractmethod
+    async def ack(self, lease: Lease) -> None:
+        """Confirma que el job terminó y lo elimina de la cola"""
+
+    @abstractmethod
+    async def nack(self, lease: Lease, delay: float = 0.0, error: str = "",
+                   payload: Optional[dict] = None) -> None:
+        """
+        Devuelve el job para reintentarlo después de `delay` segundos.
+
+        Si se pasa `payload`, reemplaza al guardado (p. ej. con la
+        transcripción ya obtenida) y es el que recibe el próximo intento.
+        """
+
+    @abstractmethod
+    async def extend(self, lease: Lease, visibility_timeout: float) -> bool:
+        """Renueva la reserva; False si el job ya se entregó a otro worker"""
+
+    @abstractmethod
+    async def cancel(self, job_id: str) -> bool:
+        """Elimina un job que todavía no tomó ningún worker; False si ya está en proceso"""
+
+    @abstractmethod
+    async def depth(self) -> int:
+        """Jobs en espera (sin contar los reservados)"""
+
+    @abstractmethod
+    async def stats(self) -> dict:
+        """Cantidad de jobs por estado"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Libera las conexiones de la cola"""
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Cola en un archivo SQLite (modo WAL), para workers en la misma máquina.
+
+    Cada operación corre en una transacción IMMEDIATE, así varios procesos
+    pueden reservar jobs del mismo archivo sin entregarse el mismo dos veces.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        super().__init__(max_attempts)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.executor = BlockingExecutor("job-queue", 1)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                token TEXT,
+                worker TEXT,
+                error TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_available ON jobs (status, available_at)"
+        )
+        logger.info(f"✅ Cola de trabajos SQLite abierta en {path}")
+
+    def _transaction(self, func, *args):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(*args)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return result
+
+    def _enqueue(self, payload: dict) -> str:
+        now = time.time()
+        cursor = self._conn.execute(
+            "INSERT INTO jobs (payload, available_at, created_at) VALUES (?, ?, ?)",
+            (json.dumps(payload, ensure_ascii=False), now, now)
+        )
+        return str(cursor.lastrowid)
+
+    def _dequeue(self, worker: str, visibility_timeout: float) -> Optional[Lease]:
+        now = time.time()
+        while True:
+            # En estado 'leased', available_at es el vencimiento de la reserva
+            row = self._conn.execute(
+                "SELECT id, payload, attempts FROM jobs "
+                "WHERE status IN ('queued', 'leased') AND available_at <= ? "
+                "ORDER BY available_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, payload, attempts = row
+            if attempts >= self.max_attempts:
+                # Reserva vencida en su último intento: el worker murió o se colgó
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'dead', error = 'visibility timeout' WHERE id = ?",
+                    (job_id,)
+                )
+                logger.error(f"Job {job_id} descartado tras {attempts} intentos")
+                continue
+
+            token = uuid.uuid4().hex
+            self._conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, available_at = ?, "
+                "token = ?, worker = ? WHERE id = ?",
+                (now + visibility_timeout, token, worker, job_id)
+            )
+            return Lease(str(job_id), json.loads(payload), attempts + 1, token)
+
+    def _ack(self, lease: Lease) -> None:
+        self._conn.execute(
+            "DELETE FROM jobs WHERE id = ? AND token = ?",
+            (int(lease.id), lease.token)
+        )
+
+    def _nack(self, lease: Lease, delay: float, error: str, payload: Optional[dict]) -> None:
+        if lease.attempts >= self.max_attempts:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'dead', error = ? WHERE id = ? AND token = ?",
+                (error, int(lease.id), lease.token)
+            )
+            return
+        self._conn.execute(
+            "UPDATE jobs SET status = 'queued', available_at = ?, token = NULL, error = ?, "
+            "payload = COALESCE(?, payload) WHERE id = ? AND token = ?",
+            (time.time() + delay, error, json.dumps(payload, ensure_ascii=False) if payload else None,
+             int(lease.id), lease.token)
+        )
+
+    def _extend(self, lease: Lease, visibility_timeout: float) -> bool:
+        cursor = self._conn.execute(
+            "UPDATE jobs SET available_at = ? WHERE id = ? AND token = ? AND status = 'leased'",
+            (time.time() + visibility_timeout, int(lease.id), lease.token)
+        )
+        return cursor.rowcount == 1
+
+    def _cancel(self, job_id: str) -> bool:
+        cursor = self._conn.execute(
+            "DELETE FROM jobs WHERE id = ? AND status = 'queued'", (int(job_id),)
+        )
+        return cursor.rowcount == 1
+
+    def _stats(self) -> dict:
+        counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "leased", "dead")}
+
+    async def enqueue(self, payload: dict) -> str:
+        return await self.executor.run(self._transaction, self._enqueue, payload)
+
+    async def dequeue(self, worker: str, visibility_timeout: float) -> Optional[Lease]:
+        return await self.executor.run(self._transaction, self._dequeue, worker, visibility_timeout)
+
+    async def ack(self, lease: Lease) -> None:
+        await self.executor.run(self._transaction, self._ack, lease)
+
+    async def nack(self, lease: Lease, delay: float = 0.0, error: str = "",
+                   payload: Optional[dict] = None) -> None:
+        await self.executor.run(self._transaction, self._nack, lease, delay, error, payload)
+
+    async def extend(self, lease: Lease, visibility_timeout: float) -> bool:
+        return await self.executor.run(self._transaction, self._extend, lease, visibility_timeout)
+
+    async def cancel(self, job_id: str) -> bool:
+        return await self.executor.run(self._transaction, self._cancel, job_id)
+
+    async def depth(self) -> int:
+        stats = await self.stats()
+        return stats["queued"]
+
+    async def stats(self) -> dict:
+        return await self.executor.run(self._stats)
+
+    async def close(self) -> None:
+        self.executor.shutdown()
+        self._conn.close()
+
+# Reserva atómica en Redis: primero devuelve a la cola los reintentos que ya
+# vencieron y las reservas expiradas, después toma el job más antiguo
+_REDIS_DEQUEUE = """
+local ready, delayed, leased, dead = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local prefix, now, lease_until = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3])
+local token, max_attempts = ARGV[4], tonumber(ARGV[5])
+
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', delayed, '-inf', now, 'LIMIT', 0, 100)) do
+    redis.call('ZREM', delayed, id)
+    redis.call('LPUSH', ready, id)
+end
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', leased, '-inf', now, 'LIMIT', 0, 100)) do
+    redis.call('ZREM', leased, id)
+    if tonumber(redis.call('HGET', prefix .. id, 'attempts')) >= max_attempts then
+        redis.call('HSET', prefix .. id, 'error', 'visibility timeout')
+        redis.call('LPUSH', dead, id)
+    else
+        redis.call('RPUSH', ready, id)
+    end
+end
+
+local id = redis.call('RPOP', ready)
+while id and redis.call('HEXISTS', prefix .. id, 'payload') == 0 do
+    id = redis.call('RPOP', ready)
+end
+if not id then
+    return nil
+end
+local attempts = redis.call('HINCRBY', prefix .. id, 'attempts', 1)
+redis.call('HSET', prefix .. id, 'token', token)
+redis.call('ZADD', leased, lease_until, id)
+return {id, redis.call('HGET', prefix .. id, 'payload'), attempts}
+"""
+
+_REDIS_ACK = """
+if redis.call('HGET', ARGV[1] .. ARGV[2], 'token') ~= ARGV[3] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[2])
+redis.call('LREM', KEYS[2], 0, ARGV[2])
+redis.call('DEL', ARGV[1] .. ARGV[2])
+return 1
+"""
+
+_REDIS_NACK = """
+local leased, delayed, dead = KEYS[1], KEYS[2], KEYS[3]
+local key = ARGV[1] .. ARGV[2]
+if redis.call('HGET', key, 'token') ~= ARGV[3] then
+    return 0
+end
+redis.call('ZREM', leased, ARGV[2])
+redis.call('HSET', key, 'error', ARGV[6], 'token', '')
+if ARGV[7] ~= '' then
+    redis.call('HSET', key, 'payload', ARGV[7])
+end
+if tonumber(redis.call('HGET', key, 'attempts')) >= tonumber(ARGV[5]) then
+    redis.call('LPUSH', dead, ARGV[2])
+else
+    redis.call('ZADD', delayed, ARGV[4], ARGV[2])
+end
+return 1
+"""
+
+_REDIS_CANCEL = """
+local removed = redis.call('LREM', KEYS[1], 0, ARGV[2]) + redis.call('ZREM', KEYS[2], ARGV[2])
+if removed > 0 then
+    redis.call('DEL', ARGV[1] .. ARGV[2])
+end
+return removed
+"""
+
+_REDIS_EXTEND = """
+if redis.call('HGET', ARGV[1] .. ARGV[2], 'token') ~= ARGV[3] then
+    return 0
+end
+return redis.call('ZADD', KEYS[1], 'XX', 'CH', ARGV[4], ARGV[2])
+"""
+
+class RedisJobQueue(JobQueue):
+    """
+    Cola en Redis, para workers en otras máquinas (p. ej. dynos worker de Heroku).
+
+    Requiere el paquete opcional redis (`uv sync --extra redis`). Los jobs
+    viven en un hash por ID; la lista `ready` guarda los disponibles y los
+    sorted sets `leased` y `delayed` los reservados y los que esperan un
+    reintento, con el vencimiento como score.
+    """
+
+    def __init__(self, url: str, max_attempts: int = 3, prefix: str = "networker:jobs"):
+        super().__init__(max_attempts)
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("La cola en Redis requiere el paquete redis (uv sync --extra redis)") from e
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.keys = {name: f"{prefix}:{name}" for name in ("ready", "delayed", "leased", "dead", "next_id")}
+        self._dequeue = self._redis.register_script(_REDIS_DEQUEUE)
+        self._ack = self._redis.register_script(_REDIS_ACK)
+        self._nack = self._redis.register_script(_REDIS_NACK)
+        self._extend = self._redis.register_script(_REDIS_EXTEND)
+        self._cancel = self._redis.register_script(_REDIS_CANCEL)
+        logger.info(f"✅ Cola de trabajos Redis en {url.split('@')[-1]}")
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    async def enqueue(self, payload: dict) -> str:
+        job_id = str(await self._redis.incr(self.keys["next_id"]))
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._job_key(job_id), mapping={
+                "payload": json.dumps(payload, ensure_ascii=False),
+                "attempts": 0,
+                "created_at": time.time(),
+            })
+            pipe.lpush(self.keys["ready"], job_id)
+            await pipe.execute()
+        return job_id
+
+    async def dequeue(self, worker: str, visibility_timeout: float) -> Optional[Lease]:
+        now = time.time()
+        token = uuid.uuid4().hex
+        result = await self._dequeue(
+            keys=[self.keys["ready"], self.keys["delayed"], self.keys["leased"], self.keys["dead"]],
+            args=[f"{self.prefix}:job:", now, now + visibility_timeout, token, self.max_attempts]
+        )
+        if not result:
+            return None
+        job_id, payload, attempts = result
+        return Lease(job_id, json.loads(payload), int(attempts), token)
+
+    async def ack(self, lease: Lease) -> None:
+        await self._ack(keys=[self.keys["leased"], self.keys["ready"]], args=[f"{self.prefix}:job:", lease.id, lease.token])
+
+    async def nack(self, lease: Lease, delay: float = 0.0, error: str = "",
+                   payload: Optional[dict] = None) -> None:
+        await self._nack(
+            keys=[self.keys["leased"], self.keys["delayed"], self.keys["dead"]],
+            args=[f"{self.prefix}:job:", lease.id, lease.token, time.time() + delay, self.max_attempts, error,
+                  json.dumps(payload, ensure_ascii=False) if payload else ""]
+        )
+
+    async def extend(self, lease: Lease, visibility_timeout: float) -> bool:
+        renewed = await self._extend(
+            keys=[self.keys["leased"]],
+            args=[f"{self.prefix}:job:", lease.id, lease.token, time.time() + visibility_timeout]
+        )
+        return bool(renewed)
+
+    async def cancel(self, job_id: str) -> bool:
+        removed = await self._cancel(
+            keys=[self.keys["ready"], self.keys["delayed"]],
+            args=[f"{self.prefix}:job:", job_id]
+        )
+        return bool(removed)
+
+    async def depth(self) -> int:
+        ready, delayed = await self._redis.llen(self.keys["ready"]), await self._redis.zcard(self.keys["delayed"])
+        return ready + delayed
+
+    async def stats(self) -> dict:
+        return {
+            "queued": await self.depth(),
+            "leased": await self._redis.zcard(self.keys["leased"]),
+            "dead": await self._redis.llen(self.keys["dead"]),
+        }
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+def create_job_queue(url: str, max_attempts: int = 3) -> JobQueue:
+    """
+    Crea la cola según la URL de JOB_QUEUE_URL.
+
+    Args:
+        url: sqlite:///ruta/al/archivo.db o redis://host:puerto/db
+        max_attempts: Entregas máximas de cada job
+
+    Returns:
+        JobQueue: Backend correspondiente
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteJobQueue(url[len("sqlite:///"):], max_attempts)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobQueue(url, max_attempts)
+    raise ValueError(f"JOB_QUEUE_URL inválida: {url} (usa sqlite:///ruta o redis://host)")
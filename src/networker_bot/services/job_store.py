@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional
+
+from networker_bot.services.executor import BlockingExecutor
+
+logger = logging.getLogger(__name__)
+
+class JobStore:
+    """
+    Ciclo de vida de las notas de voz del pipeline local (SQLite en modo WAL).
+
+    Cada nota se guarda al aceptarla (mensaje, mensaje de progreso y evento)
+    y, al terminar cada etapa, se anota la etapa junto con la transcripción
+    y los datos extraídos. Al salir del pipeline (con éxito o no) se borra:
+    lo que queda tras un reinicio son las notas interrumpidas, que se retoman
+    desde la última etapa completada sin volver a pagar Deepgram ni Gemini.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Un solo hilo serializa todo el acceso a la conexión
+        self.executor = BlockingExecutor("job-store", 1)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL: sobrevive a la caída del proceso, que es el caso a cubrir
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS voice_jobs (
+                job_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                stage TEXT,
+                transcript TEXT,
+                structured TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        logger.info(f"✅ Registro de notas en proceso abierto en {path}")
+
+    def _add(self, job_id: str, payload: dict) -> None:
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO voice_jobs (job_id, payload, created, updated) VALUES (?, ?, ?, ?)",
+                (job_id, json.dumps(payload, ensure_ascii=False), now, now)
+            )
+
+    def _advance(self, job_id: str, stage: str, transcript: str, structured: dict) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE voice_jobs SET stage = ?, transcript = ?, structured = ?, updated = ? WHERE job_id = ?",
+                (stage, transcript or None, json.dumps(structured, ensure_ascii=False) if structured else None,
+                 time.time(), job_id)
+            )
+
+    def _finish(self, job_id: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM voice_jobs WHERE job_id = ?", (job_id,))
+
+    def _unfinished(self) -> list:
+        with self._conn:
+            self._conn.execute("UPDATE voice_jobs SET attempts = attempts + 1")
+        cursor = self._conn.execute(
+            "SELECT job_id, payload, stage, transcript, structured, attempts, created "
+            "FROM voice_jobs ORDER BY created"
+        )
+        return [
+            {
+                "job_id": job_id,
+                "payload": json.loads(payload),
+                "stage": stage,
+                "transcript": transcript or "",
+                "structured": json.loads(structured) if structured else {},
+                "attempts": attempts,
+                "created": created,
+            }
+            for job_id, payload, stage, transcript, structured, attempts, created in cursor.fetchall()
+        ]
+
+    async def add(self, job_id: str, payload: dict) -> None:
+        """
+        Registra una nota aceptada.
+
+        Args:
+            job_id (str): Identificador de la nota (chat y mensaje)
+            payload (dict): Lo necesario para reconstruirla (ver job_payload)
+        """
+        await self.executor.run(self._add, job_id, payload)
+
+    async def advance(self, job_id: str, stage: str, transcript: str = "",
+                      structured: Optional[dict] = None) -> None:
+        """
+        Anota la última etapa completada y sus resultados parciales.
+
+        Args:
+            job_id (str): Identificador de la nota
+            stage (str): Etapa completada
+            transcript (str): Transcripción, si ya se obtuvo
+            structured (dict): Datos extraídos, si ya se obtuvieron
+        """
+        await self.executor.run(self._advance, job_id, stage, transcript, structured or {})
+
+    async def finish(self, job_id: str) -> None:
+        """Quita una nota que ya salió del pipeline"""
+        await self.executor.run(self._finish, job_id)
+
+    async def unfinished(self) -> list:
+        """
+        Notas que quedaron a medias; cuenta un intento más para cada una.
+
+        Returns:
+            list: Registros con job_id, payload, stage, transcript, structured,
+            attempts y created, en orden de llegada
+        """
+        return await self.executor.run(self._unfinished)
+
+    def close(self) -> None:
+        """Cierra la conexión y el pool del registro"""
+        self.executor.shutdown()
+        self._conn.close()
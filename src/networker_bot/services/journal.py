@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from typing import Optional
+
+from networker_bot.services.executor import BlockingExecutor
+
+logger = logging.getLogger(__name__)
+
+class RegistrationJournal:
+    """
+    Journal local append-only (SQLite en modo WAL) de filas registradas.
+
+    Cada fila se confirma en disco antes de responder al usuario; el
+    replicador de su evento (shard) la envía después a Google Sheets y la
+    marca como sincronizada.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Un solo hilo serializa todo el acceso a la conexión
+        self.executor = BlockingExecutor("journal", 1)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS journal (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                row TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                synced_at TEXT,
+                shard TEXT NOT NULL DEFAULT 'default'
+            )
+        """)
+        # Journals anteriores a los eventos múltiples: sus filas son del evento default
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(journal)")]
+        if "shard" not in columns:
+            self._conn.execute("ALTER TABLE journal ADD COLUMN shard TEXT NOT NULL DEFAULT 'default'")
+        self._conn.execute("DROP INDEX IF EXISTS idx_journal_pending")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_journal_pending_shard "
+            "ON journal (shard, id) WHERE synced_at IS NULL"
+        )
+        self._conn.commit()
+        logger.info(f"✅ Journal de registros abierto en {path}")
+
+    def _append(self, row: list, shard: str) -> int:
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO journal (row, created_at, shard) VALUES (?, ?, ?)",
+                (json.dumps(row, ensure_ascii=False), datetime.now().isoformat(), shard)
+            )
+        return cursor.lastrowid
+
+    def _pending(self, limit: int, shard: str) -> list:
+        cursor = self._conn.execute(
+            "SELECT id, row FROM journal WHERE synced_at IS NULL AND shard = ? ORDER BY id LIMIT ?",
+            (shard, limit)
+        )
+        return [(entry_id, json.loads(row)) for entry_id, row in cursor.fetchall()]
+
+    def _mark_synced(self, ids: list) -> None:
+        now = datetime.now().isoformat()
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE journal SET synced_at = ? WHERE id = ?",
+                [(now, entry_id) for entry_id in ids]
+            )
+
+    def _pending_count(self, shard: Optional[str]) -> int:
+        if shard is None:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM journal WHERE synced_at IS NULL"
+            ).fetchone()[0]
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM journal WHERE synced_at IS NULL AND shard = ?", (shard,)
+        ).fetchone()[0]
+
+    async def append(self, row: list, shard: str = "default") -> int:
+        """
+        Guarda una fila de forma durable.
+
+        Args:
+            row (list): Datos de la fila
+            shard (str): Evento cuya hoja recibirá la fila
+
+        Returns:
+            int: ID de la entrada en el journal
+        """
+        return await self.executor.run(self._append, row, shard)
+
+    async def pending(self, limit: int = 100, shard: str = "default") -> list:
+        """
+        Retorna las entradas aún no sincronizadas de un evento, en orden de llegada.
+
+        Args:
+            limit (int): Máximo de entradas
+            shard (str): Evento
+
+        Returns:
+            list: Tuplas (id, fila)
+        """
+        return await self.executor.run(self._pending, limit, shard)
+
+    async def mark_synced(self, ids: list) -> None:
+        """Marca entradas como ya escritas en Google Sheets"""
+        await self.executor.run(self._mark_synced, ids)
+
+    async def pending_count(self, shard: Optional[str] = None) -> int:
+        """Cantidad de entradas pendientes de sincronizar (de un evento, o de todos)"""
+        return await self.executor.run(self._pending_count, shard)
+
+    def close(self) -> None:
+        """Cierra la conexión y el pool del journal"""
+        self.executor.shutdown()
+        self._conn.close()
+
+class JournalReplicator:
+    """
+    Tarea en segundo plano que vacía el journal hacia Google Sheets.
+
+    Hay un replicador por evento: cada uno envía solo las filas de su shard
+    a su propia hoja, en paralelo con los demás.
+    """
+
+    def __init__(self, journal: RegistrationJournal, sheets_service, batch_size: int = 100,
+                 interval: float = 2.0, shard: str = "default"):
+        self.journal = journal
+        self.sheets_service = sheets_service
+        self.batch_size = batch_size
+        self.interval = interval
+        self.shard = shard
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    async def start(self) -> None:
+        """Inicia la replicación (incluye lo pendiente de ejecuciones anteriores)"""
+        if self._task is None:
+            pending = await self.journal.pending_count(self.shard)
+            if pending:
+                logger.info(f"📒 {pending} registros del evento {self.shard} pendientes de sincronizar en el journal")
+            self._task = asyncio.create_task(self._run(), name=f"journal-replicator-{self.shard}")
+
+    def notify(self) -> None:
+        """Despierta al replicador tras agregar una entrada"""
+        self._wakeup.set()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Intenta sincronizar lo pendiente y detiene la replicación.
+
+        Args:
+            timeout (float): Segundos máximos para el vaciado final
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        try:
+            await asyncio.wait_for(self.sync_once(drain=True), timeout)
+        except Exception as e:
+            remaining = await self.journal.pending_count(self.shard)
+            logger.warning(f"Journal del evento {self.shard} no vaciado al detener ({e}); {remaining} pendientes")
+
+    async def sync_once(self, drain: bool = False) -> int:
+        """
+        Envía a Sheets un lote (o todo, si drain) de entradas pendientes.
+
+        Returns:
+            int: Cantidad de filas sincronizadas
+        """
+        synced = 0
+        while True:
+            entries = await self.journal.pending(self.batch_size, self.shard)
+            if not entries:
+                return synced
+
+            await self.sheets_service.add_rows([row for _, row in entries])
+            await self.journal.mark_synced([entry_id for entry_id, _ in entries])
+            synced += len(entries)
+            logger.info(f"📒 {len(entries)} registros del evento {self.shard} sincronizados desde el journal")
+
+            if not drain and len(entries) < self.batch_size:
+                return synced
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync_once()
+            except Exception as e:
+                logger.error(f"Error sincronizando el evento {self.shard} con Sheets: {e}")
+                await asyncio.sleep(self.interval)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
@@ -0,0 +1,170 @@
+import asyncio
+import functools
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+from networker_bot.config import (
+    LOCAL_ASR_MODEL,
+    LOCAL_ASR_COMPUTE_TYPE,
+    LOCAL_ASR_WORKERS,
+    LOCAL_ASR_THREADS,
+    LOCAL_ASR_TIMEOUT,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL,
+    CACHE_DIR,
+    CACHE_DISK_MAX_ENTRIES
+)
+from networker_bot.metrics import metrics
+from networker_bot.services.cache import create_cache, hash_bytes
+from networker_bot.services.transcription import TranscriptionBackend
+
+logger = logging.getLogger(__name__)
+
+# Modelo cargado en cada proceso del pool (uno por proceso, se reutiliza entre notas)
+_model = None
+_load_seconds = 0.0
+
+def _load_model(model: str, compute_type: str, threads: int, pids) -> None:
+    """Inicializador del pool: avisa su PID y carga el modelo una sola vez por proceso"""
+    global _model, _load_seconds
+    pids.put(os.getpid())
+    from faster_whisper import WhisperModel
+    started = time.perf_counter()
+    _model = WhisperModel(model, device="cpu", compute_type=compute_type, cpu_threads=threads)
+    _load_seconds = time.perf_counter() - started
+
+def transcribe_clip(data: bytes) -> str:
+    """Transcribe un audio con el modelo del proceso (se ejecuta en el pool)"""
+    segments, _ = _model.transcribe(io.BytesIO(data), language="es", beam_size=1, vad_filter=True)
+    return " ".join(segment.text.strip() for segment in segments).strip()
+
+def _ready() -> float:
+    """Segundos que tardó el proceso en cargar el modelo"""
+    return _load_seconds
+
+class LocalWhisperService(TranscriptionBackend):
+    """
+    Transcripción en CPU con un modelo Whisper cuantizado (faster-whisper).
+
+    Cada proceso del pool carga el modelo al arrancar y lo mantiene en
+    memoria; warm_up() fuerza esa carga antes de la primera nota. Cada nota
+    es una tarea del pool, así las notas simultáneas se reparten entre los
+    LOCAL_ASR_WORKERS procesos y cada una tiene su propio deadline.
+
+    Cancelar la espera no detiene un proceso que ya está transcribiendo: si
+    una tarea vence LOCAL_ASR_TIMEOUT, el pool se reemplaza por uno nuevo y
+    se terminan sus procesos, por los PID que cada uno informa al arrancar.
+    Las demás notas de ese pool fallan y el router las manda a Deepgram.
+    """
+
+    name = "local"
+
+    def __init__(self, model: str = LOCAL_ASR_MODEL, workers: int = LOCAL_ASR_WORKERS):
+        self.model = model
+        self.workers = workers
+        self.threads = LOCAL_ASR_THREADS or max(1, (os.cpu_count() or 1) // workers)
+        self.pool, self._pids = self._new_pool()
+        self.restarts = 0
+        self.cache = create_cache("local_transcripts", CACHE_MAX_ENTRIES, CACHE_TTL, CACHE_DIR, CACHE_DISK_MAX_ENTRIES)
+        logger.info(f"✅ LocalWhisperService inicializado ({model}, {workers} procesos x {self.threads} hilos)")
+
+    @staticmethod
+    def available() -> bool:
+        """faster-whisper es una dependencia opcional"""
+        if importlib.util.find_spec("faster_whisper") is None:
+            logger.warning("⚠️ faster-whisper no está instalado; transcripción local desactivada")
+            return False
+        return True
+
+    def _new_pool(self) -> tuple:
+        """Pool nuevo y la cola donde sus procesos informan el PID"""
+        # spawn: el bot tiene hilos activos y fork los copiaría a medias
+        context = multiprocessing.get_context("spawn")
+        pids = context.SimpleQueue()
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_load_model,
+            initargs=(self.model, LOCAL_ASR_COMPUTE_TYPE, self.threads, pids)
+        )
+        return pool, pids
+
+    async def _run(self, func, *args):
+        pool = self.pool
+        future: Future = pool.submit(functools.partial(func, *args))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), LOCAL_ASR_TIMEOUT)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._restart(pool)
+            raise
+
+    def _restart(self, pool: ProcessPoolExecutor) -> None:
+        """Reemplaza un pool con un proceso colgado (el modelo se vuelve a cargar)"""
+        if pool is not self.pool:
+            return  # Otro timeout del mismo pool ya lo reemplazó
+        pids = self._pids
+        self.pool, self._pids = self._new_pool()
+        self.restarts += 1
+        metrics.inc("networker_local_asr_restarts_total")
+        logger.warning(f"⚠️ Transcripción local superó {LOCAL_ASR_TIMEOUT:.0f}s; se reinicia el pool de procesos")
+        self._terminate(pool, pids)
+
+    @staticmethod
+    def _terminate(pool: ProcessPoolExecutor, pids) -> None:
+        pool.shutdown(wait=False, cancel_futures=True)
+        while not pids.empty():
+            try:
+                os.kill(pids.get(), signal.SIGTERM)
+            except ProcessLookupError:
+                pass  # Ya había terminado
+        pids.close()
+
+    async def warm_up(self) -> None:
+        """Arranca los procesos del pool y espera a que carguen el modelo"""
+        load_times = await asyncio.gather(*(self._run(_ready) for _ in range(self.workers)))
+        logger.info(f"🔥 Modelo local '{self.model}' precargado en {max(load_times):.1f}s")
+
+    async def _transcribe(self, audio_data: bytes) -> str:
+        with metrics.span("local_asr"):
+            return await self._run(transcribe_clip, audio_data)
+
+    async def transcribe_audio(self, audio_data: bytes, cache_key: Optional[str] = None) -> str:
+        """
+        Transcribe un audio en el pool local.
+
+        Args:
+            audio_data (bytes): Audio completo
+            cache_key (str): file_unique_id de Telegram
+
+        Returns:
+            str: Texto transcrito
+        """
+        keys = [f"sha:{hash_bytes(audio_data)}"]
+        if cache_key:
+            keys.insert(0, f"file:{cache_key}")
+        cached = await self.cache.get_any(keys)
+        if cached:
+            logger.debug("⚡ Transcripción local obtenida de la caché")
+            return cached
+
+        started = time.perf_counter()
+        transcript = await self._transcribe(audio_data)
+        logger.debug(f"✅ Transcripción local en {time.perf_counter() - started:.2f}s")
+
+        if transcript:
+            for key in keys:
+                await self.cache.set(key, transcript)
+        return transcript
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self._pids.close()
+        self.cache.close()
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Códigos HTTP que indican saturación o fallo temporal del proveedor
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """El proveedor está marcado como caído y la llamada no se intentó"""
+
+def error_status(error: Exception) -> Optional[int]:
+    """
+    Obtiene el código HTTP de un error de cualquiera de los SDKs.
+
+    httpx y gspread lo exponen en response.status_code, Deepgram en status
+    (como texto) y google-api-core en code.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        status = getattr(error, 'status', None)
+    if status is None:
+        status = getattr(error, 'code', None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable(error: Exception) -> bool:
+    """Indica si un error es transitorio y vale la pena reintentar"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    return error_status(error) in RETRYABLE_STATUS
+
+class CircuitBreaker:
+    """
+    Circuit breaker por proveedor.
+
+    Tras failure_threshold fallos seguidos se abre y rechaza llamadas durante
+    reset_timeout segundos; después deja pasar una llamada de prueba
+    (semiabierto) y se cierra si tiene éxito.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Libera la llamada de prueba si se canceló sin resultado"""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class ResilientClient:
+    """
+    Envoltorio común para llamadas a proveedores externos.
+
+    Aplica un deadline por llamada, reintentos con backoff exponencial y jitter
+    solo para errores transitorios, y un circuit breaker que falla rápido
+    mientras el proveedor está caído.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "timeouts": 0, "rejected": 0, "hedged": 0}
+
+    async def call(self, request: Callable[[], Awaitable[Any]], retry: bool = True) -> Any:
+        """
+        Ejecuta una llamada con deadline, reintentos y circuit breaker.
+
+        Args:
+            request: Función sin argumentos que crea la corrutina de la llamada
+            retry: False para llamadas que no se pueden repetir (p. ej. streams)
+
+        Returns:
+            El resultado de la llamada
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto
+            Exception: El último error si no es transitorio o se agotan los reintentos
+        """
+        attempts = 1 + (self.max_retries if retry else 0)
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(f"{self.name} no disponible (circuito abierto)")
+
+            self.stats["calls"] += 1
+            try:
+                result = await asyncio.wait_for(request(), self.timeout)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats["timeouts"] += 1
+                transient = is_retryable(e)
+                if transient:
+                    self.breaker.record_failure()
+                else:
+                    # El proveedor respondió: el error es de la petición, no de su salud
+                    self.breaker.record_success()
+                if not transient or attempt == attempts - 1:
+                    self.stats["failures"] += 1
+                    raise
+
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                delay = random.uniform(0, delay)
+                self.stats["retries"] += 1
+                logger.warning(
+                    f"🔁 {self.name}: error transitorio ({type(e).__name__}: {e}), "
+                    f"reintento {attempt + 1} en {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def hedged(self, request: Callable[[], Awaitable[Any]], delay: float) -> Any:
+        """
+        Lanza una copia de la llamada si la primera tarda más de delay segundos.
+
+        Gana la primera respuesta exitosa y la otra se cancela. Recorta la
+        cola de latencia a cambio de algunas llamadas duplicadas.
+
+        Args:
+            request: Función sin argumentos que crea la corrutina de la llamada
+            delay: Segundos de espera antes de lanzar la copia
+
+        Returns:
+            El resultado de la llamada más rápida
+        """
+        tasks = {asyncio.create_task(self.call(request))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.stats["hedged"] += 1
+                tasks.add(asyncio.create_task(self.call(request)))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> dict:
+        """Contadores y estado del circuito"""
+        return {**self.stats, "circuit": self.breaker.state}
@@ -0,0 +1,307 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+NAME_COLUMN = 0      # Columna A: nombre del contacto (ver el orden de filas en save_stage)
+USER_ID_COLUMN = 10  # Columna K: User ID de quien envió la nota
+EVENT_COLUMN = 7     # Columna H: lugar/evento
+LAST_COLUMN = "K"
+
+def contact_name(name: str) -> str:
+    """Nombre normalizado para comparar contactos (sin tildes, mayúsculas ni espacios extra)"""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(name.lower().split())
+
+def row_key(row: list) -> tuple:
+    """
+    Clave de upsert de una fila: (user_id, evento, contacto).
+
+    Un mismo usuario puede enviar presentaciones de varias personas en un
+    evento: cada contacto (por nombre) tiene su fila; solo se edita la fila
+    cuando el mismo usuario vuelve a enviar al mismo contacto.
+    """
+    user_id = str(row[USER_ID_COLUMN]) if len(row) > USER_ID_COLUMN else ""
+    event = str(row[EVENT_COLUMN]) if len(row) > EVENT_COLUMN else ""
+    name = contact_name(str(row[NAME_COLUMN])) if row else ""
+    return user_id, event, name
+
+def row_digest(row: list) -> str:
+    return hashlib.sha1(json.dumps([str(v) for v in row], ensure_ascii=False).encode()).hexdigest()
+
+def supports_sync(worksheet) -> bool:
+    """La hoja necesita lecturas por rango y batch_update (gspread.Worksheet las tiene)"""
+    return all(hasattr(worksheet, name) for name in ("get", "batch_get", "batch_update", "append_rows"))
+
+class SheetSyncEngine:
+    """
+    Sincronización incremental con la hoja de Google Sheets.
+
+    Guarda en SQLite el número de fila, la clave (user_id, evento, contacto) y un hash
+    de cada fila ya vista, junto con un cursor: la última fila leída y la
+    revisión (modifiedTime en Drive) de la hoja. Así:
+
+    - si la revisión no cambió, no se lee nada de la hoja;
+    - si cambió, solo se leen las filas posteriores al cursor;
+    - upsert() edita con un único batch_update las filas de contactos que ya
+      existen y agrega con append_rows solo las nuevas.
+
+    Antes de editar se verifica el user_id de las filas afectadas; si alguien
+    insertó o borró filas a mano, se relee la hoja completa una vez.
+
+    Un append_rows que falla puede haber llegado igual a la hoja (p. ej. se
+    perdió la respuesta). Por eso se marca antes de enviarlo y, si no se
+    confirma, el siguiente upsert relee las filas posteriores al cursor antes
+    de escribir: un reintento encuentra las filas ya escritas y no las duplica.
+
+    Los métodos son bloqueantes: se llaman desde un pool de un solo hilo, lo
+    que además serializa los upserts.
+    """
+
+    def __init__(self, worksheet, path: str, refresh_interval: float = 30.0):
+        self.worksheet = worksheet
+        self.refresh_interval = refresh_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sheet_rows)")]
+        if columns and "contacto" not in columns:
+            # Cache anterior a la clave por contacto: se reconstruye desde la hoja
+            self._conn.executescript("""
+                DROP TABLE sheet_rows;
+                DELETE FROM sync_state WHERE key IN ('last_row', 'revision');
+            """)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sheet_rows (
+                row_number INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                evento TEXT NOT NULL,
+                contacto TEXT NOT NULL,
+                digest TEXT NOT NULL
+            );
+            DROP INDEX IF EXISTS idx_sheet_rows_key;
+            CREATE INDEX IF NOT EXISTS idx_sheet_rows_contact ON sheet_rows (user_id, evento, contacto);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._conn.commit()
+        self._last_pull = 0.0
+        self.stats = {"pulls": 0, "rows_read": 0, "full_reads": 0, "appended": 0, "updated": 0, "unchanged": 0}
+
+        # El cache pertenece a una hoja concreta: si cambia, se descarta
+        sheet_id = f"{getattr(getattr(worksheet, 'spreadsheet', None), 'id', '')}:{getattr(worksheet, 'id', '')}"
+        if self._state("sheet_id") != sheet_id:
+            self._reset()
+            self._set_state("sheet_id", sheet_id)
+
+    # --- Estado local -----------------------------------------------------
+
+    def _state(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                (key, None if value is None else str(value))
+            )
+
+    @property
+    def last_row(self) -> int:
+        return int(self._state("last_row") or 0)
+
+    def _reset(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM sheet_rows")
+            self._conn.execute("DELETE FROM sync_state WHERE key IN ('last_row', 'revision', 'unconfirmed_append')")
+
+    def _record(self, first_row: int, rows: list) -> bool:
+        """Guarda filas leídas o escritas; el cursor solo avanza si no quedan huecos sin leer"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sheet_rows (row_number, user_id, evento, contacto, digest) VALUES (?, ?, ?, ?, ?)",
+                [(first_row + i, *row_key(row), row_digest(row)) for i, row in enumerate(rows)]
+            )
+        if first_row > self.last_row + 1:
+            return False
+        end = first_row + len(rows) - 1
+        if end > self.last_row:
+            self._set_state("last_row", end)
+        return True
+
+    def _find(self, key: tuple) -> Optional[tuple]:
+        return self._conn.execute(
+            "SELECT row_number, digest FROM sheet_rows WHERE user_id = ? AND evento = ? AND contacto = ? "
+            "ORDER BY row_number DESC LIMIT 1",
+            key
+        ).fetchone()
+
+    def _has_digest(self, digest: str) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM sheet_rows WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone() is not None
+
+    # --- Lectura incremental ----------------------------------------------
+
+    def _revision(self) -> Optional[str]:
+        spreadsheet = getattr(self.worksheet, 'spreadsheet', None)
+        try:
+            return spreadsheet.get_lastUpdateTime() if spreadsheet is not None else None
+        except Exception as e:
+            logger.debug(f"No se pudo leer la revisión de la hoja: {e}")
+            return None
+
+    def pull(self, force: bool = False) -> int:
+        """
+        Lee las filas nuevas de la hoja si su revisión cambió.
+
+        Args:
+            force (bool): Leer aunque no haya pasado refresh_interval
+
+        Returns:
+            int: Filas nuevas leídas
+        """
+        now = time.monotonic()
+        if not force and now - self._last_pull < self.refresh_interval:
+            return 0
+        self._last_pull = now
+
+        revision = self._revision()
+        if revision is not None and revision == self._state("revision"):
+            return 0
+
+        start = self.last_row + 1
+        rows = self.worksheet.get(f"A{start}:{LAST_COLUMN}")
+        rows = [list(row) for row in rows]
+        if rows:
+            self._record(start, rows)
+        self._set_state("revision", revision)
+        self.stats["pulls"] += 1
+        self.stats["rows_read"] += len(rows)
+        if rows:
+            logger.info(f"🔄 {len(rows)} filas nuevas leídas de Sheets (desde la fila {start})")
+        return len(rows)
+
+    def full_resync(self) -> None:
+        """Descarta el cache y relee la hoja completa (p. ej. si se borraron filas a mano)"""
+        logger.warning("🔄 Releyendo la hoja completa para reconstruir el cache de sincronización")
+        self._reset()
+        self.stats["full_reads"] += 1
+        self._last_pull = 0.0
+        self.pull(force=True)
+
+    # --- Escritura ----------------------------------------------------------
+
+    def _rows_match(self, row_numbers: list, keys: list) -> bool:
+        """Comprueba que las filas a editar siguen perteneciendo a esos contactos"""
+        ranges = [f"A{n}:{LAST_COLUMN}{n}" for n in row_numbers]
+        current = self.worksheet.batch_get(ranges)
+        for value_range, key in zip(current, keys):
+            row = list(value_range[0]) if value_range else []
+            if row_key(row) != key:
+                return False
+        return True
+
+    def upsert(self, rows: list) -> dict:
+        """
+        Escribe filas editando la del mismo (user_id, evento, contacto) si ya existe.
+
+        Args:
+            rows (list): Filas con el formato de la hoja
+
+        Returns:
+            dict: Filas agregadas, editadas y sin cambios
+        """
+        if self._state("unconfirmed_append"):
+            # El último append pudo haber llegado: se leen las filas nuevas sin
+            # confiar en la revisión guardada ni en refresh_interval
+            self._set_state("revision", None)
+            self.pull(force=True)
+            self._set_state("unconfirmed_append", None)
+        else:
+            self.pull()
+
+        # Dentro del lote, la última fila de cada contacto gana
+        latest = {}
+        for row in rows:
+            latest[row_key(row)] = [str(value) for value in row]
+
+        for attempt in range(2):
+            updates, appends, unchanged = [], [], 0
+            for key, row in latest.items():
+                # Sin user_id o sin nombre no hay con qué identificar el contacto
+                found = self._find(key) if key[0] and key[2] else None
+                if found is None:
+                    if self._has_digest(row_digest(row)):
+                        unchanged += 1  # Fila idéntica ya escrita (reintento)
+                    else:
+                        appends.append(row)
+                elif found[1] == row_digest(row):
+                    unchanged += 1
+                else:
+                    updates.append((found[0], key, row))
+
+            if not updates or self._rows_match([n for n, _, _ in updates], [k for _, k, _ in updates]):
+                break
+            if attempt == 0:
+                self.full_resync()
+            else:
+                # La hoja sigue sin coincidir: se agregan como filas nuevas
+                appends.extend(row for _, _, row in updates)
+                updates = []
+
+        if updates:
+            self.worksheet.batch_update([
+                {"range": f"A{n}:{LAST_COLUMN}{n}", "values": [row]} for n, _, row in updates
+            ])
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE sheet_rows SET digest = ? WHERE row_number = ?",
+                    [(row_digest(row), n) for n, _, row in updates]
+                )
+
+        if appends:
+            self._set_state("unconfirmed_append", 1)
+            response = self.worksheet.append_rows(appends)
+            self._set_state("unconfirmed_append", None)
+            first_row = self._appended_row(response)
+            # Sin rango en la respuesta, o si otro escritor agregó filas antes
+            # que las nuestras, la próxima lectura incremental las registra
+            if first_row is None or not self._record(first_row, appends):
+                self._set_state("revision", None)
+
+        # La revisión guardada queda atrás de la escritura propia: la próxima
+        # lectura (a lo sumo una cada refresh_interval) solo pide el rango
+        # posterior al cursor, que ya incluye lo escrito aquí
+
+        self.stats["appended"] += len(appends)
+        self.stats["updated"] += len(updates)
+        self.stats["unchanged"] += unchanged
+        return {"appended": len(appends), "updated": len(updates), "unchanged": unchanged}
+
+    @staticmethod
+    def _appended_row(response) -> Optional[int]:
+        """Primera fila escrita por append_rows, según updates.updatedRange (p. ej. 'Hoja 1!A12:K14')"""
+        try:
+            updated_range = response["updates"]["updatedRange"]
+        except (TypeError, KeyError):
+            return None
+        match = re.search(r"![A-Z]+(\d+)", updated_range)
+        return int(match.group(1)) if match else None
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,102 +1,212 @@
 import os
+import asyncio
 import logging
-from datetime import datetime
-from dotenv import load_dotenv
+import random
+from typing import Optional
 import gspread
 from google.oauth2.service_account import Credentials
 import json
 
-load_dotenv()
+from networker_bot.config import (
+    GOOGLE_SHEETS_ID,
+    EVENT_NAME,
+    SHEETS_MAX_WORKERS,
+    SHEETS_MAX_RETRIES,
+    SHEETS_RETRY_BASE_DELAY,
+    SHEETS_SHARD_WRITES_PER_MINUTE,
+    SHEETS_SHARD_WRITE_BURST,
+    SHEETS_TIMEOUT,
+    SHEETS_UPSERT,
+    SHEETS_SYNC_PATH,
+    SHEETS_SYNC_INTERVAL,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT
+)
+from networker_bot.metrics import metrics
+from networker_bot.progress import TokenBucket
+from networker_bot.services.events import Event, shard_path
+from networker_bot.services.executor import BlockingExecutor
+from networker_bot.services.http_pool import http_pool
+from networker_bot.services.resilience import CircuitBreaker, ResilientClient, is_retryable
+from networker_bot.services.sheet_sync import SheetSyncEngine, supports_sync
 
-GOOGLE_SHEETS_ID = os.getenv('GOOGLE_SHEETS_ID')
-EVENT_NAME = os.getenv('EVENT_NAME', 'Hackaton Release Before Ready')
 logger = logging.getLogger(__name__)
 
+# Encabezados de las hojas que el bot crea para eventos nuevos (orden de save_stage)
+SHEET_HEADERS = [
+    "Nombre", "Edad", "Ocupación", "Proyecto", "Stack", "Hobby",
+    "Info adicional", "Lugar", "Fecha/Hora", "Username", "User ID"
+]
+
 class SheetsService:
-    """Servicio para guardar información en Google Sheets"""
+    """
+    Servicio para guardar información en Google Sheets.
+
+    Cada evento tiene su propia instancia (un shard): hoja abierta una sola
+    vez, pool de hilos, circuit breaker y límite de escrituras por minuto
+    propios, así un evento no frena a los demás. Las filas llegan en lotes
+    desde el replicador del journal (ver journal.py).
+    """
     
-    def __init__(self):
+    def __init__(self, worksheet=None, event: Optional[Event] = None):
+        """
+        Args:
+            worksheet: Hoja ya abierta (p. ej. una hoja falsa en benchmarks);
+                si es None se autentica y abre la hoja del evento
+            event (Event): Evento cuyos registros guarda (None = evento default)
+        """
         try:
-            # Configurar credenciales
-            scope = [
-                'https://spreadsheets.google.com/feeds',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            
-            # Intentar desde archivo primero
-            if os.path.exists('credentials.json'):
-                creds = Credentials.from_service_account_file('credentials.json', scopes=scope)
+            self.event = event or Event("default", EVENT_NAME, GOOGLE_SHEETS_ID)
+            self.name = "sheets" if self.event.slug == "default" else f"sheets-{self.event.slug}"
+            if worksheet is not None:
+                self.sheet = worksheet
             else:
-                # Si no existe archivo, usar variable de entorno
-                creds_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
-                if creds_json:
-                    creds_dict = json.loads(creds_json)
-                    creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
-                else:
-                    raise Exception("No se encontraron credenciales de Google")
+                self.sheet = self._open_worksheet()
+            
+            # gspread es síncrono: sus llamadas van a un pool propio
+            self.executor = BlockingExecutor(self.name, SHEETS_MAX_WORKERS)
+            
+            # Upsert por usuario con cache local; un solo hilo serializa los upserts
+            self.sync = None
+            if SHEETS_UPSERT and supports_sync(self.sheet):
+                self.sync = SheetSyncEngine(
+                    self.sheet, shard_path(SHEETS_SYNC_PATH, self.event.slug), SHEETS_SYNC_INTERVAL
+                )
+                self.sync_executor = BlockingExecutor(f"{self.name}-sync", 1)
             
-            self.client = gspread.authorize(creds)
-            self.sheet = self.client.open_by_key(GOOGLE_SHEETS_ID).sheet1
+            # Append que venció el deadline pero sigue en curso en el pool: (tarea, filas)
+            self._unconfirmed = None
+            
+            # Cuota de escritura propia de la hoja (una ficha por llamada de escritura)
+            self.rate_limit = TokenBucket(SHEETS_SHARD_WRITES_PER_MINUTE / 60, SHEETS_SHARD_WRITE_BURST)
+            
+            # Deadline y circuit breaker; los reintentos con backoff los hace add_rows
+            self.resilience = ResilientClient(
+                self.name,
+                SHEETS_TIMEOUT,
+                max_retries=0,
+                breaker=CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+            )
             
         except Exception as e:
             logger.error(f"Error al inicializar SheetsService: {e}")
             raise
     
-    async def add_row(self, row_data: list) -> bool:
-        """
-        Agrega una fila a Google Sheets.
+    def _open_worksheet(self):
+        """Autentica con la cuenta de servicio y abre la hoja del evento (la crea si no existe)"""
+        # Configurar credenciales
+        scope = [
+            'https://spreadsheets.google.com/feeds',
+            'https://www.googleapis.com/auth/drive'
+        ]
         
-        Args:
-            row_data (list): Datos a agregar como fila
-            
-        Returns:
-            bool: True si se guardó exitosamente
+        # Intentar desde archivo primero
+        if os.path.exists('credentials.json'):
+            creds = Credentials.from_service_account_file('credentials.json', scopes=scope)
+        else:
+            # Si no existe archivo, usar variable de entorno
+            creds_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
+            if creds_json:
+                creds_dict = json.loads(creds_json)
+                creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
+            else:
+                raise Exception("No se encontraron credenciales de Google")
+        
+        self.client = gspread.authorize(creds)
+        self.client.set_timeout(SHEETS_TIMEOUT)
+        # Una conexión keep-alive por hilo del pool, reutilizada entre escrituras
+        http_pool.mount(self.name, self.client.http_client.session, SHEETS_MAX_WORKERS)
+        spreadsheet = self.client.open_by_key(self.event.spreadsheet_id)
+        if not self.event.worksheet:
+            return spreadsheet.sheet1
+        try:
+            return spreadsheet.worksheet(self.event.worksheet)
+        except gspread.WorksheetNotFound:
+            worksheet = spreadsheet.add_worksheet(self.event.worksheet, rows=1000, cols=len(SHEET_HEADERS))
+            worksheet.append_row(SHEET_HEADERS)
+            logger.info(f"📄 Hoja '{self.event.worksheet}' creada para el evento {self.event.name}")
+            return worksheet
+    
+    async def _settle_unconfirmed(self, rows: list) -> list:
         """
+        Espera el append anterior que venció el deadline (el hilo sigue con la
+        petición) y retorna las filas que todavía faltan: si llegó a escribirse,
+        sus filas no se vuelven a agregar.
+        """
+        if self._unconfirmed is None:
+            return rows
+        task, sent = self._unconfirmed
+        self._unconfirmed = None
         try:
-            self.sheet.append_row(row_data)
-            logger.info(f"Fila agregada exitosamente con {len(row_data)} campos")
-            return True
+            await task
+        except Exception:
+            return rows
+        if rows[:len(sent)] != sent:
+            return rows
+        logger.info(f"{len(sent)} filas ya estaban escritas por un append que venció el deadline")
+        return rows[len(sent):]
+    
+    async def _append_rows(self, rows: list) -> None:
+        """Escribe varias filas en una sola petición a la API (o un upsert incremental)"""
+        if self.sync is None:
+            rows = await self._settle_unconfirmed(rows)
+            if not rows:
+                return
+        await self.rate_limit.acquire()
+        with metrics.span("sheets"):
+            if self.sync is not None:
+                result = await self.resilience.call(
+                    lambda: self.sync_executor.run(self.sync.upsert, rows)
+                )
+                logger.debug(f"Upsert en Sheets: {result}")
+                return
             
-        except Exception as e:
-            logger.error(f"Error al agregar fila: {e}")
-            return False
+            # append_rows no es idempotente: si vence el deadline la petición
+            # sigue en su hilo, y el próximo intento espera su resultado
+            task = None
+            
+            def request():
+                nonlocal task
+                task = asyncio.ensure_future(self.executor.run(self.sheet.append_rows, rows))
+                return asyncio.shield(task)
+            
+            try:
+                await self.resilience.call(request)
+            except BaseException:
+                if task is not None and not task.done():
+                    self._unconfirmed = (task, rows)
+                raise
     
-    def save_user_data(self, user_data: dict, metadata: dict) -> bool:
+    async def add_rows(self, rows: list) -> None:
         """
-        Guarda datos del usuario en Google Sheets.
+        Agrega varias filas de una vez, reintentando con backoff exponencial
+        si se agota la cuota o hay un error transitorio.
         
         Args:
-            user_data (dict): Datos extraídos por Gemini
-            metadata (dict): Información adicional (fecha, username, etc.)
-            
-        Returns:
-            bool: True si se guardó exitosamente
+            rows (list): Lista de filas a agregar
             
         Raises:
-            Exception: Si hay error al guardar
+            Exception: Si el error no es recuperable o se agotan los reintentos
         """
-        try:
-            # Preparar fila según headers de Google Sheets
-            row_data = [
-                user_data.get('nombre', 'No especificado'),
-                user_data.get('edad', 'No especificado'),
-                user_data.get('ocupacion', 'No especificado'),
-                user_data.get('proyecto', 'No especificado'),
-                user_data.get('stack', 'No especificado'),
-                user_data.get('hobby', 'No especificado'),
-                user_data.get('info_adicional', 'No especificado'),
-                metadata.get('lugar_conocimos', EVENT_NAME),
-                metadata.get('fecha_hora', datetime.now().strftime("%Y-%m-%d %H:%M")),
-                metadata.get('username', 'Sin username'),
-                metadata.get('user_id', 'Sin ID')
-            ]
-            
-            # Guardar en Google Sheets
-            self.sheet.append_row(row_data)
-            
-            logger.info(f"Datos guardados exitosamente: {user_data.get('nombre', 'Sin nombre')}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error al guardar en Sheets: {e}")
-            raise Exception(f"Error al guardar en Google Sheets: {str(e)}")
+        attempt = 0
+        while True:
+            try:
+                await self._append_rows(rows)
+                break
+            except Exception as e:
+                if not is_retryable(e) or attempt >= SHEETS_MAX_RETRIES:
+                    raise
+                delay = SHEETS_RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random())
+                attempt += 1
+                logger.warning(
+                    f"⏳ Cuota de Sheets agotada ({e}), reintento {attempt} en {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+        logger.info(f"{len(rows)} filas agregadas exitosamente")
+    
+    async def close(self) -> None:
+        """Libera el pool de hilos y el cache de sincronización"""
+        self.executor.shutdown()
+        if self.sync is not None:
+            self.sync_executor.shutdown()
+            self.sync.close()
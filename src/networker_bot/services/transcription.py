@@ -0,0 +1,130 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from networker_bot.config import (
+    TRANSCRIBE_BACKEND,
+    TRANSCRIBE_LOCAL_FALLBACK,
+    LOCAL_ASR_MAX_SECONDS
+)
+from networker_bot.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("deepgram", "local", "auto")
+
+class TranscriptionBackend(ABC):
+    """Interfaz común de los motores de transcripción"""
+
+    name = "backend"
+
+    @abstractmethod
+    async def transcribe_audio(self, audio_data: bytes, cache_key: Optional[str] = None) -> str:
+        """
+        Transcribe un audio completo.
+
+        Args:
+            audio_data (bytes): Audio (OGG/Opus de Telegram)
+            cache_key (str): file_unique_id de Telegram, para la caché
+
+        Returns:
+            str: Texto transcrito ("" si no se entendió nada)
+        """
+
+    async def warm_up(self) -> None:
+        pass
+
+class TranscriptionRouter:
+    """
+    Elige el motor de transcripción de cada nota.
+
+    TRANSCRIBE_BACKEND:
+    - deepgram: todo va a Deepgram (el local solo como respaldo si
+      TRANSCRIBE_LOCAL_FALLBACK está activo)
+    - local: todo se transcribe en el servidor; Deepgram es el respaldo
+    - auto: notas de hasta LOCAL_ASR_MAX_SECONDS en local y las más largas en
+      Deepgram, cada uno como respaldo del otro
+
+    Si el motor elegido falla (error, timeout, circuito abierto), la nota se
+    transcribe con el otro en lugar de perderse.
+    """
+
+    def __init__(self, deepgram: TranscriptionBackend, local: Optional[TranscriptionBackend] = None,
+                 mode: str = TRANSCRIBE_BACKEND, max_local_seconds: float = LOCAL_ASR_MAX_SECONDS,
+                 local_fallback: bool = TRANSCRIBE_LOCAL_FALLBACK):
+        if mode not in BACKENDS:
+            raise ValueError(f"TRANSCRIBE_BACKEND inválido: {mode} (usa {', '.join(BACKENDS)})")
+        if mode != "deepgram" and local is None:
+            logger.warning(f"⚠️ TRANSCRIBE_BACKEND={mode} sin motor local disponible; se usa Deepgram")
+            mode = "deepgram"
+
+        self.deepgram = deepgram
+        self.local = local
+        self.mode = mode
+        self.max_local_seconds = max_local_seconds
+        self.local_fallback = local_fallback or mode != "deepgram"
+        logger.info(f"✅ Transcripción: modo {mode}" + (" con respaldo local" if self._can_fall_back() else ""))
+
+    def _can_fall_back(self) -> bool:
+        return self.local is not None and self.local_fallback
+
+    def backend_for(self, duration: Optional[float]) -> TranscriptionBackend:
+        """Motor principal para una nota de `duration` segundos (None = desconocida)"""
+        if self.mode == "local":
+            return self.local
+        if self.mode == "auto" and duration is not None and duration <= self.max_local_seconds:
+            return self.local
+        return self.deepgram
+
+    def streams(self, duration: Optional[float]) -> bool:
+        """Solo Deepgram transcribe mientras se descarga el audio"""
+        return self.backend_for(duration) is self.deepgram
+
+    def _fallback_for(self, backend: TranscriptionBackend) -> Optional[TranscriptionBackend]:
+        if backend is self.local:
+            return self.deepgram
+        return self.local if self._can_fall_back() else None
+
+    async def transcribe_audio(self, audio_data: bytes, cache_key: Optional[str] = None,
+                               duration: Optional[float] = None,
+                               split: Optional[Callable[[bytes], Awaitable[list]]] = None) -> str:
+        """
+        Transcribe una nota con el motor que le corresponde.
+
+        Args:
+            audio_data (bytes): Audio completo
+            cache_key (str): file_unique_id de Telegram
+            duration (float): Duración informada por Telegram, para el ruteo
+            split: Si se indica y la nota va a Deepgram, se transcribe por
+                segmentos en paralelo (notas largas)
+
+        Returns:
+            str: Texto transcrito
+        """
+        backend = self.backend_for(duration)
+        try:
+            if split is not None and backend is self.deepgram:
+                transcript = await self.deepgram.transcribe_segments(audio_data, split, cache_key=cache_key)
+            else:
+                transcript = await backend.transcribe_audio(audio_data, cache_key=cache_key)
+        except Exception as e:
+            fallback = self._fallback_for(backend)
+            if fallback is None:
+                raise
+            logger.warning(f"⚠️ Transcripción con {backend.name} falló ({e}); se usa {fallback.name}")
+            metrics.inc("networker_transcription_fallbacks_total", backend=fallback.name)
+            backend = fallback
+            transcript = await backend.transcribe_audio(audio_data, cache_key=cache_key)
+
+        metrics.inc("networker_transcriptions_total", backend=backend.name)
+        return transcript
+
+    async def transcribe_stream(self, chunks: AsyncIterator[bytes], cache_key: Optional[str] = None) -> str:
+        """
+        Transcribe con Deepgram mientras se descarga el audio.
+
+        Un stream ya consumido no se puede reenviar: en este modo no hay respaldo.
+        """
+        transcript = await self.deepgram.transcribe_stream(chunks, cache_key=cache_key)
+        metrics.inc("networker_transcriptions_total", backend=self.deepgram.name)
+        return transcript
@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import os
+import re
+import signal
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from networker_bot.config import (
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_API_URL,
+    JOB_QUEUE_URL,
+    JOB_VISIBILITY_TIMEOUT,
+    JOB_RETRY_DELAY,
+    JOB_POLL_INTERVAL,
+    JOURNAL_PATH,
+    METRICS_HOST,
+    WORKER_METRICS_PORT,
+    PIPELINE_METRICS_INTERVAL,
+    WORKER_ID,
+    WORKER_MAX_JOBS
+)
+from networker_bot.handlers.voice import (
+    VoiceJob,
+    edit_status,
+    job_from_payload,
+    on_job_error,
+    on_job_finish,
+    job_progress,
+    voice_pipeline
+)
+from networker_bot.metrics import MetricsServer, configure_logging, metrics
+from networker_bot.pipeline import Pipeline
+from networker_bot.progress import progress
+from networker_bot.services.container import services
+from networker_bot.services.job_queue import JobQueue, Lease
+
+logger = logging.getLogger(__name__)
+
+class QueueWorker:
+    """
+    Toma notas de voz de la cola de trabajos y las procesa con las mismas
+    etapas que el pipeline del bot (descarga → transcripción → extracción →
+    guardado), respondiendo al usuario directamente por la Bot API.
+
+    Cada job se confirma (ack) al terminar; si una etapa falla se devuelve a
+    la cola (nack) para reintentarlo, junto con la transcripción y los datos
+    ya obtenidos para no volver a pagar Deepgram ni Gemini, y solo en el
+    último intento se avisa del error al usuario. Mientras un job está en proceso su reserva se
+    renueva periódicamente, así la visibilidad solo vence si el worker muere.
+    """
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        bot: Bot,
+        worker_id: str = WORKER_ID,
+        max_jobs: int = WORKER_MAX_JOBS,
+        visibility_timeout: float = JOB_VISIBILITY_TIMEOUT,
+        retry_delay: float = JOB_RETRY_DELAY,
+        poll_interval: float = JOB_POLL_INTERVAL
+    ):
+        self.job_queue = job_queue
+        self.bot = bot
+        self.worker_id = worker_id
+        self.max_jobs = max_jobs
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.pipeline = Pipeline(
+            voice_pipeline.stages,
+            on_error=self._on_error,
+            on_finish=self._on_finish,
+            metrics_interval=PIPELINE_METRICS_INTERVAL
+        )
+        self._leases: dict = {}
+        self._jobs: dict = {}
+        self._errors: dict = {}
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._leases)
+
+    async def run(self) -> None:
+        """Consume la cola hasta que se llame a stop()"""
+        await self.pipeline.start()
+        heartbeat = asyncio.create_task(self._heartbeat(), name="job-heartbeat")
+        logger.info(f"👷 Worker {self.worker_id} esperando trabajos (máx. {self.max_jobs} en proceso)")
+        try:
+            while not self._stopping.is_set():
+                if self.in_flight >= self.max_jobs or self.pipeline.position() is None:
+                    await self._wait(None)
+                    continue
+
+                try:
+                    lease = await self.job_queue.dequeue(self.worker_id, self.visibility_timeout)
+                except Exception as e:
+                    logger.error(f"Error leyendo la cola de trabajos: {e}")
+                    await self._wait(self.poll_interval)
+                    continue
+
+                if lease is None:
+                    await self._wait(self.poll_interval)
+                    continue
+                await self._start(lease)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    def stop(self) -> None:
+        """Deja de tomar trabajos nuevos (los que están en proceso continúan)"""
+        self._stopping.set()
+        self._wakeup.set()
+
+    async def shutdown(self, timeout: float = 20.0) -> None:
+        """
+        Espera a que terminen los jobs en proceso y detiene el pipeline.
+
+        Los que no alcanzan a terminar se devuelven a la cola para otro worker.
+
+        Args:
+            timeout (float): Segundos máximos de espera
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while self._leases and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.1)
+        await self.pipeline.stop()
+
+        for lease in list(self._leases.values()):
+            job = self._jobs.get(lease.id)
+            try:
+                await self.job_queue.nack(
+                    lease, error="worker detenido",
+                    payload=job_progress(job, lease.payload) if job is not None else None
+                )
+            except Exception as e:
+                logger.warning(f"No se pudo devolver el job {lease.id} a la cola: {e}")
+        if self._leases:
+            logger.warning(f"{len(self._leases)} jobs devueltos a la cola al detener el worker")
+        self._leases.clear()
+        self._jobs.clear()
+
+    async def _start(self, lease: Lease) -> None:
+        try:
+            job = job_from_payload(lease.payload, self.bot, lease)
+        except Exception as e:
+            logger.error(f"Job {lease.id} con payload inválido: {e}")
+            await self.job_queue.nack(lease, self.retry_delay, f"payload inválido: {e}")
+            return
+
+        self._leases[lease.id] = lease
+        self._jobs[lease.id] = job
+        self.pipeline.submit(job)
+        metrics.inc("networker_jobs_dequeued_total")
+        if lease.attempts > 1:
+            logger.info(f"🔁 Job {lease.id}: intento {lease.attempts}")
+
+    async def _on_error(self, job: VoiceJob, error: Exception) -> None:
+        self._errors[job.lease.id] = str(error)
+        if job.lease.attempts < self.job_queue.max_attempts:
+            job.outcome = "retry"
+            logger.warning(f"Job {job.lease.id} falló ({error}); se reintentará")
+            edit_status(
+                job,
+                "🔁 Hubo un problema procesando tu presentación.\n"
+                "⏳ Lo estamos reintentando..."
+            )
+        else:
+            await on_job_error(job, error)
+
+    async def _on_finish(self, job: VoiceJob) -> None:
+        await on_job_finish(job)
+        lease = self._leases.pop(job.lease.id, None)
+        self._jobs.pop(job.lease.id, None)
+        error = self._errors.pop(job.lease.id, "")
+        if lease is not None:
+            try:
+                if job.outcome == "retry":
+                    await self.job_queue.nack(
+                        lease, self.retry_delay * lease.attempts, error,
+                        payload=job_progress(job, lease.payload)
+                    )
+                else:
+                    await self.job_queue.ack(lease)
+            except Exception as e:
+                # La reserva vencerá y el job se volverá a entregar
+                logger.error(f"No se pudo confirmar el job {lease.id}: {e}")
+        self._wakeup.set()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            for lease in list(self._leases.values()):
+                try:
+                    if not await self.job_queue.extend(lease, self.visibility_timeout):
+                        logger.warning(f"La reserva del job {lease.id} venció; otro worker puede procesarlo")
+                except Exception as e:
+                    logger.warning(f"No se pudo renovar la reserva del job {lease.id}: {e}")
+
+    async def _wait(self, timeout) -> None:
+        self._wakeup.clear()
+        if self._stopping.is_set():
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+def worker_journal_path(path: str, worker_id: str) -> str:
+    """Journal propio por worker, para que dos replicadores no envíen las mismas filas"""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{worker_id}{ext}"
+
+def worker_metrics_port(base: int, worker_id: str) -> int:
+    """
+    Puerto /metrics de un worker: la base más el número final de su ID
+    (w1 y worker.1 → base, w2 → base + 1), para que varios workers en la
+    misma máquina no choquen entre sí ni con el bot. 0 = desactivado.
+    """
+    if not base:
+        return 0
+    match = re.search(r"(\d+)$", worker_id)
+    return base + max(0, int(match.group(1)) - 1) if match else base
+
+def build_bot() -> Bot:
+    """Bot para responder desde el worker, con un pool acorde a los jobs simultáneos"""
+    kwargs = {}
+    if TELEGRAM_API_URL:
+        kwargs = {"base_url": f"{TELEGRAM_API_URL}/bot", "base_file_url": f"{TELEGRAM_API_URL}/file/bot"}
+    return Bot(
+        TELEGRAM_BOT_TOKEN,
+        request=HTTPXRequest(connection_pool_size=max(8, 2 * WORKER_MAX_JOBS)),
+        **kwargs
+    )
+
+async def run_worker() -> None:
+    """Inicializa los servicios y consume la cola hasta recibir SIGTERM/SIGINT"""
+    if not JOB_QUEUE_URL:
+        raise ValueError("Variable de entorno JOB_QUEUE_URL no encontrada (requerida por el worker)")
+
+    services.journal_path = worker_journal_path(JOURNAL_PATH, WORKER_ID)
+    bot = build_bot()
+    async with bot:
+        job_queue = await services.open_job_queue()
+        await services.start()
+        worker = QueueWorker(job_queue, bot)
+
+        metrics.add_collector(services.collect)
+        metrics.add_collector(worker.pipeline.collect)
+        metrics_port = worker_metrics_port(WORKER_METRICS_PORT, worker.worker_id)
+        metrics_server = MetricsServer(metrics, METRICS_HOST, metrics_port) if metrics_port else None
+        if metrics_server is not None:
+            try:
+                await metrics_server.start()
+            except OSError as e:
+                logger.warning(f"Endpoint de métricas no disponible ({e})")
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, worker.stop)
+
+        try:
+            await worker.run()
+        finally:
+            logger.info(f"👷 Deteniendo worker {worker.worker_id}")
+            await worker.shutdown()
+            await progress.flush()
+            if metrics_server is not None:
+                await metrics_server.stop()
+            await services.close()
+
+def main():
+    """
+    Punto de entrada de los procesos worker
+    """
+    configure_logging()
+    asyncio.run(run_worker())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# config.py exige estas variables al importarse; los tests no llaman a las APIs
+for var in ('TELEGRAM_BOT_TOKEN', 'DEEPGRAM_API_KEY', 'GEMINI_API_KEY', 'GOOGLE_SHEETS_ID'):
+    os.environ.setdefault(var, 'test')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -0,0 +1,52 @@
+import asyncio
+import sqlite3
+
+from networker_bot.services.contacts import ContactStore
+
+def sheet_row(nombre: str, stack: str, user_id: str = "42", evento: str = "Hack") -> list:
+    """Fila con el orden de columnas de Google Sheets (ver save_stage)"""
+    return [nombre, "30", "Dev", "Proyecto", stack, "", "", evento, "2025-01-01 10:00", "ana", user_id]
+
+def test_two_contacts_from_the_same_user_are_both_searchable(tmp_path):
+    async def scenario():
+        store = ContactStore(str(tmp_path / "contacts.db"))
+        try:
+            await store.add_rows([sheet_row("Ana Pérez", "react")])
+            await store.add_rows([sheet_row("Luis Gómez", "django")])
+            # Reenviar al mismo contacto (otro formato de nombre) actualiza su perfil
+            await store.add_rows([sheet_row("ana perez", "react node")])
+
+            assert await store.count("Hack") == 2
+            assert [p["nombre"] for p in await store.search("react", "Hack")] == ["ana perez"]
+            assert [p["nombre"] for p in await store.search("django", "Hack")] == ["Luis Gómez"]
+            assert [p["nombre"] for p in await store.search("node", "Hack")] == ["ana perez"]
+        finally:
+            store.close()
+
+    asyncio.run(scenario())
+
+def test_old_directory_is_migrated(tmp_path):
+    path = str(tmp_path / "contacts.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE contacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL, evento TEXT NOT NULL, username TEXT, nombre TEXT,
+            edad TEXT, ocupacion TEXT, proyecto TEXT, stack TEXT, hobby TEXT,
+            info_adicional TEXT, fecha TEXT,
+            UNIQUE (user_id, evento)
+        );
+        INSERT INTO contacts (user_id, evento, nombre, stack) VALUES ('42', 'Hack', 'Ana Pérez', 'react');
+    """)
+    conn.close()
+
+    async def scenario():
+        store = ContactStore(path)
+        try:
+            await store.add_rows([sheet_row("Luis Gómez", "django")])
+            assert await store.count("Hack") == 2
+            assert [p["nombre"] for p in await store.search("react", "Hack")] == ["Ana Pérez"]
+        finally:
+            store.close()
+
+    asyncio.run(scenario())
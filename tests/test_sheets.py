@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import pytest
+
+import networker_bot.services.sheets as sheets_module
+from networker_bot.services.sheets import SheetsService
+
+class SlowWorksheet:
+    """Hoja cuya próxima escritura tarda más que el deadline, pero se completa"""
+
+    def __init__(self):
+        self.rows = []
+        self.delay = 0.0
+
+    def append_rows(self, rows):
+        time.sleep(self.delay)
+        self.delay = 0.0
+        self.rows.extend(rows)
+
+def make_service(monkeypatch, worksheet, max_retries):
+    monkeypatch.setattr(sheets_module, "SHEETS_UPSERT", False)
+    monkeypatch.setattr(sheets_module, "SHEETS_TIMEOUT", 0.2)
+    monkeypatch.setattr(sheets_module, "SHEETS_MAX_RETRIES", max_retries)
+    monkeypatch.setattr(sheets_module, "SHEETS_RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(sheets_module, "SHEETS_SHARD_WRITES_PER_MINUTE", 0)
+    return SheetsService(worksheet=worksheet)
+
+def test_append_that_times_out_is_not_written_twice(monkeypatch):
+    async def scenario():
+        worksheet = SlowWorksheet()
+        service = make_service(monkeypatch, worksheet, max_retries=3)
+        worksheet.delay = 0.6
+        await service.add_rows([["Ana"], ["Luis"]])
+        await service.close()
+        assert worksheet.rows == [["Ana"], ["Luis"]]
+
+    asyncio.run(scenario())
+
+def test_next_batch_skips_rows_of_a_timed_out_append(monkeypatch):
+    async def scenario():
+        worksheet = SlowWorksheet()
+        service = make_service(monkeypatch, worksheet, max_retries=0)
+        worksheet.delay = 0.6
+        with pytest.raises(asyncio.TimeoutError):
+            await service.add_rows([["Ana"]])
+        # El journal vuelve a enviar la fila no confirmada junto con una nueva
+        await service.add_rows([["Ana"], ["Luis"]])
+        await service.close()
+        assert worksheet.rows == [["Ana"], ["Luis"]]
+
+    asyncio.run(scenario())
@@ -0,0 +1,7 @@
+from networker_bot.worker import worker_metrics_port
+
+def test_each_worker_gets_its_own_metrics_port():
+    assert worker_metrics_port(9101, "w1") == 9101
+    assert worker_metrics_port(9101, "worker.2") == 9102
+    assert worker_metrics_port(9101, "worker") == 9101
+    assert worker_metrics_port(0, "w3") == 0